@@ -0,0 +1,16 @@
+"""
+Admin configuration for media_store app.
+"""
+
+from django.contrib import admin
+from .models import MediaBlob
+
+
+@admin.register(MediaBlob)
+class MediaBlobAdmin(admin.ModelAdmin):
+    """媒体文件管理"""
+    
+    list_display = ['name', 'ref_count', 'created_at']
+    search_fields = ['name', 'digest']
+    ordering = ['-created_at']
+    readonly_fields = ['name', 'digest', 'ref_count', 'created_at']
@@ -0,0 +1,15 @@
+"""
+App configuration for media_store app.
+"""
+
+from django.apps import AppConfig
+
+
+class MediaStoreConfig(AppConfig):
+    """媒体存储应用配置"""
+    
+    name = 'media_store'
+    verbose_name = '媒体存储'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='存储路径')),
+                ('digest', models.CharField(db_index=True, max_length=64, verbose_name='SHA-256摘要')),
+                ('ref_count', models.PositiveIntegerField(default=0, verbose_name='引用数')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+            ],
+            options={
+                'verbose_name': '媒体文件',
+                'verbose_name_plural': '媒体文件',
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+"""
+Media store models for tieba project.
+"""
+
+from django.db import models, transaction
+from django.db.models import F
+
+
+class MediaBlob(models.Model):
+    """媒体文件模型（按内容摘要存储，同一内容只保存一份）"""
+    
+    name = models.CharField(max_length=255, unique=True, verbose_name='存储路径')
+    digest = models.CharField(max_length=64, db_index=True, verbose_name='SHA-256摘要')
+    ref_count = models.PositiveIntegerField(default=0, verbose_name='引用数')
+    
+    # 时间戳
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
+    
+    class Meta:
+        verbose_name = '媒体文件'
+        verbose_name_plural = '媒体文件'
+    
+    def __str__(self):
+        return f'{self.name} ({self.ref_count})'
+    
+    @classmethod
+    def acquire(cls, name):
+        """增加一次引用"""
+        blob, created = cls.objects.get_or_create(name=name, defaults={
+            'digest': cls.digest_from_name(name),
+            'ref_count': 1,
+        })
+        if not created:
+            cls.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+    
+    @classmethod
+    def release(cls, name, storage):
+        """减少一次引用，没有引用时在事务提交后删除文件"""
+        cls.objects.filter(name=name, ref_count__gt=0).update(ref_count=F('ref_count') - 1)
+        if cls.objects.filter(name=name, ref_count=0).delete()[0]:
+            transaction.on_commit(lambda: storage.delete(name))
+    
+    @staticmethod
+    def digest_from_name(name):
+        """从存储路径中取出摘要（cas/ab/cd/<digest>.<ext>）"""
+        return name.rsplit('/', 1)[-1].split('.', 1)[0]
@@ -0,0 +1,79 @@
+"""
+Signal handlers for media_store app.
+
+为各模型上的图片字段维护 MediaBlob 引用计数。
+"""
+
+from django.apps import apps
+from django.db.models.signals import post_init, post_save, post_delete
+from .models import MediaBlob
+from .storage import is_content_addressed
+
+# 需要维护引用计数的图片字段
+MEDIA_FIELDS = {
+    'users.User': ['avatar'],
+    'tiebas.Tieba': ['avatar', 'banner'],
+    'posts.PostImage': ['image'],
+    'user_messages.Message': ['image'],
+}
+
+
+def _field_name(instance, field):
+    # 延迟加载的字段不读取，避免额外查询
+    file = instance.__dict__.get(field)
+    return getattr(file, 'name', file) or ''
+
+
+def _remember_names(sender, instance, **kwargs):
+    """记录实例加载时各图片字段的路径"""
+    instance._media_names = {
+        field: _field_name(instance, field) for field in MEDIA_FIELDS[sender._meta.label]
+    }
+
+
+def _acquire(name):
+    if is_content_addressed(name):
+        MediaBlob.acquire(name)
+
+
+def _release(instance, field, name):
+    if is_content_addressed(name):
+        MediaBlob.release(name, instance._meta.get_field(field).storage)
+
+
+def _update_refs(sender, instance, created, update_fields=None, **kwargs):
+    """字段路径变化时，引用新文件、释放旧文件"""
+    old_names = getattr(instance, '_media_names', {})
+    for field in MEDIA_FIELDS[sender._meta.label]:
+        if field not in instance.__dict__:
+            continue
+        if update_fields is not None and field not in update_fields:
+            continue
+        name = _field_name(instance, field)
+        old_name = '' if created else old_names.get(field, '')
+        if name != old_name:
+            _acquire(name)
+            _release(instance, field, old_name)
+    _remember_names(sender, instance)
+
+
+def _release_refs(sender, instance, **kwargs):
+    """删除实例时释放其图片引用"""
+    for field in MEDIA_FIELDS[sender._meta.label]:
+        _release(instance, field, _field_name(instance, field))
+
+
+for label in MEDIA_FIELDS:
+    model = apps.get_model(label)
+    post_init.connect(_remember_names, sender=model, weak=False)
+    post_save.connect(_update_refs, sender=model, weak=False)
+    post_delete.connect(_release_refs, sender=model, weak=False)
+
+
+def acquire_bulk_created(instances):
+    """bulk_create 不触发 post_save，由调用方在同一事务中补记引用"""
+    for instance in instances:
+        sender = type(instance)
+        for field in MEDIA_FIELDS[sender._meta.label]:
+            _acquire(_field_name(instance, field))
+        _remember_names(sender, instance)
@@ -0,0 +1,68 @@
+"""
+Content-addressed file storage for tieba project.
+
+上传文件按 SHA-256 摘要命名保存在 cas/ 目录下，相同内容只写入一次；
+引用计数记录在 MediaBlob 中，只有没有任何引用时才真正删除文件。
+"""
+
+import hashlib
+import os
+from django.core.files.storage import FileSystemStorage
+
+# 内容寻址文件的目录前缀
+CAS_PREFIX = 'cas/'
+
+
+def file_digest(content):
+    """分块计算文件内容的 SHA-256 摘要"""
+    sha = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks():
+        sha.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return sha.hexdigest()
+
+
+def is_content_addressed(name):
+    """是否为内容寻址存储的文件"""
+    return bool(name) and name.startswith(CAS_PREFIX)
+
+
+class BlobExists(Exception):
+    """相同内容的文件已存在"""
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """内容寻址存储，忽略 upload_to 目录，按摘要去重"""
+    
+    def get_available_name(self, name, max_length=None):
+        if not is_content_addressed(name):
+            return super().get_available_name(name, max_length)
+        # 并发写入同一内容时，另一请求已写好该文件
+        if self.exists(name):
+            raise BlobExists(name)
+        return name
+    
+    def _save(self, name, content):
+        digest = file_digest(content)
+        ext = os.path.splitext(name)[1].lower()
+        name = f'{CAS_PREFIX}{digest[:2]}/{digest[2:4]}/{digest}{ext}'
+        
+        if self.exists(name):
+            return name
+        try:
+            return super()._save(name, content)
+        except BlobExists:
+            return name
+    
+    def delete(self, name):
+        from .models import MediaBlob
+        
+        # 仍被引用的文件不删除
+        if is_content_addressed(name) and MediaBlob.objects.filter(
+            name=name, ref_count__gt=0
+        ).exists():
+            return
+        super().delete(name)
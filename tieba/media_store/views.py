@@ -0,0 +1,48 @@
+"""
+Media store views for tieba project.
+
+开发环境（DEBUG）用 django.views.static.serve 提供文件；生产环境不使用该视图，
+直接返回 FileResponse，配置 MEDIA_X_SENDFILE 时交给前端服务器（X-Sendfile）发送文件。
+"""
+
+import mimetypes
+import os
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.views.static import serve
+from .models import MediaBlob
+
+# 内容寻址的文件永不改变，可长期缓存
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def _file_response(request, path):
+    # 路径越出 MEDIA_ROOT 时 safe_join 抛出 SuspiciousFileOperation（400）
+    full_path = safe_join(settings.MEDIA_ROOT, path)
+    if not os.path.isfile(full_path):
+        raise Http404('文件不存在')
+
+    # 文件名即内容摘要，摘要相同时内容一定相同
+    etag = f'"{MediaBlob.digest_from_name(path)}"'
+    if request.headers.get('If-None-Match') == etag:
+        return HttpResponseNotModified(headers={'ETag': etag})
+
+    if settings.MEDIA_X_SENDFILE:
+        content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = full_path
+    else:
+        response = FileResponse(open(full_path, 'rb'))
+    response['ETag'] = etag
+    return response
+
+
+def serve_blob(request, path):
+    """提供内容寻址文件，附带长期缓存响应头"""
+    if settings.DEBUG:
+        response = serve(request, path, document_root=settings.MEDIA_ROOT)
+    else:
+        response = _file_response(request, path)
+    response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
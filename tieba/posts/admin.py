@@ -33,7 +33,8 @@ class PostAdmin(admin.ModelAdmin):
     inlines = [PostImageInline]
     
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related('tieba', 'author')
+        # 管理后台包含已软删除的帖子
+        return Post.all_objects.select_related('tieba', 'author')
 
 
 @admin.register(PostImage)
@@ -75,7 +76,8 @@ class CommentAdmin(admin.ModelAdmin):
     content_preview.short_description = '内容预览'
     
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related('post', 'author')
+        # 管理后台包含已软删除的评论
+        return Comment.all_objects.select_related('post', 'author')
 
 
 @admin.register(PostLike)
@@ -0,0 +1,15 @@
+"""
+App configuration for posts app.
+"""
+
+from django.apps import AppConfig
+
+
+class PostsConfig(AppConfig):
+    """帖子应用配置"""
+    
+    name = 'posts'
+    verbose_name = '帖子'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
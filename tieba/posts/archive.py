@@ -0,0 +1,155 @@
+"""
+Post archive for tieba project.
+
+最后回复时间早于阈值的帖子连同评论分批搬到 ArchivedPost / ArchivedComment：
+每批在一个事务中写入归档行、删除热表行。归档只是换地方存放，
+贴吧/作者帖子数、作者获赞数保持不变（核对计数时计入归档表），
+标签关联等只服务于活跃帖子的数据随热表行删除。
+有人点赞或收藏的帖子不归档（点赞、收藏属于其他用户，不能随帖子删除）。
+"""
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Prefetch
+from media_store.models import MediaBlob
+from media_store.storage import is_content_addressed
+from tieba.archive import pack
+from tieba.counters import suspended
+from user_messages.models import Notification
+from users.serializers import author_card_prefetch
+from .models import Post, PostImage, Comment, PostCollection, PostLike, PostTag, ArchivedPost, ArchivedComment
+
+POST_PAYLOAD_FIELDS = [
+    'content', 'post_type', 'tags', 'is_essence', 'views_count', 'comments_count',
+    'shares_count', 'updated_at', 'last_reply_at',
+]
+COMMENT_PAYLOAD_FIELDS = ['content', 'parent_id', 'reply_to_id', 'updated_at']
+
+
+def cold_posts(before):
+    """可归档的帖子：已发布、未删除、未置顶、没有被点赞和收藏，且最后回复早于 before"""
+    return Post.objects.live().filter(is_top=False, last_reply_at__lt=before).exclude(
+        Exists(PostCollection.objects.filter(post=OuterRef('pk')))
+    ).exclude(
+        Exists(PostLike.objects.filter(post=OuterRef('pk')))
+    )
+
+
+def _post_payload(post):
+    payload = {field: getattr(post, field) for field in POST_PAYLOAD_FIELDS}
+    payload['images'] = [
+        {'id': image.pk, 'image': image.image.name, 'caption': image.caption, 'sort_order': image.sort_order}
+        for image in post.images.all()
+    ]
+    return payload
+
+
+def _archive_batch(posts):
+    """归档一批帖子，返回归档的评论数"""
+    pks = [post.pk for post in posts]
+    comments = list(Comment.objects.filter(post_id__in=pks).order_by('pk'))
+
+    ArchivedPost.objects.bulk_create([
+        ArchivedPost(
+            original_id=post.pk, tieba_id=post.tieba_id, author_id=post.author_id,
+            title=post.title, likes_count=post.likes_count, created_at=post.created_at,
+            data=pack(_post_payload(post))
+        )
+        for post in posts
+    ])
+    archive_ids = dict(
+        ArchivedPost.objects.filter(original_id__in=pks).values_list('original_id', 'pk')
+    )
+    ArchivedComment.objects.bulk_create([
+        ArchivedComment(
+            original_id=comment.pk, post_id=archive_ids[comment.post_id],
+            author_id=comment.author_id, likes_count=comment.likes_count,
+            created_at=comment.created_at,
+            data=pack({field: getattr(comment, field) for field in COMMENT_PAYLOAD_FIELDS})
+        )
+        for comment in comments
+    ])
+
+    # 归档数据继续引用图片文件，先补记引用，删除热表图片行时的释放与之抵消
+    for post in posts:
+        for image in post.images.all():
+            if is_content_addressed(image.image.name):
+                MediaBlob.acquire(image.image.name)
+
+    # 通知保留，只断开与帖子、评论的关联（否则会被级联删除）
+    Notification.all_objects.filter(related_post_id__in=pks).update(related_post=None)
+    Notification.all_objects.filter(related_comment__post_id__in=pks).update(related_comment=None)
+
+    # 标签只统计活跃帖子，移除关联时标签帖子数随之减少
+    PostTag.objects.filter(post_id__in=pks).delete()
+    with suspended():
+        Post.all_objects.filter(pk__in=pks).delete()
+    return len(comments)
+
+
+def archive_posts(before, batch_size=200):
+    """分批归档帖子，逐批产出 (帖子数, 评论数)"""
+    last_pk = 0
+    while True:
+        posts = list(
+            cold_posts(before).filter(pk__gt=last_pk).order_by('pk').prefetch_related('images')[:batch_size]
+        )
+        if not posts:
+            return
+        last_pk = posts[-1].pk
+        with transaction.atomic():
+            comments = _archive_batch(posts)
+        yield len(posts), comments
+
+
+def get_archived_post(pk):
+    """按原主键读取归档帖子（连同作者、贴吧和评论），不存在时抛出 ArchivedPost.DoesNotExist"""
+    return ArchivedPost.objects.select_related('tieba__category').prefetch_related(
+        author_card_prefetch('author'),
+        Prefetch(
+            'comments',
+            queryset=ArchivedComment.objects.prefetch_related(
+                author_card_prefetch('author')
+            ).order_by('-created_at')
+        )
+    ).get(original_id=pk)
+
+
+def _from_payload(model, payload):
+    """JSON 中的时间等字段转换回模型字段类型"""
+    return {name: model._meta.get_field(name).to_python(value) for name, value in payload.items()}
+
+
+def restore_post(archived):
+    """
+    由归档帖子还原出（不保存的）帖子实例，页面模板和序列化器沿用原有的输出
+
+    图片、评论分别放在 archived_images、archived_comments 属性上；
+    归档帖子不能点赞、收藏，is_liked_by_me 等直接置为 False，不再查询
+    """
+    payload = dict(archived.payload)
+    images = [
+        PostImage(pk=image['id'], post_id=archived.original_id, image=image['image'],
+                  caption=image['caption'], sort_order=image['sort_order'])
+        for image in payload.pop('images')
+    ]
+    post = Post(
+        pk=archived.original_id, tieba=archived.tieba, author=archived.author,
+        title=archived.title, likes_count=archived.likes_count,
+        created_at=archived.created_at, **_from_payload(Post, payload)
+    )
+    comments = []
+    for archived_comment in archived.comments.all():
+        comment = Comment(
+            pk=archived_comment.original_id, post_id=archived.original_id,
+            author=archived_comment.author, likes_count=archived_comment.likes_count,
+            created_at=archived_comment.created_at,
+            **_from_payload(Comment, archived_comment.payload)
+        )
+        comment.is_liked_by_me = False
+        comments.append(comment)
+
+    post.is_archived = True
+    post.is_liked_by_me = post.is_collected_by_me = False
+    post.archived_images = images
+    post.archived_comments = comments
+    return post
@@ -0,0 +1,77 @@
+"""
+Async post views for tieba project.
+
+帖子列表、详情和动态流的异步版本，输出与对应的 DRF 接口一致。
+"""
+
+from asgiref.sync import sync_to_async
+from django.db.models import Exists, OuterRef
+from django.http import Http404
+from tieba.async_views import AsyncAPIView, fetch
+from tieba.sparse_fields import FieldSelection, load_related, nested_context
+from users.serializers import author_card_prefetch
+from .archive import get_archived_post, restore_post
+from .models import Post, Comment, CommentLike, ArchivedPost
+from .serializers import PostSerializer, CommentSerializer, ArchivedPostSerializer
+from .views import filter_posts, feed_posts
+
+
+class AsyncPostListView(AsyncAPIView):
+    """帖子列表（异步）"""
+    
+    read_from_replica = True
+    query_budget = 8
+    
+    async def get(self, request):
+        queryset = filter_posts(Post.objects.all(), request.GET, request.user, live=True)
+        posts, pagination = await self.paginate(request, queryset)
+        serializer = PostSerializer(posts, many=True, context={'request': request})
+        return self.json({**pagination, 'results': serializer.data})
+
+
+class AsyncPostDetailView(AsyncAPIView):
+    """帖子详情（异步），热表中没有时回退读取归档帖子"""
+    
+    read_from_replica = True
+    query_budget = 10
+    
+    async def get(self, request, pk):
+        context = {'request': request}
+        try:
+            post = await filter_posts(Post.objects.all(), request.GET, request.user).aget(pk=pk)
+        except Post.DoesNotExist:
+            try:
+                archived = await sync_to_async(get_archived_post)(pk)
+            except ArchivedPost.DoesNotExist:
+                raise Http404
+            return self.json(ArchivedPostSerializer(restore_post(archived), context=context).data)
+        
+        data = PostSerializer(post, context=context).data
+        selection = FieldSelection.from_request(request)
+        if not selection.expands('comments'):
+            return self.json(data)
+        
+        context = nested_context(context, 'comments')
+        selection = selection.nested('comments')
+        comments = load_related(
+            Comment.objects.filter(post=post, parent=None), selection,
+            prefetch={'author_info': author_card_prefetch('author')}
+        ).order_by('-created_at')
+        if request.user.is_authenticated and selection.includes('is_liked'):
+            comments = comments.annotate(is_liked_by_me=Exists(
+                CommentLike.objects.filter(comment=OuterRef('pk'), user=request.user)
+            ))
+        data['comments'] = CommentSerializer(await fetch(comments), many=True, context=context).data
+        return self.json(data)
+
+
+class AsyncFeedView(AsyncAPIView):
+    """用户动态流（异步）"""
+    
+    read_from_replica = True
+    login_required = True
+    query_budget = 6
+    
+    async def get(self, request):
+        posts = await fetch(feed_posts(request.user, request.GET))
+        return self.json(PostSerializer(posts, many=True, context={'request': request}).data)
@@ -0,0 +1,54 @@
+"""
+将帖子标签字符串回填到标签表的管理命令
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from posts.models import Post, Tag, PostTag
+from posts.tags import parse_tags
+from tieba.counters import COUNTER_SPECS, reconcile
+
+
+class Command(BaseCommand):
+    help = '按主键分批解析已有帖子的 tags 字段，写入标签表和帖子标签关联，并重算标签帖子数'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='每批处理的帖子数')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_pk, processed, linked = 0, 0, 0
+
+        while True:
+            batch = list(
+                Post.objects.filter(pk__gt=last_pk).exclude(tags='').order_by('pk').values_list(
+                    'pk', 'tieba_id', 'tags'
+                )[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+
+            parsed = [(pk, tieba_id, parse_tags(tags)) for pk, tieba_id, tags in batch]
+            names = {name for _, _, tags in parsed for name in tags}
+            with transaction.atomic():
+                Tag.objects.bulk_create([Tag(name=name) for name in names], ignore_conflicts=True)
+                tag_ids = dict(Tag.objects.filter(name__in=names).values_list('name', 'pk'))
+                links = [
+                    PostTag(post_id=pk, tieba_id=tieba_id, tag_id=tag_ids[name])
+                    for pk, tieba_id, tags in parsed for name in tags
+                ]
+                # 已存在的关联跳过，命令可重复执行
+                PostTag.objects.bulk_create(links, ignore_conflicts=True)
+
+            processed += len(batch)
+            linked += len(links)
+            self.stdout.write(f'已处理 {processed} 篇帖子（至 #{last_pk}）')
+
+        # bulk_create 不触发信号，重算标签帖子数
+        spec = next(spec for spec in COUNTER_SPECS if spec[0] == 'posts.Tag')
+        for _ in reconcile(spec, chunk_size=batch_size, fix=True):
+            pass
+
+        self.stdout.write(self.style.SUCCESS(
+            f'回填完成：{processed} 篇帖子，{linked} 条标签关联，共 {Tag.objects.count()} 个标签'
+        ))
@@ -0,0 +1,57 @@
+"""
+检查关键帖子查询执行计划的管理命令
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router
+from posts.models import Post
+from tiebas.models import Tieba
+
+# 执行计划中出现这些内容说明没有用上索引
+BAD_PLAN_MARKERS = ('USE TEMP B-TREE FOR ORDER BY', 'SCAN posts_post')
+
+
+def query_plans(tieba_id):
+    """需要由索引直接完成的查询 [(名称, 查询集, 是否为计数查询)]"""
+    return [
+        ('贴吧帖子列表', Post.objects.tieba_listing(tieba_id)[:20], False),
+        ('贴吧帖子计数（分页）', Post.objects.tieba_listing(tieba_id), True),
+        ('贴吧置顶帖子', Post.objects.pinned(tieba_id), False),
+        ('贴吧非置顶帖子', Post.objects.unpinned(tieba_id)[:20], False),
+        ('贴吧精华帖子', Post.objects.tieba_listing(tieba_id).filter(is_top=False, is_essence=True)[:20], False),
+    ]
+
+
+class Command(BaseCommand):
+    help = '对贴吧帖子列表、置顶帖子等查询执行 EXPLAIN QUERY PLAN，出现全表扫描或临时排序时报错'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plan', action='store_true', help='输出完整执行计划')
+
+    def handle(self, *args, **options):
+        connection = connections[router.db_for_read(Post)]
+        if connection.vendor != 'sqlite':
+            raise CommandError(f'仅支持 SQLite 执行计划检查，当前数据库为 {connection.vendor}')
+
+        tieba_id = Tieba.objects.values_list('pk', flat=True).first() or 1
+        failures = []
+        for name, queryset, is_count in query_plans(tieba_id):
+            plan = self.count_plan(queryset) if is_count else queryset.explain()
+            bad = [line for line in plan.splitlines() if any(marker in line for marker in BAD_PLAN_MARKERS)]
+            status = self.style.ERROR('未命中索引') if bad else self.style.SUCCESS('OK')
+            self.stdout.write(f'{name}: {status}')
+            if bad or options['verbose_plan']:
+                for line in plan.splitlines():
+                    self.stdout.write(f'    {line}')
+            if bad:
+                failures.append(name)
+
+        if failures:
+            raise CommandError(f"以下查询没有完全由索引完成：{'、'.join(failures)}")
+
+    def count_plan(self, queryset):
+        """COUNT 查询的执行计划"""
+        sql, params = queryset.order_by().values('pk').query.sql_with_params()
+        connection = connections[queryset.db]
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN SELECT COUNT(*) FROM ({sql})', params)
+            return '\n'.join(row[-1] for row in cursor.fetchall())
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0003_post_is_essence_post_is_top'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedPost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='相关度')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='排名')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_entries', to='posts.post', verbose_name='帖子')),
+                ('related_post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.post', verbose_name='相关帖子')),
+            ],
+            options={
+                'verbose_name': '相关帖子',
+                'verbose_name_plural': '相关帖子',
+                'unique_together': {('post', 'rank')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PostTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='词项')),
+                ('weight', models.FloatField(verbose_name='权重')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='posts.post', verbose_name='帖子')),
+            ],
+            options={
+                'verbose_name': '帖子词项',
+                'verbose_name_plural': '帖子词项',
+                'unique_together': {('term', 'post')},
+            },
+        ),
+    ]
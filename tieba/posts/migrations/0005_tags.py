@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tiebas', '0004_tieba_recommendations'),
+        ('posts', '0004_related_posts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='标签名')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='帖子数')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+            ],
+            options={
+                'verbose_name': '标签',
+                'verbose_name_plural': '标签',
+                'ordering': ['-posts_count', 'name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PostTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_tags', to='posts.post', verbose_name='帖子')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_tags', to='posts.tag', verbose_name='标签')),
+                ('tieba', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tiebas.tieba', verbose_name='所属贴吧')),
+            ],
+            options={
+                'verbose_name': '帖子标签',
+                'verbose_name_plural': '帖子标签',
+                'indexes': [models.Index(fields=['tieba', 'tag'], name='posts_postt_tieba_i_70d3ce_idx')],
+                'unique_together': {('tag', 'post')},
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0005_tags'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_deleted', False), ('is_published', True)), fields=['tieba', '-is_top', '-is_essence', '-created_at'], name='posts_tieba_listing_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_deleted', False), ('is_published', True), ('is_top', True)), fields=['tieba', '-is_essence', '-created_at'], name='posts_tieba_pinned_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_tieba_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='删除时间'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='删除时间'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['post', 'created_at'], name='posts_comment_live_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('is_deleted', True)), fields=['deleted_at'], name='posts_comment_purge_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_deleted', True)), fields=['deleted_at'], name='posts_post_purge_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:51
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tiebas', '0004_tieba_recommendations'),
+        ('posts', '0007_soft_delete'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.PositiveIntegerField(unique=True, verbose_name='原主键')),
+                ('data', models.BinaryField(verbose_name='压缩数据')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='归档时间')),
+                ('title', models.CharField(max_length=200, verbose_name='帖子标题')),
+                ('likes_count', models.PositiveIntegerField(default=0, verbose_name='点赞数')),
+                ('created_at', models.DateTimeField(verbose_name='创建时间')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_posts', to=settings.AUTH_USER_MODEL, verbose_name='作者')),
+                ('tieba', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_posts', to='tiebas.tieba', verbose_name='所属贴吧')),
+            ],
+            options={
+                'verbose_name': '归档帖子',
+                'verbose_name_plural': '归档帖子',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedComment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.PositiveIntegerField(unique=True, verbose_name='原主键')),
+                ('data', models.BinaryField(verbose_name='压缩数据')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='归档时间')),
+                ('likes_count', models.PositiveIntegerField(default=0, verbose_name='点赞数')),
+                ('created_at', models.DateTimeField(verbose_name='创建时间')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_comments', to=settings.AUTH_USER_MODEL, verbose_name='评论者')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='posts.archivedpost', verbose_name='帖子')),
+            ],
+            options={
+                'verbose_name': '归档评论',
+                'verbose_name_plural': '归档评论',
+                'ordering': ['created_at'],
+            },
+        ),
+    ]
@@ -4,11 +4,36 @@ Post models for tieba project.
 
 from django.db import models
 from django.contrib.auth import get_user_model
+from tieba.archive import ArchivedModel
+from tieba.soft_delete import SoftDeleteManager, SoftDeleteModel, SoftDeleteQuerySet
 
 User = get_user_model()
 
 
-class Post(models.Model):
+class PostQuerySet(SoftDeleteQuerySet):
+    """帖子查询集"""
+    
+    # 贴吧帖子列表的排序，与 posts_tieba_listing_idx 索引列顺序一致
+    TIEBA_LISTING_ORDER = ('-is_top', '-is_essence', '-created_at')
+    
+    def live(self):
+        """未删除且已发布的帖子（条件与部分索引的条件一致，SQLite 才会选用部分索引）"""
+        return self.filter(is_deleted=False, is_published=True)
+    
+    def tieba_listing(self, tieba_id):
+        """贴吧帖子列表：置顶、精华、发布时间倒序，按索引顺序读取"""
+        return self.live().filter(tieba_id=tieba_id).order_by(*self.TIEBA_LISTING_ORDER)
+    
+    def pinned(self, tieba_id):
+        """贴吧置顶帖子，由 posts_tieba_pinned_idx 读取"""
+        return self.live().filter(tieba_id=tieba_id, is_top=True).order_by('-is_essence', '-created_at')
+    
+    def unpinned(self, tieba_id):
+        """贴吧非置顶帖子（置顶帖子由 pinned 单独查询）"""
+        return self.tieba_listing(tieba_id).filter(is_top=False)
+
+
+class Post(SoftDeleteModel):
     """帖子模型"""
     
     POST_TYPE_CHOICES = [
@@ -61,6 +86,9 @@ class Post(models.Model):
     updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
     last_reply_at = models.DateTimeField(auto_now_add=True, verbose_name='最后回复时间')
     
+    objects = SoftDeleteManager.from_queryset(PostQuerySet)()
+    all_objects = PostQuerySet.as_manager()
+    
     class Meta:
         verbose_name = '帖子'
         verbose_name_plural = '帖子'
@@ -68,6 +96,24 @@ class Post(models.Model):
         indexes = [
             models.Index(fields=['tieba', 'post_type', 'is_published']),
             models.Index(fields=['author', 'created_at']),
+            # 贴吧帖子列表：只索引未删除且已发布的帖子，排序列（含方向）与列表排序一致，免去内存排序
+            models.Index(
+                fields=['tieba', '-is_top', '-is_essence', '-created_at'],
+                condition=models.Q(is_deleted=False, is_published=True),
+                name='posts_tieba_listing_idx'
+            ),
+            # 置顶帖子：单独的小索引，不必扫描贴吧全部帖子
+            models.Index(
+                fields=['tieba', '-is_essence', '-created_at'],
+                condition=models.Q(is_deleted=False, is_published=True, is_top=True),
+                name='posts_tieba_pinned_idx'
+            ),
+            # 清理任务按删除时间查找已删除的帖子
+            models.Index(
+                fields=['deleted_at'],
+                condition=models.Q(is_deleted=True),
+                name='posts_post_purge_idx'
+            ),
         ]
     
     def __str__(self):
@@ -96,7 +142,7 @@ class PostImage(models.Model):
         return f'{self.post.title} - 图片 {self.id}'
 
 
-class Comment(models.Model):
+class Comment(SoftDeleteModel):
     """评论模型"""
     
     post = models.ForeignKey(
@@ -145,6 +191,19 @@ class Comment(models.Model):
         verbose_name = '评论'
         verbose_name_plural = '评论'
         ordering = ['created_at']
+        indexes = [
+            # 帖子评论列表只索引未删除的评论
+            models.Index(
+                fields=['post', 'created_at'],
+                condition=models.Q(is_deleted=False),
+                name='posts_comment_live_idx'
+            ),
+            models.Index(
+                fields=['deleted_at'],
+                condition=models.Q(is_deleted=True),
+                name='posts_comment_purge_idx'
+            ),
+        ]
     
     def __str__(self):
         return f'{self.author} 评论: {self.content[:50]}'
@@ -225,4 +284,159 @@ class PostCollection(models.Model):
         unique_together = ('post', 'user')
     
     def __str__(self):
-        return f'{self.user} 收藏 {self.post}'
\ No newline at end of file
+        return f'{self.user} 收藏 {self.post}'
+
+
+class PostTerm(models.Model):
+    """帖子标题/标签的 TF-IDF 词项（相关帖子倒排索引）"""
+    
+    term = models.CharField(max_length=64, verbose_name='词项')
+    post = models.ForeignKey(
+        Post, 
+        on_delete=models.CASCADE, 
+        related_name='terms',
+        verbose_name='帖子'
+    )
+    weight = models.FloatField(verbose_name='权重')
+    
+    class Meta:
+        verbose_name = '帖子词项'
+        verbose_name_plural = '帖子词项'
+        unique_together = ('term', 'post')
+    
+    def __str__(self):
+        return f'{self.term} @ {self.post_id}'
+
+
+class RelatedPost(models.Model):
+    """相关帖子（预先计算）"""
+    
+    post = models.ForeignKey(
+        Post, 
+        on_delete=models.CASCADE, 
+        related_name='related_entries',
+        verbose_name='帖子'
+    )
+    related_post = models.ForeignKey(
+        Post, 
+        on_delete=models.CASCADE, 
+        related_name='+',
+        verbose_name='相关帖子'
+    )
+    score = models.FloatField(verbose_name='相关度')
+    rank = models.PositiveSmallIntegerField(verbose_name='排名')
+    
+    class Meta:
+        verbose_name = '相关帖子'
+        verbose_name_plural = '相关帖子'
+        unique_together = ('post', 'rank')
+    
+    def __str__(self):
+        return f'{self.post_id} -> {self.related_post_id}'
+
+
+class Tag(models.Model):
+    """标签模型"""
+    
+    name = models.CharField(max_length=50, unique=True, verbose_name='标签名')
+    posts_count = models.PositiveIntegerField(default=0, verbose_name='帖子数')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
+    
+    class Meta:
+        verbose_name = '标签'
+        verbose_name_plural = '标签'
+        ordering = ['-posts_count', 'name']
+    
+    def __str__(self):
+        return self.name
+
+
+class PostTag(models.Model):
+    """帖子标签关联模型"""
+    
+    post = models.ForeignKey(
+        Post, 
+        on_delete=models.CASCADE, 
+        related_name='post_tags',
+        verbose_name='帖子'
+    )
+    tag = models.ForeignKey(
+        Tag, 
+        on_delete=models.CASCADE, 
+        related_name='post_tags',
+        verbose_name='标签'
+    )
+    # 冗余所属贴吧，按贴吧统计标签云时不必关联帖子表
+    tieba = models.ForeignKey(
+        'tiebas.Tieba', 
+        on_delete=models.CASCADE, 
+        related_name='+',
+        verbose_name='所属贴吧'
+    )
+    
+    class Meta:
+        verbose_name = '帖子标签'
+        verbose_name_plural = '帖子标签'
+        unique_together = ('tag', 'post')
+        indexes = [
+            models.Index(fields=['tieba', 'tag']),
+        ]
+    
+    def __str__(self):
+        return f'{self.post_id} #{self.tag}'
+
+
+class ArchivedPost(ArchivedModel):
+    """归档帖子（正文、图片等字段压缩存放在 data 中）"""
+    
+    tieba = models.ForeignKey(
+        'tiebas.Tieba', 
+        on_delete=models.CASCADE, 
+        related_name='archived_posts',
+        verbose_name='所属贴吧'
+    )
+    author = models.ForeignKey(
+        User, 
+        on_delete=models.CASCADE, 
+        related_name='archived_posts',
+        verbose_name='作者'
+    )
+    title = models.CharField(max_length=200, verbose_name='帖子标题')
+    # 归档时的点赞数，作者获赞数核对时计入
+    likes_count = models.PositiveIntegerField(default=0, verbose_name='点赞数')
+    created_at = models.DateTimeField(verbose_name='创建时间')
+    
+    class Meta:
+        verbose_name = '归档帖子'
+        verbose_name_plural = '归档帖子'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return self.title
+
+
+class ArchivedComment(ArchivedModel):
+    """归档评论（随所属帖子一起归档）"""
+    
+    post = models.ForeignKey(
+        ArchivedPost, 
+        on_delete=models.CASCADE, 
+        related_name='comments',
+        verbose_name='帖子'
+    )
+    author = models.ForeignKey(
+        User, 
+        on_delete=models.CASCADE, 
+        related_name='archived_comments',
+        verbose_name='评论者'
+    )
+    likes_count = models.PositiveIntegerField(default=0, verbose_name='点赞数')
+    created_at = models.DateTimeField(verbose_name='创建时间')
+    
+    class Meta:
+        verbose_name = '归档评论'
+        verbose_name_plural = '归档评论'
+        ordering = ['created_at']
+    
+    def __str__(self):
+        return f'{self.author_id} 评论 {self.post_id}'
@@ -0,0 +1,263 @@
+"""
+Related posts index for tieba project.
+
+帖子标题按中文二元组（连续两个汉字）和英文/数字单词切分，标签作为整体词项，
+以 TF-IDF 向量的余弦相似度衡量文本相关度，结果存入 RelatedPost 表。
+发帖和修改标题、标签时增量索引：写入帖子的词项，通过倒排索引找出候选帖子计算相关列表，
+并把帖子插入候选帖子的相关列表；IDF 的文档总数取缓存值，不在每次索引时统计全表。
+build_related_posts 命令定期全量重建，
+同时计入共同互动（点赞、收藏、评论的用户重合度）并刷新 IDF。
+"""
+
+import math
+import re
+from collections import Counter
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from tieba.caching import get_or_compute
+from users.serializers import author_card_prefetch
+from .models import Post, PostTerm, RelatedPost, PostLike, PostCollection, Comment
+from .tags import parse_tags
+
+RELATED_SIZE = 10
+TAG_WEIGHT = 2
+# 增量索引只与最近的这些帖子（按主键）比较
+CANDIDATE_WINDOW = 50000
+# 出现在超过该比例帖子中的词项区分度太低，不参与候选召回
+MAX_DF_RATIO = 0.1
+SAME_TIEBA_BONUS = 0.05
+# 文档总数（参与索引的帖子数）的缓存，只用于 IDF，允许有一定滞后
+DOCUMENT_COUNT_CACHE_KEY = 'posts:related:document_count'
+DOCUMENT_COUNT_TIMEOUT = 3600
+
+_CJK_RE = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff]+')
+_WORD_RE = re.compile(r'[a-z0-9]{2,}')
+
+
+def tokenize(title, tags=''):
+    """标题和标签的词项计数"""
+    terms = Counter()
+    text = (title or '').lower()
+    for run in _CJK_RE.findall(text):
+        if len(run) == 1:
+            terms[run] += 1
+        for i in range(len(run) - 1):
+            terms[run[i:i + 2]] += 1
+    for word in _WORD_RE.findall(text):
+        terms[word[:64]] += 1
+    for tag in parse_tags(tags):
+        terms[f'#{tag}'[:64]] += TAG_WEIGHT
+    return terms
+
+
+def idf(df, total):
+    return math.log((total + 1) / (df + 1)) + 1
+
+
+def tfidf_vector(counts, df, total):
+    """归一化的 TF-IDF 向量 {词项: 权重}"""
+    vector = {
+        term: (1 + math.log(count)) * idf(df.get(term, 0), total)
+        for term, count in counts.items()
+    }
+    norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1
+    return {term: weight / norm for term, weight in vector.items()}
+
+
+def indexed_posts():
+    return Post.objects.filter(is_published=True, is_deleted=False)
+
+
+def document_count():
+    """参与索引的帖子数（缓存 DOCUMENT_COUNT_TIMEOUT 秒，全量重建时刷新）"""
+    return get_or_compute(
+        DOCUMENT_COUNT_CACHE_KEY, lambda: indexed_posts().count(), DOCUMENT_COUNT_TIMEOUT
+    )
+
+
+def _write_related(post_id, scored):
+    """覆盖一个帖子的相关列表，scored 为 [(分数, 帖子主键)]"""
+    RelatedPost.objects.filter(post_id=post_id).delete()
+    RelatedPost.objects.bulk_create([
+        RelatedPost(post_id=post_id, related_post_id=related_id, score=score, rank=rank)
+        for rank, (score, related_id) in enumerate(scored, 1)
+    ])
+
+
+def index_post(post):
+    """增量索引新发布（或修改过标题、标签）的帖子"""
+    counts = tokenize(post.title, post.tags)
+    total = document_count()
+    with transaction.atomic():
+        PostTerm.objects.filter(post=post).delete()
+        if not counts:
+            RelatedPost.objects.filter(post=post).delete()
+            return
+
+        df = dict(
+            PostTerm.objects.filter(term__in=list(counts)).values('term').annotate(
+                n=Count('id')
+            ).values_list('term', 'n')
+        )
+        vector = tfidf_vector(counts, df, total)
+        PostTerm.objects.bulk_create([
+            PostTerm(term=term, post=post, weight=weight) for term, weight in vector.items()
+        ])
+
+        # 通过倒排索引召回有共同词项的近期帖子
+        max_df = max(10, total * MAX_DF_RATIO)
+        terms = [term for term in vector if df.get(term, 0) <= max_df]
+        postings = PostTerm.objects.filter(
+            term__in=terms,
+            post_id__gt=post.pk - CANDIDATE_WINDOW,
+            post__is_published=True,
+            post__is_deleted=False,
+        ).exclude(post=post).values_list('post_id', 'post__tieba_id', 'term', 'weight')
+
+        scores = Counter()
+        for post_id, tieba_id, term, weight in postings:
+            if post_id not in scores and tieba_id == post.tieba_id:
+                scores[post_id] += SAME_TIEBA_BONUS
+            scores[post_id] += vector[term] * weight
+        top = [(score, post_id) for post_id, score in scores.most_common(RELATED_SIZE)]
+        _write_related(post.pk, top)
+
+        # 新帖比候选帖子已有的相关帖子更相关时插入其列表
+        existing = {}
+        for entry in RelatedPost.objects.filter(post_id__in=[post_id for _, post_id in top]):
+            existing.setdefault(entry.post_id, []).append((entry.score, entry.related_post_id))
+        for score, post_id in top:
+            scored = existing.get(post_id, [])
+            if len(scored) >= RELATED_SIZE and score <= min(scored)[0]:
+                continue
+            scored = sorted(scored + [(score, post.pk)], reverse=True)[:RELATED_SIZE]
+            _write_related(post_id, scored)
+
+
+def related_posts_for(post, limit=5):
+    """按预先计算的相关列表取帖子，尚无索引时退回同吧最新帖子"""
+    related_ids = list(
+        RelatedPost.objects.filter(post=post).order_by('rank').values_list(
+            'related_post_id', flat=True
+        )[:limit]
+    )
+    if not related_ids:
+        return list(
+            Post.objects.filter(tieba_id=post.tieba_id).exclude(id=post.id).prefetch_related(
+                author_card_prefetch('author')
+            ).order_by('-created_at')[:limit]
+        )
+
+    posts = Post.objects.filter(
+        pk__in=related_ids, is_published=True, is_deleted=False
+    ).prefetch_related(author_card_prefetch('author')).in_bulk()
+    return [posts[pk] for pk in related_ids if pk in posts]
+
+
+def rebuild_related_posts(engagement_weight=0.3, size=RELATED_SIZE, chunk_size=1000, batch_size=2000):
+    """
+    全量重建词项索引和相关帖子表
+
+    相关度 = (1 - engagement_weight) * 文本相似度 + engagement_weight * 共同互动相似度，
+    返回 (帖子数, 相关帖子行数)
+    """
+    # 只有批处理任务依赖 NumPy/SciPy，请求处理路径不导入
+    import numpy as np
+    from scipy import sparse
+
+    posts = list(
+        indexed_posts().order_by('pk').values_list(
+            'pk', 'title', 'tags', 'tieba_id'
+        ).iterator(chunk_size=10000)
+    )
+    if not posts:
+        with transaction.atomic():
+            PostTerm.objects.all().delete()
+            RelatedPost.objects.all().delete()
+        return 0, 0
+
+    post_ids = np.array([row[0] for row in posts])
+    tieba_ids = np.array([row[3] for row in posts])
+    index_of = {pk: i for i, pk in enumerate(post_ids.tolist())}
+
+    # 文本：帖子 x 词项 TF-IDF 矩阵（行归一化）
+    vocabulary, rows, cols, values = {}, [], [], []
+    for i, (_, title, tags, _) in enumerate(posts):
+        for term, count in tokenize(title, tags).items():
+            rows.append(i)
+            cols.append(vocabulary.setdefault(term, len(vocabulary)))
+            values.append(1 + math.log(count))
+    terms = np.array(list(vocabulary), dtype=object)
+    tf = sparse.csr_matrix((values, (rows, cols)), shape=(len(posts), len(vocabulary)))
+    df = np.bincount(tf.indices, minlength=len(vocabulary))
+    idf_weights = np.log((len(posts) + 1) / (df + 1)) + 1
+    text = tf @ sparse.diags(idf_weights)
+    norms = np.sqrt(np.asarray(text.power(2).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    text = (sparse.diags(1 / norms) @ text).tocsr()
+    # 区分度太低的词项只保留在索引里，不参与相似度计算
+    informative = sparse.diags((df <= max(10, len(posts) * MAX_DF_RATIO)).astype(float))
+    text_for_similarity = (text @ informative).tocsr()
+
+    # 共同互动：用户 x 帖子 矩阵（列归一化）
+    pairs = set()
+    for model, user_field in ((PostLike, 'user_id'), (PostCollection, 'user_id'), (Comment, 'author_id')):
+        for user_id, post_id in model.objects.values_list(user_field, 'post_id').iterator(chunk_size=10000):
+            if post_id in index_of:
+                pairs.add((user_id, index_of[post_id]))
+    if pairs:
+        pairs = list(pairs)
+        users, user_rows = np.unique([user_id for user_id, _ in pairs], return_inverse=True)
+        engagement = sparse.csr_matrix(
+            (np.ones(len(pairs)), (user_rows, [col for _, col in pairs])),
+            shape=(len(users), len(posts))
+        )
+        engagement_norms = np.sqrt(np.asarray(engagement.sum(axis=0)).ravel())
+        engagement_norms[engagement_norms == 0] = 1
+        engagement_t = (engagement @ sparse.diags(1 / engagement_norms)).T.tocsr()
+    else:
+        engagement_weight = 0
+
+    related = []
+    for start in range(0, len(posts), chunk_size):
+        end = min(start + chunk_size, len(posts))
+        scores = (1 - engagement_weight) * (text_for_similarity[start:end] @ text_for_similarity.T)
+        if engagement_weight:
+            scores = scores + engagement_weight * (engagement_t[start:end] @ engagement_t.T)
+        scores = scores.tocsr()
+        for offset in range(end - start):
+            i = start + offset
+            row = scores.getrow(offset)
+            mask = (row.indices != i) & (row.data > 0)
+            cols, data = row.indices[mask], row.data[mask]
+            data = data + SAME_TIEBA_BONUS * (tieba_ids[cols] == tieba_ids[i])
+            if len(data) > size:
+                keep = np.argpartition(-data, size)[:size]
+                cols, data = cols[keep], data[keep]
+            order = np.argsort(-data, kind='stable')
+            related.extend(
+                RelatedPost(
+                    post_id=int(post_ids[i]), related_post_id=int(post_ids[col]),
+                    score=float(score), rank=rank
+                )
+                for rank, (col, score) in enumerate(zip(cols[order], data[order]), 1)
+            )
+
+    # 整表替换，读取方在事务提交前看到的仍是旧结果
+    coo = text.tocoo()
+    with transaction.atomic():
+        PostTerm.objects.all().delete()
+        RelatedPost.objects.all().delete()
+        for start in range(0, coo.nnz, batch_size):
+            PostTerm.objects.bulk_create([
+                PostTerm(term=terms[col], post_id=int(post_ids[row]), weight=float(weight))
+                for row, col, weight in zip(
+                    coo.row[start:start + batch_size],
+                    coo.col[start:start + batch_size],
+                    coo.data[start:start + batch_size],
+                )
+            ])
+        RelatedPost.objects.bulk_create(related, batch_size=batch_size)
+    cache.set(DOCUMENT_COUNT_CACHE_KEY, len(posts), DOCUMENT_COUNT_TIMEOUT)
+    return len(posts), len(related)
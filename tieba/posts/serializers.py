@@ -2,18 +2,34 @@
 Post serializers for tieba project.
 """
 
+from django.core.exceptions import PermissionDenied as DjangoPermissionDenied
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Exists, OuterRef
 from rest_framework import serializers
-from .models import Post, PostImage, Comment, PostLike, CommentLike, PostCollection
-from users.serializers import UserSerializer
+from rest_framework.exceptions import PermissionDenied
+from tieba.sparse_fields import FieldSelection, SparseFieldsMixin, load_related, nested_context
+from tieba.uploads import check_upload_errors
+from .models import Post, PostImage, Comment, PostLike, CommentLike, PostCollection, Tag
+from .services import publish_post
+from users.serializers import AuthorCardSerializer, author_card_prefetch
 from tiebas.serializers import TiebaSerializer
 
 
+class TagSerializer(serializers.ModelSerializer):
+    """标签序列化器"""
+    
+    class Meta:
+        model = Tag
+        fields = ['id', 'name', 'posts_count']
+        read_only_fields = fields
+
+
 class PostImageSerializer(serializers.ModelSerializer):
     """帖子图片序列化器"""
     
     class Meta:
         model = PostImage
-        fields = ['id', 'image', 'description', 'order']
+        fields = ['id', 'image', 'caption', 'sort_order']
         read_only_fields = ['id']
     
     def to_representation(self, instance):
@@ -23,22 +39,25 @@ class PostImageSerializer(serializers.ModelSerializer):
         return data
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """评论序列化器"""
     
-    author_info = UserSerializer(source='author', read_only=True)
-    like_count = serializers.IntegerField(read_only=True)
+    author_info = AuthorCardSerializer(source='author', read_only=True)
     is_liked = serializers.SerializerMethodField()
     
     class Meta:
         model = Comment
         fields = [
-            'id', 'post', 'author', 'author_info', 'content', 'parent',
-            'like_count', 'is_liked', 'created_at', 'updated_at'
+            'id', 'post', 'author', 'author_info', 'content', 'parent', 'reply_to',
+            'likes_count', 'is_liked', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'author', 'likes_count', 'created_at', 'updated_at']
+        # 编译序列化器读取的注解列
+        annotation_fields = {'is_liked': 'is_liked_by_me'}
     
     def get_is_liked(self, obj):
+        if hasattr(obj, 'is_liked_by_me'):
+            return obj.is_liked_by_me
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return CommentLike.objects.filter(
@@ -55,28 +74,30 @@ class PostCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Post
         fields = [
-            'tieba', 'title', 'content', 'post_type', 'images',
-            'is_anonymous', 'is_top', 'is_essence'
+            'tieba', 'title', 'content', 'post_type', 'tags', 'images',
+            'is_top', 'is_essence'
         ]
     
+    def validate(self, attrs):
+        # 上传处理器拒绝的图片（格式不符或超过大小限制）
+        check_upload_errors(self.context.get('request'), 'images')
+        return attrs
+    
     def create(self, validated_data):
-        images_data = validated_data.pop('images', [])
-        post = Post.objects.create(**validated_data)
-        
-        for image_data in images_data:
-            PostImage.objects.create(post=post, **image_data)
-        
-        return post
+        try:
+            return publish_post(**validated_data)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.messages)
+        except DjangoPermissionDenied as e:
+            raise PermissionDenied(str(e))
 
 
-class PostSerializer(serializers.ModelSerializer):
+class PostSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """帖子序列化器"""
     
-    author_info = UserSerializer(source='author', read_only=True)
+    author_info = AuthorCardSerializer(source='author', read_only=True)
     tieba_info = TiebaSerializer(source='tieba', read_only=True)
     images = PostImageSerializer(many=True, read_only=True)
-    comment_count = serializers.IntegerField(read_only=True)
-    like_count = serializers.IntegerField(read_only=True)
     is_liked = serializers.SerializerMethodField()
     is_collected = serializers.SerializerMethodField()
     
@@ -84,15 +105,20 @@ class PostSerializer(serializers.ModelSerializer):
         model = Post
         fields = [
             'id', 'tieba', 'tieba_info', 'author', 'author_info', 'title', 'content',
-            'post_type', 'images', 'is_anonymous', 'is_top', 'is_essence',
-            'comment_count', 'like_count', 'is_liked', 'is_collected',
-            'view_count', 'created_at', 'updated_at'
+            'post_type', 'tags', 'images', 'is_top', 'is_essence',
+            'views_count', 'likes_count', 'comments_count', 'shares_count',
+            'is_liked', 'is_collected', 'created_at', 'updated_at', 'last_reply_at'
         ]
         read_only_fields = [
-            'id', 'comment_count', 'like_count', 'view_count', 'created_at', 'updated_at'
+            'id', 'author', 'views_count', 'likes_count', 'comments_count', 'shares_count',
+            'created_at', 'updated_at', 'last_reply_at'
         ]
+        # 编译序列化器读取的注解列（见 with_viewer_flags）
+        annotation_fields = {'is_liked': 'is_liked_by_me', 'is_collected': 'is_collected_by_me'}
     
     def get_is_liked(self, obj):
+        if hasattr(obj, 'is_liked_by_me'):
+            return obj.is_liked_by_me
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return PostLike.objects.filter(
@@ -101,6 +127,8 @@ class PostSerializer(serializers.ModelSerializer):
         return False
     
     def get_is_collected(self, obj):
+        if hasattr(obj, 'is_collected_by_me'):
+            return obj.is_collected_by_me
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return PostCollection.objects.filter(
@@ -109,6 +137,22 @@ class PostSerializer(serializers.ModelSerializer):
         return False
 
 
+class PostSummarySerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """帖子摘要序列化器（与当前用户无关，可缓存）"""
+    
+    author_info = AuthorCardSerializer(source='author', read_only=True)
+    tieba_name = serializers.CharField(source='tieba.name', read_only=True)
+    images = PostImageSerializer(many=True, read_only=True)
+    
+    class Meta:
+        model = Post
+        fields = [
+            'id', 'tieba', 'tieba_name', 'author_info', 'title', 'post_type', 'images',
+            'is_essence', 'views_count', 'likes_count', 'comments_count', 'created_at'
+        ]
+        read_only_fields = fields
+
+
 class PostDetailSerializer(PostSerializer):
     """帖子详情序列化器"""
     
@@ -116,17 +160,44 @@ class PostDetailSerializer(PostSerializer):
     
     class Meta(PostSerializer.Meta):
         fields = PostSerializer.Meta.fields + ['comments']
+        expandable_fields = ['comments']
     
     def get_comments(self, obj):
-        comments = Comment.objects.filter(post=obj, parent=None).order_by('-created_at')
-        serializer = CommentSerializer(comments, many=True, context=self.context)
+        context = nested_context(self.context, 'comments')
+        request = self.context.get('request')
+        selection = FieldSelection.from_request(request, context['field_path'])
+        comments = load_related(
+            Comment.objects.filter(post=obj, parent=None), selection,
+            prefetch={'author_info': author_card_prefetch('author')}
+        ).order_by('-created_at')
+        if request and request.user.is_authenticated and selection.includes('is_liked'):
+            comments = comments.annotate(is_liked_by_me=Exists(
+                CommentLike.objects.filter(comment=OuterRef('pk'), user=request.user)
+            ))
+        serializer = CommentSerializer(comments, many=True, context=context)
         return serializer.data
 
 
-class PostLikeSerializer(serializers.ModelSerializer):
+class ArchivedPostSerializer(PostSerializer):
+    """归档帖子序列化器（输入为 restore_post 还原出的帖子，输出与帖子详情一致）"""
+    
+    images = PostImageSerializer(source='archived_images', many=True, read_only=True)
+    comments = serializers.SerializerMethodField()
+    is_archived = serializers.BooleanField(read_only=True)
+    
+    class Meta(PostSerializer.Meta):
+        fields = PostSerializer.Meta.fields + ['comments', 'is_archived']
+        expandable_fields = ['comments']
+    
+    def get_comments(self, obj):
+        comments = [comment for comment in obj.archived_comments if comment.parent_id is None]
+        return CommentSerializer(comments, many=True, context=nested_context(self.context, 'comments')).data
+
+
+class PostLikeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """帖子点赞序列化器"""
     
-    user_info = UserSerializer(source='user', read_only=True)
+    user_info = AuthorCardSerializer(source='user', read_only=True)
     post_info = PostSerializer(source='post', read_only=True)
     
     class Meta:
@@ -135,10 +206,10 @@ class PostLikeSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
-class CommentLikeSerializer(serializers.ModelSerializer):
+class CommentLikeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """评论点赞序列化器"""
     
-    user_info = UserSerializer(source='user', read_only=True)
+    user_info = AuthorCardSerializer(source='user', read_only=True)
     comment_info = CommentSerializer(source='comment', read_only=True)
     
     class Meta:
@@ -147,10 +218,10 @@ class CommentLikeSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
-class PostCollectionSerializer(serializers.ModelSerializer):
+class PostCollectionSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """帖子收藏序列化器"""
     
-    user_info = UserSerializer(source='user', read_only=True)
+    user_info = AuthorCardSerializer(source='user', read_only=True)
     post_info = PostSerializer(source='post', read_only=True)
     
     class Meta:
@@ -0,0 +1,106 @@
+"""
+Post services for tieba project.
+
+发帖流程：先完成全部校验，再在一个事务内写入帖子与图片，
+提交后发出一次 post_published 事件供下游（计数、索引等）处理。
+"""
+
+from django import forms
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.db import transaction
+from media_store.models import MediaBlob
+from media_store.signals import acquire_bulk_created
+from media_store.storage import is_content_addressed
+from tiebas.models import TiebaMember
+from .models import Post, PostImage
+from .signals import post_published
+
+# 单帖最多图片数
+MAX_POST_IMAGES = 9
+
+
+def validate_post(author, tieba, title, content, post_type='normal', images=()):
+    """校验发帖参数，不通过时抛出 ValidationError / PermissionDenied"""
+    errors = []
+
+    if not title or not title.strip():
+        errors.append('帖子标题不能为空')
+    elif len(title) > Post._meta.get_field('title').max_length:
+        errors.append('帖子标题过长')
+
+    if not content or not content.strip():
+        errors.append('帖子内容不能为空')
+
+    if post_type not in dict(Post.POST_TYPE_CHOICES):
+        errors.append('帖子类型无效')
+
+    if len(images) > MAX_POST_IMAGES:
+        errors.append(f'最多上传 {MAX_POST_IMAGES} 张图片')
+
+    # 校验图片内容（读取图片头，拒绝非图片文件）
+    image_field = forms.ImageField()
+    for image_data in images:
+        try:
+            image_field.clean(image_data['image'])
+        except ValidationError as e:
+            errors.extend(e.messages)
+
+    if errors:
+        raise ValidationError(errors)
+
+    # 非公开贴吧需要检查成员身份
+    if not tieba.is_public:
+        if not TiebaMember.objects.filter(tieba=tieba, user=author).exists():
+            raise PermissionDenied('您不是该贴吧成员，无法发帖')
+
+
+def publish_post(author, tieba, title, content, post_type='normal', images=(), **extra):
+    """
+    发布帖子
+
+    images 为字典列表，每项包含 image 以及可选的 caption / sort_order；
+    帖子与全部图片在同一事务中写入，图片使用一次 bulk_create
+    """
+    images = [image_data for image_data in images if image_data.get('image')]
+    validate_post(author, tieba, title, content, post_type, images)
+
+    post_images = [
+        PostImage(
+            image=image_data['image'],
+            caption=image_data.get('caption', ''),
+            sort_order=image_data.get('sort_order', i),
+        )
+        for i, image_data in enumerate(images)
+    ]
+
+    try:
+        with transaction.atomic():
+            post = Post.objects.create(
+                author=author,
+                tieba=tieba,
+                title=title,
+                content=content,
+                post_type=post_type,
+                **extra
+            )
+
+            for post_image in post_images:
+                post_image.post = post
+            PostImage.objects.bulk_create(post_images)
+            # 图片引用与帖子一同提交，提交前后共享的文件都不会被其他请求释放删除
+            acquire_bulk_created(post_images)
+
+            transaction.on_commit(
+                lambda: post_published.send(sender=Post, post=post, images=post_images)
+            )
+    except Exception:
+        # 事务回滚后清理已写入存储的图片文件（仍被其他对象引用的共享文件保留）
+        for post_image in post_images:
+            if post_image.image and post_image.image._committed:
+                name = post_image.image.name
+                if is_content_addressed(name) and MediaBlob.objects.filter(name=name).exists():
+                    continue
+                post_image.image.delete(save=False)
+        raise
+
+    return post
@@ -0,0 +1,162 @@
+"""
+Signals for posts app.
+
+维护帖子、评论、点赞、标签相关的统计字段，并定义帖子发布事件；
+帖子标签变化时同步标签关联。作者获赞数（需要关联查询）、相关帖子索引
+和回复通知投递为后台任务，不在请求中执行。
+"""
+
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+from task_queue.registry import enqueue
+from tieba.counters import adjust_counter, is_suspended
+from tieba.soft_delete import soft_deleted
+from tiebas.models import Tieba
+from users.models import User
+from .models import Post, Comment, PostLike, CommentLike, Tag, PostTag
+from .tags import sync_post_tags
+
+# 帖子（连同图片）发布事务提交后发出，参数: post, images
+post_published = Signal()
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, **kwargs):
+    """发帖：贴吧帖子数、作者帖子数 +1"""
+    if created:
+        adjust_counter(Tieba.objects.filter(pk=instance.tieba_id), 'posts_count', 1)
+        adjust_counter(User.objects.filter(pk=instance.author_id), 'posts_count', 1)
+
+
+@receiver(post_init, sender=Post)
+def post_tags_snapshot(sender, instance, **kwargs):
+    """记录加载时的标签，保存时据此判断是否需要同步（延迟加载的字段不读取，避免逐行查询）"""
+    instance._loaded_tags = instance.__dict__.get('tags')
+
+
+@receiver(post_save, sender=Post)
+def post_tags_changed(sender, instance, created, **kwargs):
+    """新建帖子或标签变化：同步标签关联（未加载标签的实例没有修改标签，跳过）"""
+    tags = instance.__dict__.get('tags')
+    if tags is None:
+        return
+    if created or tags != instance._loaded_tags:
+        sync_post_tags(instance)
+        instance._loaded_tags = tags
+
+
+@receiver(post_init, sender=Post)
+def post_text_snapshot(sender, instance, **kwargs):
+    """记录加载时的标题和标签，修改后重新索引相关帖子"""
+    instance._indexed_text = (instance.__dict__.get('title'), instance.__dict__.get('tags'))
+
+
+@receiver(post_save, sender=Post)
+def post_text_changed(sender, instance, created, **kwargs):
+    """已发布帖子的标题或标签变化：投递词项索引和相关帖子更新任务（新帖由 post_published 投递）"""
+    # 未加载的字段（only/defer）不读取，视为未修改
+    text = (instance.__dict__.get('title'), instance.__dict__.get('tags'))
+    if created or text == instance._indexed_text:
+        return
+    instance._indexed_text = text
+    if instance.is_published and not instance.is_deleted:
+        enqueue('posts.index_post', {'post_id': instance.pk}, unique_key=f'posts.index_post:{instance.pk}')
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    """删帖：贴吧帖子数、作者帖子数 -1（软删除时已经减过）"""
+    if instance.is_deleted:
+        return
+    adjust_counter(Tieba.objects.filter(pk=instance.tieba_id), 'posts_count', -1)
+    adjust_counter(User.objects.filter(pk=instance.author_id), 'posts_count', -1)
+
+
+def adjust_author_likes_later(delta, **target):
+    """作者获赞数由后台任务合并更新，target 为 post_id 或 comment_id"""
+    if not is_suspended():
+        enqueue('posts.adjust_author_likes', {'delta': delta, **target})
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    """评论：帖子评论数 +1，并刷新最后回复时间；回复通知由后台任务发送"""
+    if created:
+        adjust_counter(
+            Post.objects.filter(pk=instance.post_id), 'comments_count', 1,
+            last_reply_at=instance.created_at or timezone.now()
+        )
+        enqueue('user_messages.notify_reply', {'comment_id': instance.pk})
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    """删除评论：帖子评论数 -1（软删除时已经减过）"""
+    if instance.is_deleted:
+        return
+    adjust_counter(Post.objects.filter(pk=instance.post_id), 'comments_count', -1)
+
+
+@receiver(soft_deleted, sender=Post)
+def post_soft_deleted(sender, instance, **kwargs):
+    """软删除帖子：计数同删帖，并移除标签关联（标签帖子数随之 -1）"""
+    adjust_counter(Tieba.objects.filter(pk=instance.tieba_id), 'posts_count', -1)
+    adjust_counter(User.objects.filter(pk=instance.author_id), 'posts_count', -1)
+    for post_tag in PostTag.objects.filter(post_id=instance.pk):
+        post_tag.delete()
+
+
+@receiver(soft_deleted, sender=Comment)
+def comment_soft_deleted(sender, instance, **kwargs):
+    """软删除评论：帖子评论数 -1"""
+    adjust_counter(Post.objects.filter(pk=instance.post_id), 'comments_count', -1)
+
+
+@receiver(post_save, sender=PostTag)
+def post_tag_created(sender, instance, created, **kwargs):
+    """添加标签：标签帖子数 +1"""
+    if created:
+        adjust_counter(Tag.objects.filter(pk=instance.tag_id), 'posts_count', 1)
+
+
+@receiver(post_delete, sender=PostTag)
+def post_tag_deleted(sender, instance, **kwargs):
+    """移除标签：标签帖子数 -1"""
+    adjust_counter(Tag.objects.filter(pk=instance.tag_id), 'posts_count', -1)
+
+
+@receiver(post_save, sender=PostLike)
+def post_like_created(sender, instance, created, **kwargs):
+    """点赞帖子：帖子点赞数、作者获赞数 +1"""
+    if created:
+        adjust_counter(Post.objects.filter(pk=instance.post_id), 'likes_count', 1)
+        adjust_author_likes_later(1, post_id=instance.post_id)
+
+
+@receiver(post_delete, sender=PostLike)
+def post_like_deleted(sender, instance, **kwargs):
+    """取消点赞帖子：帖子点赞数、作者获赞数 -1"""
+    adjust_counter(Post.objects.filter(pk=instance.post_id), 'likes_count', -1)
+    adjust_author_likes_later(-1, post_id=instance.post_id)
+
+
+@receiver(post_save, sender=CommentLike)
+def comment_like_created(sender, instance, created, **kwargs):
+    """点赞评论：评论点赞数、评论者获赞数 +1"""
+    if created:
+        adjust_counter(Comment.objects.filter(pk=instance.comment_id), 'likes_count', 1)
+        adjust_author_likes_later(1, comment_id=instance.comment_id)
+
+
+@receiver(post_delete, sender=CommentLike)
+def comment_like_deleted(sender, instance, **kwargs):
+    """取消点赞评论：评论点赞数、评论者获赞数 -1"""
+    adjust_counter(Comment.objects.filter(pk=instance.comment_id), 'likes_count', -1)
+    adjust_author_likes_later(-1, comment_id=instance.comment_id)
+
+
+@receiver(post_published, sender=Post)
+def post_published_index(sender, post, **kwargs):
+    """发帖：投递词项索引和相关帖子更新任务"""
+    enqueue('posts.index_post', {'post_id': post.pk}, unique_key=f'posts.index_post:{post.pk}')
@@ -0,0 +1,69 @@
+"""
+Post tag helpers for tieba project.
+
+Post.tags 保存用户输入的标签字符串，发帖或修改标签时解析并同步到
+Tag / PostTag 表，按标签筛选和标签云都走索引查询。
+"""
+
+import re
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from tieba.caching import get_or_refresh
+from .models import Tag, PostTag
+
+MAX_TAGS_PER_POST = 10
+TAG_MAX_LENGTH = 50
+TAG_CLOUD_SIZE = 50
+
+_SEPARATOR_RE = re.compile(r'[\s,，、;；#]+')
+
+
+def normalize_tag(name):
+    return name.strip().lower()[:TAG_MAX_LENGTH]
+
+
+def parse_tags(text):
+    """把逗号/空格分隔的标签字符串解析为去重后的标签列表（保持顺序）"""
+    tags = []
+    for name in _SEPARATOR_RE.split(text or ''):
+        name = normalize_tag(name)
+        if name and name not in tags:
+            tags.append(name)
+    return tags[:MAX_TAGS_PER_POST]
+
+
+def sync_post_tags(post):
+    """按 post.tags 同步帖子的标签关联，新增/删除关联由信号维护标签帖子数"""
+    names = parse_tags(post.tags)
+    with transaction.atomic():
+        current = {
+            post_tag.tag.name: post_tag
+            for post_tag in PostTag.objects.filter(post=post).select_related('tag')
+        }
+        for name, post_tag in current.items():
+            if name not in names:
+                post_tag.delete()
+
+        missing = [name for name in names if name not in current]
+        if missing:
+            Tag.objects.bulk_create([Tag(name=name) for name in missing], ignore_conflicts=True)
+            for tag in Tag.objects.filter(name__in=missing):
+                PostTag.objects.create(post=post, tag=tag, tieba_id=post.tieba_id)
+
+
+def tag_cloud(tieba_id):
+    """贴吧内最常用的标签 [{name, count}]，软过期后后台刷新"""
+    def compute():
+        return list(
+            PostTag.objects.filter(tieba_id=tieba_id).values('tag__name').annotate(
+                count=Count('id')
+            ).order_by('-count', 'tag__name').values('tag__name', 'count')[:TAG_CLOUD_SIZE]
+        )
+
+    cloud = get_or_refresh(
+        f'tiebas:{tieba_id}:tag_cloud', compute,
+        settings.TIEBA_LIST_CACHE_SOFT_TIMEOUT,
+        settings.TIEBA_LIST_CACHE_HARD_TIMEOUT
+    )
+    return [{'name': row['tag__name'], 'count': row['count']} for row in cloud]
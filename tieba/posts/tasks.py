@@ -0,0 +1,41 @@
+"""
+Background tasks for posts app.
+"""
+
+from collections import Counter
+from task_queue.models import Task
+from task_queue.registry import task
+from tieba.counters import adjust_counter
+from users.models import User
+from .models import Post, Comment
+from .related import index_post as index_related_post
+
+
+@task('posts.index_post', priority=Task.PRIORITY_LOW)
+def index_post(post_id):
+    """写入帖子词项索引并更新相关帖子（帖子已删除或归档时跳过）"""
+    post = Post.objects.live().filter(pk=post_id).first()
+    if post is not None:
+        index_related_post(post)
+
+
+@task('posts.adjust_author_likes', batch=True)
+def adjust_author_likes(batch):
+    """合并一批点赞增量，按作者各更新一次获赞数"""
+    post_deltas, comment_deltas = Counter(), Counter()
+    for args in batch:
+        if 'post_id' in args:
+            post_deltas[args['post_id']] += args['delta']
+        else:
+            comment_deltas[args['comment_id']] += args['delta']
+
+    author_deltas = Counter()
+    post_authors = Post.all_objects.filter(pk__in=list(post_deltas)).values_list('pk', 'author_id')
+    for post_id, author_id in post_authors:
+        author_deltas[author_id] += post_deltas[post_id]
+    comment_authors = Comment.all_objects.filter(pk__in=list(comment_deltas)).values_list('pk', 'author_id')
+    for comment_id, author_id in comment_authors:
+        author_deltas[author_id] += comment_deltas[comment_id]
+
+    for author_id, delta in author_deltas.items():
+        adjust_counter(User.objects.filter(pk=author_id), 'likes_count', delta)
@@ -5,10 +5,12 @@ URL configuration for posts app.
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from . import views
+from .async_views import AsyncPostListView, AsyncPostDetailView, AsyncFeedView
 
 router = DefaultRouter()
 router.register(r'posts', views.PostViewSet, basename='post')
 router.register(r'comments', views.CommentViewSet, basename='comment')
+router.register(r'tags', views.TagViewSet, basename='tag')
 
 urlpatterns = [
     # 用户帖子相关
@@ -17,6 +19,11 @@ urlpatterns = [
     # 动态流
     path('feed/', views.FeedView.as_view(), name='feed'),
     
+    # 异步版本（ASGI 部署下不占用线程等待数据库）
+    path('async/posts/', AsyncPostListView.as_view(), name='async-post-list'),
+    path('async/posts/<int:pk>/', AsyncPostDetailView.as_view(), name='async-post-detail'),
+    path('async/feed/', AsyncFeedView.as_view(), name='async-feed'),
+    
     # 包含视图集路由
     path('', include(router.urls)),
 ]
\ No newline at end of file
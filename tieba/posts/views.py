@@ -2,23 +2,112 @@
 Post views for tieba project.
 """
 
-from django.db.models import Q
+from django.db.models import Count, Exists, F, Max, OuterRef, Q, Subquery, Sum
+from django.http import Http404
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from .models import Post, PostImage, Comment, PostLike, CommentLike, PostCollection
+from tieba.compiled import CompiledListMixin, CompiledSerializer
+from tieba.conditional import ConditionalRetrieveMixin
+from tieba.sparse_fields import FieldSelection, load_related
+from .archive import get_archived_post, restore_post
+from .models import (
+    Post, PostQuerySet, PostImage, Comment, PostLike, CommentLike, PostCollection, Tag, ArchivedPost
+)
 from .serializers import (
-    PostSerializer, PostCreateSerializer, PostDetailSerializer,
+    PostSerializer, PostCreateSerializer, PostDetailSerializer, ArchivedPostSerializer,
     CommentSerializer, CommentCreateSerializer,
-    PostLikeSerializer, CommentLikeSerializer, PostCollectionSerializer
+    PostLikeSerializer, CommentLikeSerializer, PostCollectionSerializer, TagSerializer
 )
+from .tags import normalize_tag
 from tiebas.models import TiebaMember
+from users.serializers import AUTHOR_CARD_VERSION_FIELDS, author_card_prefetch, author_card_version
+
+# 帖子、评论列表的编译序列化器（输出与 PostSerializer / CommentSerializer 一致）
+compiled_posts = CompiledSerializer(PostSerializer)
+compiled_comments = CompiledSerializer(CommentSerializer)
+
+
+def with_viewer_flags(queryset, user):
+    """当前用户是否点赞/收藏随列表一起查询，避免逐行查询"""
+    if user.is_authenticated:
+        queryset = queryset.annotate(
+            is_liked_by_me=Exists(PostLike.objects.filter(post=OuterRef('pk'), user=user)),
+            is_collected_by_me=Exists(PostCollection.objects.filter(post=OuterRef('pk'), user=user)),
+        )
+    return queryset
+
+
+def post_relations(queryset, selection, user):
+    """按输出字段加载帖子的贴吧、作者、图片及当前用户标记（帖子各列表共用）"""
+    queryset = load_related(
+        queryset, selection,
+        select={'tieba_info': 'tieba__category'},
+        prefetch={'author_info': author_card_prefetch('author'), 'images': 'images'},
+    )
+    if selection.includes('is_liked') or selection.includes('is_collected'):
+        queryset = with_viewer_flags(queryset, user)
+    return queryset
+
+
+def filter_posts(queryset, params, user, live=False):
+    """
+    按查询参数筛选帖子（帖子列表接口及其异步版本共用）
+    
+    live 为 True 时只返回未删除且已发布的帖子；按贴吧筛选时整个查询由贴吧列表索引完成
+    """
+    tieba_id = params.get('tieba_id')
+    author_id = params.get('author_id')
+    post_type = params.get('type')
+    is_top = params.get('is_top')
+    is_essence = params.get('is_essence')
+    tag = params.get('tag')
+    
+    if live:
+        queryset = queryset.live()
+    
+    if tieba_id:
+        queryset = queryset.filter(tieba_id=tieba_id)
+    
+    if author_id:
+        queryset = queryset.filter(author_id=author_id)
+    
+    if post_type:
+        queryset = queryset.filter(post_type=post_type)
+    
+    if is_top is not None:
+        queryset = queryset.filter(is_top=is_top.lower() == 'true')
+    
+    if is_essence is not None:
+        queryset = queryset.filter(is_essence=is_essence.lower() == 'true')
+    
+    # 按标签筛选（经由帖子标签关联表的 (tag, post) 索引）
+    if tag:
+        queryset = queryset.filter(post_tags__tag__name=normalize_tag(tag))
+    
+    queryset = post_relations(queryset, FieldSelection.from_params(params), user)
+    return queryset.order_by(*PostQuerySet.TIEBA_LISTING_ORDER)
+
 
+def feed_posts(user, params, limit=50):
+    """用户动态流：关注的贴吧和用户的最新帖子"""
+    followed_tiebas = user.tieba_follows.values_list('tieba_id', flat=True)
+    followed_users = user.following.values_list('following_id', flat=True)
+    queryset = Post.objects.filter(
+        Q(tieba_id__in=followed_tiebas) | Q(author_id__in=followed_users)
+    )
+    queryset = post_relations(queryset, FieldSelection.from_params(params), user)
+    return queryset.order_by('-created_at')[:limit]
 
-class PostViewSet(viewsets.ModelViewSet):
+
+class PostViewSet(ConditionalRetrieveMixin, CompiledListMixin, viewsets.ModelViewSet):
     """帖子视图集"""
     
+    compiled_serializer = compiled_posts
+    read_from_replica = True
+    query_budget = {'list': 8, 'retrieve': 10, 'search': 8, 'pinned': 6}
+    
     queryset = Post.objects.all()
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     
@@ -30,43 +119,78 @@ class PostViewSet(viewsets.ModelViewSet):
         return PostSerializer
     
     def get_queryset(self):
-        queryset = super().get_queryset()
-        
-        # 过滤条件
-        tieba_id = self.request.query_params.get('tieba_id')
-        author_id = self.request.query_params.get('author_id')
-        post_type = self.request.query_params.get('type')
-        is_top = self.request.query_params.get('is_top')
-        is_essence = self.request.query_params.get('is_essence')
-        
-        if tieba_id:
-            queryset = queryset.filter(tieba_id=tieba_id)
-        
-        if author_id:
-            queryset = queryset.filter(author_id=author_id)
-        
-        if post_type:
-            queryset = queryset.filter(post_type=post_type)
-        
-        if is_top is not None:
-            queryset = queryset.filter(is_top=is_top.lower() == 'true')
-        
-        if is_essence is not None:
-            queryset = queryset.filter(is_essence=is_essence.lower() == 'true')
-        
-        return queryset.order_by('-is_top', '-is_essence', '-created_at')
+        return filter_posts(
+            super().get_queryset(), self.request.query_params, self.request.user,
+            live=self.action == 'list'
+        )
+    
+    def get_version_queryset(self):
+        """帖子详情的版本列：帖子、所在贴吧、作者、一级评论（含评论作者）及当前用户的点赞/收藏"""
+        user = self.request.user
+        comments = Comment.objects.filter(post=OuterRef('pk'), parent=None).order_by().values('post')
+        
+        def comments_aggregate(expression):
+            return Subquery(comments.annotate(version=expression).values('version'))
+        
+        queryset = with_viewer_flags(Post.objects.all(), user).annotate(
+            comments_updated_at=comments_aggregate(Max('updated_at')),
+            comments_likes=comments_aggregate(Sum('likes_count')),
+            comment_authors_updated_at=comments_aggregate(Max('author__updated_at')),
+            comment_authors_counts=comments_aggregate(Sum(sum(
+                F(f'author__{field}') for field in AUTHOR_CARD_VERSION_FIELDS[1:]
+            ))),
+        )
+        viewer_fields = []
+        if user.is_authenticated:
+            queryset = queryset.annotate(my_comment_likes=Subquery(
+                CommentLike.objects.filter(comment__post=OuterRef('pk'), user=user).order_by()
+                .values('comment__post').annotate(version=Count('pk')).values('version')
+            ))
+            viewer_fields = ['is_liked_by_me', 'is_collected_by_me', 'my_comment_likes']
+        return queryset.values(
+            'updated_at', 'views_count', 'likes_count', 'comments_count', 'shares_count',
+            'tieba__updated_at', 'tieba__members_count', 'tieba__posts_count',
+            'tieba__today_posts_count', 'tieba__category__name',
+            *author_card_version('author'),
+            'comments_updated_at', 'comments_likes',
+            'comment_authors_updated_at', 'comment_authors_counts',
+            *viewer_fields,
+            last_modified=F('updated_at'),
+        )
+    
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            # 热表中没有时回退读取归档帖子
+            try:
+                archived = get_archived_post(int(kwargs['pk']))
+            except (ValueError, ArchivedPost.DoesNotExist):
+                raise Http404
+            serializer = ArchivedPostSerializer(restore_post(archived), context=self.get_serializer_context())
+            return Response(serializer.data)
     
     def perform_create(self, serializer):
-        # 检查用户是否有权限在该贴吧发帖
-        tieba = serializer.validated_data['tieba']
-        
-        if tieba.is_private:
-            # 私有贴吧需要检查成员身份
-            if not TiebaMember.objects.filter(tieba=tieba, user=self.request.user).exists():
-                raise permissions.PermissionDenied('您不是该贴吧成员，无法发帖')
-        
+        # 校验（包括贴吧成员身份）与写入由发帖服务完成
         serializer.save(author=self.request.user)
     
+    def perform_destroy(self, instance):
+        # 软删除，超过保留期后由 purge_soft_deleted 物理删除
+        instance.soft_delete()
+    
+    @action(detail=False, methods=['get'])
+    def pinned(self, request):
+        """贴吧置顶帖子"""
+        tieba_id = request.query_params.get('tieba_id')
+        if not tieba_id:
+            return Response({'error': '缺少 tieba_id 参数'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        queryset = post_relations(
+            Post.objects.pinned(tieba_id), FieldSelection.from_request(request), request.user
+        )
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+    
     @action(detail=True, methods=['post'])
     def like(self, request, pk=None):
         """点赞帖子"""
@@ -75,12 +199,9 @@ class PostViewSet(viewsets.ModelViewSet):
         if PostLike.objects.filter(post=post, user=request.user).exists():
             return Response({'error': '已经点赞过该帖子'}, status=status.HTTP_400_BAD_REQUEST)
         
+        # 帖子点赞数由信号维护
         like = PostLike.objects.create(post=post, user=request.user)
         
-        # 更新帖子点赞数
-        post.like_count = PostLike.objects.filter(post=post).count()
-        post.save()
-        
         serializer = PostLikeSerializer(like)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     
@@ -93,12 +214,9 @@ class PostViewSet(viewsets.ModelViewSet):
         if not like:
             return Response({'error': '未点赞该帖子'}, status=status.HTTP_400_BAD_REQUEST)
         
+        # 帖子点赞数由信号维护
         like.delete()
         
-        # 更新帖子点赞数
-        post.like_count = PostLike.objects.filter(post=post).count()
-        post.save()
-        
         return Response({'message': '已取消点赞'}, status=status.HTTP_200_OK)
     
     @action(detail=True, methods=['post'])
@@ -142,7 +260,7 @@ class PostViewSet(viewsets.ModelViewSet):
             )
         
         post.is_top = True
-        post.save()
+        post.save(update_fields=['is_top', 'updated_at'])
         
         serializer = self.get_serializer(post)
         return Response(serializer.data)
@@ -164,7 +282,7 @@ class PostViewSet(viewsets.ModelViewSet):
             )
         
         post.is_top = False
-        post.save()
+        post.save(update_fields=['is_top', 'updated_at'])
         
         serializer = self.get_serializer(post)
         return Response(serializer.data)
@@ -186,7 +304,7 @@ class PostViewSet(viewsets.ModelViewSet):
             )
         
         post.is_essence = True
-        post.save()
+        post.save(update_fields=['is_essence', 'updated_at'])
         
         serializer = self.get_serializer(post)
         return Response(serializer.data)
@@ -208,7 +326,7 @@ class PostViewSet(viewsets.ModelViewSet):
             )
         
         post.is_essence = False
-        post.save()
+        post.save(update_fields=['is_essence', 'updated_at'])
         
         serializer = self.get_serializer(post)
         return Response(serializer.data)
@@ -233,9 +351,12 @@ class PostViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(CompiledListMixin, viewsets.ModelViewSet):
     """评论视图集"""
     
+    compiled_serializer = compiled_comments
+    query_budget = {'list': 8, 'retrieve': 6}
+    
     queryset = Comment.objects.all()
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     
@@ -256,11 +377,24 @@ class CommentViewSet(viewsets.ModelViewSet):
         if author_id:
             queryset = queryset.filter(author_id=author_id)
         
+        selection = FieldSelection.from_request(self.request)
+        queryset = load_related(queryset, selection, prefetch={'author_info': author_card_prefetch('author')})
+        
+        user = self.request.user
+        if user.is_authenticated and selection.includes('is_liked'):
+            queryset = queryset.annotate(
+                is_liked_by_me=Exists(CommentLike.objects.filter(comment=OuterRef('pk'), user=user))
+            )
+        
         return queryset.order_by('-created_at')
     
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
     
+    def perform_destroy(self, instance):
+        # 软删除，超过保留期后由 purge_soft_deleted 物理删除
+        instance.soft_delete()
+    
     @action(detail=True, methods=['post'])
     def like(self, request, pk=None):
         """点赞评论"""
@@ -269,12 +403,9 @@ class CommentViewSet(viewsets.ModelViewSet):
         if CommentLike.objects.filter(comment=comment, user=request.user).exists():
             return Response({'error': '已经点赞过该评论'}, status=status.HTTP_400_BAD_REQUEST)
         
+        # 评论点赞数由信号维护
         like = CommentLike.objects.create(comment=comment, user=request.user)
         
-        # 更新评论点赞数
-        comment.like_count = CommentLike.objects.filter(comment=comment).count()
-        comment.save()
-        
         serializer = CommentLikeSerializer(like)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     
@@ -287,15 +418,31 @@ class CommentViewSet(viewsets.ModelViewSet):
         if not like:
             return Response({'error': '未点赞该评论'}, status=status.HTTP_400_BAD_REQUEST)
         
+        # 评论点赞数由信号维护
         like.delete()
         
-        # 更新评论点赞数
-        comment.like_count = CommentLike.objects.filter(comment=comment).count()
-        comment.save()
-        
         return Response({'message': '已取消点赞'}, status=status.HTTP_200_OK)
 
 
+class TagViewSet(viewsets.ReadOnlyModelViewSet):
+    """标签视图集"""
+    
+    read_from_replica = True
+    query_budget = {'list': 4, 'retrieve': 3}
+    
+    queryset = Tag.objects.filter(posts_count__gt=0)
+    serializer_class = TagSerializer
+    permission_classes = [permissions.AllowAny]
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # 标签名前缀搜索（用于输入联想）
+        prefix = self.request.query_params.get('q')
+        if prefix:
+            queryset = queryset.filter(name__startswith=normalize_tag(prefix))
+        return queryset
+
+
 class UserPostsView(APIView):
     """用户帖子相关视图"""
     
@@ -303,13 +450,21 @@ class UserPostsView(APIView):
     
     def get(self, request):
         """获取用户发布的帖子"""
-        posts = Post.objects.filter(author=request.user)
-        serializer = PostSerializer(posts, many=True)
+        posts = post_relations(
+            Post.objects.filter(author=request.user), FieldSelection.from_request(request), request.user
+        )
+        serializer = PostSerializer(posts, many=True, context={'request': request})
         return Response(serializer.data)
     
     def post(self, request):
         """获取用户收藏的帖子"""
-        collections = PostCollection.objects.filter(user=request.user)
+        collections = PostCollection.objects.filter(user=request.user).select_related(
+            'post__tieba__category'
+        ).prefetch_related(
+            author_card_prefetch('user'),
+            author_card_prefetch('post__author'),
+            'post__images'
+        )
         serializer = PostCollectionSerializer(collections, many=True)
         return Response(serializer.data)
 
@@ -321,16 +476,5 @@ class FeedView(APIView):
     
     def get(self, request):
         """获取用户动态流"""
-        # 获取用户关注的贴吧
-        followed_tiebas = request.user.tieba_follows.values_list('tieba_id', flat=True)
-        
-        # 获取用户关注的用户
-        followed_users = request.user.following.values_list('following_id', flat=True)
-        
-        # 获取动态流帖子
-        posts = Post.objects.filter(
-            Q(tieba_id__in=followed_tiebas) | Q(author_id__in=followed_users)
-        ).order_by('-created_at')[:50]
-        
-        serializer = PostSerializer(posts, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        posts = feed_posts(request.user, request.query_params)
+        return Response(compiled_posts.serialize(posts, {'request': request}))
@@ -0,0 +1,17 @@
+"""
+Admin configuration for task_queue app.
+"""
+
+from django.contrib import admin
+from .models import Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    """后台任务管理"""
+    
+    list_display = ['name', 'status', 'priority', 'attempts', 'run_at', 'created_at']
+    list_filter = ['status', 'name']
+    search_fields = ['name', 'unique_key']
+    ordering = ['priority', 'run_at']
+    readonly_fields = ['claimed_by', 'claimed_at', 'last_error', 'created_at']
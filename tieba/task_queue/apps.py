@@ -0,0 +1,17 @@
+"""
+App configuration for task_queue app.
+"""
+
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class TaskQueueConfig(AppConfig):
+    """后台任务队列应用配置"""
+    
+    name = 'task_queue'
+    verbose_name = '后台任务'
+    
+    def ready(self):
+        # 导入各应用的 tasks 模块以注册任务
+        autodiscover_modules('tasks')
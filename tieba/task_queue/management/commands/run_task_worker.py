@@ -0,0 +1,62 @@
+"""
+后台任务 worker 管理命令
+"""
+import os
+import signal
+import socket
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from task_queue.worker import claim, recover_stale, run_tasks
+
+
+class Command(BaseCommand):
+    help = '循环领取并执行后台任务，收到 SIGTERM/SIGINT 后执行完当前一批再退出'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='每次领取的任务数')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='没有任务时的轮询间隔（秒）')
+        parser.add_argument(
+            '--lock-timeout', type=int, default=300,
+            help='领取后超过该秒数仍未完成的任务视为 worker 异常退出，重新排队'
+        )
+        parser.add_argument('--once', action='store_true', help='执行完当前到期的任务后退出')
+        parser.add_argument('--worker-id', default=f'{socket.gethostname()}:{os.getpid()}', help='worker 标识')
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        worker_id = options['worker_id']
+        self.stdout.write(f'worker {worker_id} 已启动')
+        total_succeeded, total_failed = 0, 0
+        last_recover = 0
+
+        while not self.stopping:
+            close_old_connections()
+            if time.monotonic() - last_recover >= options['lock_timeout'] / 2:
+                recovered = recover_stale(options['lock_timeout'])
+                if recovered:
+                    self.stdout.write(self.style.WARNING(f'收回超时任务 {recovered} 个'))
+                last_recover = time.monotonic()
+
+            tasks = claim(worker_id, options['batch_size'])
+            if not tasks:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+
+            succeeded, failed = run_tasks(tasks)
+            total_succeeded += succeeded
+            total_failed += failed
+            if options['verbosity'] >= 2 or failed:
+                self.stdout.write(f'本批成功 {succeeded} 个，失败 {failed} 个')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'worker {worker_id} 已退出，共成功 {total_succeeded} 个，失败 {total_failed} 个'
+        ))
+
+    def stop(self, signum, frame):
+        self.stopping = True
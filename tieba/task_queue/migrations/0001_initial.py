@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:54
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Task',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='任务名')),
+                ('args', models.JSONField(blank=True, default=dict, verbose_name='参数')),
+                ('priority', models.PositiveSmallIntegerField(default=5, verbose_name='优先级')),
+                ('status', models.CharField(choices=[('pending', '等待执行'), ('running', '执行中'), ('failed', '失败')], default='pending', max_length=10, verbose_name='状态')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='已执行次数')),
+                ('max_attempts', models.PositiveSmallIntegerField(default=3, verbose_name='最多执行次数')),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='最早执行时间')),
+                ('last_error', models.TextField(blank=True, verbose_name='最近错误')),
+                ('unique_key', models.CharField(blank=True, max_length=200, null=True, verbose_name='去重键')),
+                ('claimed_by', models.CharField(blank=True, max_length=100, verbose_name='领取者')),
+                ('claimed_at', models.DateTimeField(blank=True, null=True, verbose_name='领取时间')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+            ],
+            options={
+                'verbose_name': '后台任务',
+                'verbose_name_plural': '后台任务',
+                'ordering': ['priority', 'run_at', 'id'],
+                'indexes': [models.Index(condition=models.Q(('status', 'pending')), fields=['priority', 'run_at'], name='task_queue_ready_idx'), models.Index(fields=['claimed_by'], name='task_queue_claimed_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='task',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'pending')), fields=('unique_key',), name='task_queue_pending_unique_key'),
+        ),
+    ]
@@ -0,0 +1,74 @@
+"""
+Task queue models for tieba project.
+"""
+
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    """后台任务模型（执行成功后删除，失败且不再重试的保留供排查）"""
+    
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, '等待执行'),
+        (STATUS_RUNNING, '执行中'),
+        (STATUS_FAILED, '失败'),
+    ]
+    
+    # 数值越小越先执行
+    PRIORITY_HIGH = 0
+    PRIORITY_NORMAL = 5
+    PRIORITY_LOW = 9
+    
+    name = models.CharField(max_length=100, verbose_name='任务名')
+    args = models.JSONField(default=dict, blank=True, verbose_name='参数')
+    priority = models.PositiveSmallIntegerField(default=PRIORITY_NORMAL, verbose_name='优先级')
+    
+    # 执行状态
+    status = models.CharField(
+        max_length=10, 
+        choices=STATUS_CHOICES, 
+        default=STATUS_PENDING,
+        verbose_name='状态'
+    )
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name='已执行次数')
+    max_attempts = models.PositiveSmallIntegerField(default=3, verbose_name='最多执行次数')
+    run_at = models.DateTimeField(default=timezone.now, verbose_name='最早执行时间')
+    last_error = models.TextField(blank=True, verbose_name='最近错误')
+    
+    # 去重键：同一键同时只保留一个等待执行的任务
+    unique_key = models.CharField(max_length=200, null=True, blank=True, verbose_name='去重键')
+    
+    # 领取信息
+    claimed_by = models.CharField(max_length=100, blank=True, verbose_name='领取者')
+    claimed_at = models.DateTimeField(null=True, blank=True, verbose_name='领取时间')
+    
+    # 时间戳
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
+    
+    class Meta:
+        verbose_name = '后台任务'
+        verbose_name_plural = '后台任务'
+        ordering = ['priority', 'run_at', 'id']
+        indexes = [
+            # worker 按优先级、执行时间领取等待中的任务
+            models.Index(
+                fields=['priority', 'run_at'],
+                condition=models.Q(status='pending'),
+                name='task_queue_ready_idx'
+            ),
+            models.Index(fields=['claimed_by'], name='task_queue_claimed_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['unique_key'],
+                condition=models.Q(status='pending'),
+                name='task_queue_pending_unique_key'
+            ),
+        ]
+    
+    def __str__(self):
+        return f'{self.name} ({self.get_status_display()})'
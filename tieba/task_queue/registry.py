@@ -0,0 +1,90 @@
+"""
+Task registry for tieba project.
+
+各应用在 tasks 模块中用 @task 注册任务，请求处理中用 enqueue 投递，
+由 run_task_worker 命令在独立进程中执行。任务行与业务数据在同一个数据库，
+在事务中投递的任务随事务一起提交或回滚。
+
+batch=True 的任务一次接收同名任务的参数列表，便于合并处理（例如合并同一用户的计数增量）。
+TASK_QUEUE_EAGER 为 True 时不入库，事务提交后在当前进程直接执行（开发、调试用）。
+"""
+
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+class TaskSpec:
+    """一个已注册的任务"""
+
+    def __init__(self, name, func, batch, priority, max_attempts):
+        self.name = name
+        self.func = func
+        self.batch = batch
+        self.priority = priority
+        self.max_attempts = max_attempts
+
+    def run(self, args_list):
+        """执行一组任务参数：批量任务调用一次，普通任务逐个调用"""
+        if self.batch:
+            self.func(args_list)
+        else:
+            for args in args_list:
+                self.func(**args)
+
+
+def task(name, batch=False, priority=Task.PRIORITY_NORMAL, max_attempts=3):
+    """注册任务的装饰器"""
+    def decorator(func):
+        if name in _registry:
+            raise ValueError(f'任务 {name} 重复注册')
+        _registry[name] = TaskSpec(name, func, batch, priority, max_attempts)
+        return func
+    return decorator
+
+
+def get_task(name):
+    return _registry.get(name)
+
+
+def _run_eager(spec, args):
+    try:
+        with transaction.atomic():
+            spec.run([args])
+    except Exception:
+        logger.exception('任务 %s 执行失败', spec.name)
+
+
+def enqueue(name, args=None, priority=None, delay=0, unique_key=None):
+    """
+    投递任务
+
+    args 为可 JSON 序列化的参数字典；delay 为延迟执行的秒数；
+    unique_key 相同且尚未执行的任务已存在时不再重复投递
+    """
+    spec = _registry.get(name)
+    if spec is None:
+        raise ValueError(f'未注册的任务 {name}')
+    args = args or {}
+
+    if settings.TASK_QUEUE_EAGER:
+        transaction.on_commit(lambda: _run_eager(spec, args))
+        return
+
+    Task.objects.bulk_create([
+        Task(
+            name=name,
+            args=args,
+            priority=spec.priority if priority is None else priority,
+            max_attempts=spec.max_attempts,
+            run_at=timezone.now() + timedelta(seconds=delay),
+            unique_key=unique_key,
+        )
+    ], ignore_conflicts=unique_key is not None)
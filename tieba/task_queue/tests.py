@@ -0,0 +1,67 @@
+"""
+Task queue tests for tieba project.
+"""
+
+from datetime import timedelta
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from .models import Task
+from .registry import enqueue, task
+from .worker import _fail, claim, recover_stale, run_tasks
+
+
+@task('task_queue.tests.flaky')
+def flaky(fail=False):
+    if fail:
+        raise RuntimeError('失败')
+
+
+@override_settings(TASK_QUEUE_EAGER=False)
+class RequeueTests(TestCase):
+    """失败、超时的任务放回等待队列时与同一去重键的等待任务不冲突"""
+
+    def enqueue(self, fail=False):
+        enqueue('task_queue.tests.flaky', {'fail': fail}, unique_key='k1')
+
+    def test_fail_with_pending_duplicate_drops_running_task(self):
+        self.enqueue()
+        running = claim('w', 10)
+        self.enqueue()
+
+        _fail(running, 'error')
+
+        self.assertFalse(Task.objects.filter(pk=running[0].pk).exists())
+        pending = Task.objects.get(unique_key='k1')
+        self.assertEqual(pending.status, Task.STATUS_PENDING)
+        self.assertEqual(pending.attempts, 0)
+
+    def test_fail_without_duplicate_requeues(self):
+        self.enqueue()
+        running = claim('w', 10)
+
+        _fail(running, 'error')
+
+        task = Task.objects.get(pk=running[0].pk)
+        self.assertEqual(task.status, Task.STATUS_PENDING)
+        self.assertEqual(task.last_error, 'error')
+        self.assertGreater(task.run_at, timezone.now())
+
+    def test_run_tasks_survives_pending_duplicate(self):
+        self.enqueue(fail=True)
+        running = claim('w', 10)
+        self.enqueue()
+
+        self.assertEqual(run_tasks(running), (0, 1))
+        self.assertEqual(Task.objects.filter(unique_key='k1').count(), 1)
+
+    def test_recover_stale_with_pending_duplicate(self):
+        self.enqueue()
+        enqueue('task_queue.tests.flaky')
+        running = claim('w', 10)
+        Task.objects.update(claimed_at=timezone.now() - timedelta(hours=1))
+        self.enqueue()
+
+        self.assertEqual(recover_stale(60), 1)
+        keyed = next(task for task in running if task.unique_key == 'k1')
+        self.assertFalse(Task.objects.filter(pk=keyed.pk).exists())
+        self.assertEqual(Task.objects.filter(status=Task.STATUS_PENDING).count(), 2)
@@ -0,0 +1,160 @@
+"""
+Task worker for tieba project.
+
+worker 按优先级、执行时间领取一批到期任务（条件更新，多个 worker 并行时
+同一任务只会被一个领取）；批量任务同名的合并执行，其余任务各自在一个事务中执行。
+成功的任务删除，失败的按指数退避重新排队，超过最多执行次数后标记为失败。
+领取后超时未完成的任务（worker 异常退出）由其他 worker 收回重新执行。
+执行期间同一去重键又投递了新任务时，失败、超时的任务不再放回等待队列，由新任务执行。
+"""
+
+import logging
+import traceback
+import uuid
+from datetime import timedelta
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import Task
+from .registry import get_task
+
+logger = logging.getLogger(__name__)
+
+RETRY_BASE_DELAY = 10
+RETRY_MAX_DELAY = 3600
+
+
+def retry_delay(attempts):
+    """第 attempts 次失败后的重试间隔（秒）"""
+    return min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY)
+
+
+def _requeue(queryset, unique_key, **fields):
+    """
+    把任务放回等待执行，返回是否放回
+
+    同一去重键已有等待执行的任务时（执行期间又投递了一次），删除本任务，由等待中的任务执行；
+    检查之后才入队的同键任务由唯一约束发现，同样处理
+    """
+    if unique_key is not None and Task.objects.filter(
+        unique_key=unique_key, status=Task.STATUS_PENDING
+    ).exists():
+        queryset.delete()
+        return False
+    try:
+        with transaction.atomic():
+            return queryset.update(
+                status=Task.STATUS_PENDING, claimed_by='', claimed_at=None, **fields
+            ) > 0
+    except IntegrityError:
+        queryset.delete()
+        return False
+
+
+def recover_stale(lock_timeout):
+    """收回领取超时的任务，返回收回的数量"""
+    stale = Task.objects.filter(
+        status=Task.STATUS_RUNNING,
+        claimed_at__lt=timezone.now() - timedelta(seconds=lock_timeout)
+    )
+    stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Task.STATUS_FAILED, last_error='执行超时'
+    )
+    recovered = stale.filter(unique_key__isnull=True).update(
+        status=Task.STATUS_PENDING, claimed_by='', claimed_at=None
+    )
+    # 有去重键的任务逐个放回，避免与等待中的同键任务冲突
+    for pk, unique_key in stale.filter(unique_key__isnull=False).values_list('pk', 'unique_key'):
+        recovered += _requeue(stale.filter(pk=pk), unique_key)
+    return recovered
+
+
+def claim(worker_id, limit):
+    """领取最多 limit 个到期任务"""
+    now = timezone.now()
+    pks = list(
+        Task.objects.filter(status=Task.STATUS_PENDING, run_at__lte=now)
+        .order_by('priority', 'run_at')
+        .values_list('pk', flat=True)[:limit]
+    )
+    if not pks:
+        return []
+
+    # 条件更新：其他 worker 已领取的任务状态不再是等待执行，不会被重复领取
+    token = f'{worker_id}:{uuid.uuid4().hex[:8]}'
+    Task.objects.filter(pk__in=pks, status=Task.STATUS_PENDING).update(
+        status=Task.STATUS_RUNNING, claimed_by=token, claimed_at=now,
+        attempts=F('attempts') + 1
+    )
+    return list(Task.objects.filter(claimed_by=token, status=Task.STATUS_RUNNING).order_by('priority', 'pk'))
+
+
+def _fail(tasks, error):
+    now = timezone.now()
+    for task in tasks:
+        if task.attempts >= task.max_attempts:
+            logger.error('任务 %s(%s) 执行 %d 次均失败', task.name, task.pk, task.attempts)
+            Task.objects.filter(pk=task.pk).update(
+                status=Task.STATUS_FAILED, last_error=error, claimed_by=''
+            )
+        else:
+            _requeue(
+                Task.objects.filter(pk=task.pk), task.unique_key, last_error=error,
+                run_at=now + timedelta(seconds=retry_delay(task.attempts))
+            )
+
+
+def _run_group(spec, group):
+    """
+    执行一组同名任务，返回 (成功的任务列表, [(失败的任务, 错误信息), ...])
+
+    批量任务整组在一个事务中执行，失败时整组回滚；普通任务各自在一个事务中执行，
+    一个任务失败只回滚并重试它自己。失败时已做的修改随事务回滚，重试不会重复生效
+    """
+    if spec.batch:
+        try:
+            with transaction.atomic():
+                spec.run([task.args for task in group])
+        except Exception:
+            logger.exception('任务 %s 执行失败（%d 个）', spec.name, len(group))
+            error = traceback.format_exc()
+            return [], [(task, error) for task in group]
+        return group, []
+
+    done, errors = [], []
+    for task in group:
+        try:
+            with transaction.atomic():
+                spec.run([task.args])
+        except Exception:
+            logger.exception('任务 %s(%s) 执行失败', spec.name, task.pk)
+            errors.append((task, traceback.format_exc()))
+        else:
+            done.append(task)
+    return done, errors
+
+
+def run_tasks(tasks):
+    """执行领取到的任务（按任务名分组），返回 (成功数, 失败数)"""
+    groups = {}
+    for task in tasks:
+        groups.setdefault(task.name, []).append(task)
+
+    succeeded, failed = 0, 0
+    for name, group in groups.items():
+        spec = get_task(name)
+        if spec is None:
+            for task in group:
+                task.attempts = task.max_attempts
+            _fail(group, f'未注册的任务 {name}')
+            failed += len(group)
+            continue
+
+        done, errors = _run_group(spec, group)
+        if done:
+            Task.objects.filter(pk__in=[task.pk for task in done]).delete()
+        for task, error in errors:
+            _fail([task], error)
+        succeeded += len(done)
+        failed += len(errors)
+    return succeeded, failed
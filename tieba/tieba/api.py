@@ -0,0 +1,85 @@
+"""
+Aggregated API views for tieba project.
+"""
+
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from posts.models import Post
+from posts.serializers import PostSummarySerializer
+from tiebas.models import Tieba, TiebaCategory, TiebaFollow
+from tiebas.serializers import TiebaSerializer, TiebaCategorySerializer, FollowedTiebaSerializer
+from users.serializers import author_card_prefetch
+from .caching import get_or_compute
+
+HOME_CACHE_KEY = 'home:shared'
+HOME_HOT_TIEBAS = 10
+HOME_HOT_POSTS = 10
+HOME_HOT_POSTS_DAYS = 7
+
+
+def compute_home_data():
+    """首页与用户无关的部分：热门贴吧、热门帖子、分类"""
+    hot_tiebas = Tieba.objects.filter(is_public=True).select_related(
+        'category'
+    ).order_by('-members_count', '-posts_count')[:HOME_HOT_TIEBAS]
+
+    # 近几天内按点赞、评论数排序
+    since = timezone.now() - timedelta(days=HOME_HOT_POSTS_DAYS)
+    hot_posts = Post.objects.filter(
+        is_published=True, is_deleted=False, created_at__gte=since, tieba__is_public=True
+    ).alias(
+        hot_score=F('likes_count') + F('comments_count') * 2
+    ).select_related('tieba').prefetch_related(
+        'images', author_card_prefetch('author')
+    ).order_by('-hot_score', '-created_at')[:HOME_HOT_POSTS]
+
+    categories = TiebaCategory.objects.filter(is_active=True)
+
+    return {
+        'hot_tiebas': TiebaSerializer(hot_tiebas, many=True).data,
+        'hot_posts': PostSummarySerializer(hot_posts, many=True).data,
+        'categories': TiebaCategorySerializer(categories, many=True).data,
+        'generated_at': timezone.now(),
+    }
+
+
+def get_home_data():
+    """读取缓存的首页数据，过期时只由一个请求重新计算"""
+    return get_or_compute(HOME_CACHE_KEY, compute_home_data, settings.HOME_CACHE_TIMEOUT)
+
+
+def followed_tiebas_with_unread(user):
+    """用户关注的贴吧，附带上次访问后的新帖子数"""
+    new_posts = Post.objects.filter(
+        tieba=OuterRef('tieba'),
+        is_published=True,
+        is_deleted=False,
+        created_at__gt=Coalesce(OuterRef('last_visited_at'), OuterRef('created_at')),
+    ).order_by().values('tieba').annotate(n=Count('pk')).values('n')
+
+    return TiebaFollow.objects.filter(user=user).select_related('tieba').annotate(
+        unread_count=Coalesce(Subquery(new_posts), 0)
+    ).order_by('-unread_count', '-created_at')
+
+
+class HomeDataView(APIView):
+    """首页聚合数据视图"""
+
+    permission_classes = [permissions.AllowAny]
+    read_from_replica = True
+    query_budget = 8
+
+    def get(self, request):
+        data = dict(get_home_data())
+        if request.user.is_authenticated:
+            follows = followed_tiebas_with_unread(request.user)
+            data['followed_tiebas'] = FollowedTiebaSerializer(follows, many=True).data
+        else:
+            data['followed_tiebas'] = []
+        return Response(data)
@@ -0,0 +1,43 @@
+"""
+Cold data archive support for tieba project.
+
+长期无人访问的帖子、评论、私信由 archive_cold_data 命令分批搬到归档表：
+归档表只保留定位和计数需要的列，其余字段序列化为 JSON 后 zlib 压缩存放，
+热表随之变小。详情视图在热表查不到时回退读取归档表（read-through）。
+"""
+
+import json
+import zlib
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+COMPRESSION_LEVEL = 6
+
+
+def pack(payload):
+    return zlib.compress(
+        json.dumps(payload, cls=DjangoJSONEncoder, ensure_ascii=False).encode(),
+        COMPRESSION_LEVEL
+    )
+
+
+def unpack(data):
+    return json.loads(zlib.decompress(bytes(data)))
+
+
+class ArchivedModel(models.Model):
+    """归档抽象模型，original_id 为原热表主键"""
+
+    original_id = models.PositiveIntegerField(unique=True, verbose_name='原主键')
+    data = models.BinaryField(verbose_name='压缩数据')
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name='归档时间')
+
+    class Meta:
+        abstract = True
+
+    @property
+    def payload(self):
+        """解压后的字段数据（同一实例只解压一次）"""
+        if '_payload' not in self.__dict__:
+            self._payload = unpack(self.data)
+        return self._payload
@@ -0,0 +1,73 @@
+"""
+Async API view base for tieba project.
+
+热点只读接口的异步版本：在 ASGI 下用 Django 异步 ORM 查询，
+等待数据库时不占用线程，一个 worker 可同时处理大量慢客户端和长轮询。
+查询集需一次取完（async for 会在同一次调用中完成 prefetch），
+序列化器只处理已加载的数据，不能在事件循环中触发惰性查询。
+"""
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.views import View
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from .renderers import dumps
+
+
+async def get_request_user(request):
+    """取当前用户（Django 4.2 的 request.user 惰性加载时会同步查询会话和用户表）"""
+    def load():
+        request.user.is_authenticated
+        return request.user
+    return await sync_to_async(load)()
+
+
+async def fetch(queryset):
+    """异步取出查询集的全部结果（含 select_related / prefetch_related）"""
+    return [obj async for obj in queryset]
+
+
+class AsyncAPIView(View):
+    """异步只读接口基类，只支持会话认证，响应格式与 DRF 接口一致"""
+
+    login_required = False
+    page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+
+    async def dispatch(self, request, *args, **kwargs):
+        request.user = await get_request_user(request)
+        if self.login_required and not request.user.is_authenticated:
+            return self.json({'detail': '身份认证信息未提供。'}, status=403)
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        except Http404:
+            return self.json({'detail': '未找到。'}, status=404)
+
+    def json(self, data, status=200):
+        return HttpResponse(dumps(data), status=status, content_type='application/json')
+
+    async def paginate(self, request, queryset):
+        """
+        按页码分页（?page=），返回 (本页对象列表, 分页信息)
+
+        分页信息与 DRF PageNumberPagination 的 count/next/previous 一致
+        """
+        try:
+            page = max(int(request.GET.get('page', 1)), 1)
+        except ValueError:
+            raise Http404
+        count = await queryset.acount()
+        start = (page - 1) * self.page_size
+        if start and start >= count:
+            raise Http404
+        objects = await fetch(queryset[start:start + self.page_size])
+
+        url = request.build_absolute_uri()
+        next_url = replace_query_param(url, 'page', page + 1) if start + self.page_size < count else None
+        if page == 1:
+            previous_url = None
+        elif page == 2:
+            previous_url = remove_query_param(url, 'page')
+        else:
+            previous_url = replace_query_param(url, 'page', page - 1)
+        return objects, {'count': count, 'next': next_url, 'previous': previous_url}
@@ -0,0 +1,25 @@
+"""
+SQLite database backend with connection pragmas for tieba project.
+
+在 Django 自带 sqlite3 后端的基础上，每次建立连接时执行
+OPTIONS['pragmas'] 中配置的 PRAGMA（WAL、synchronous、cache_size 等）。
+"""
+
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """带 PRAGMA 设置的 SQLite 连接"""
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        # pragmas 不是 sqlite3.connect 的参数
+        params.pop('pragmas', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        pragmas = self.settings_dict['OPTIONS'].get('pragmas', {})
+        for name, value in pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
@@ -0,0 +1,141 @@
+"""
+Single-flight caching helpers for tieba project.
+
+缓存失效时同一个键只重新计算一次：同进程内的并发请求等待第一个请求的结果，
+跨进程通过缓存锁（cache.add）协调，未拿到锁的进程轮询等待结果写入缓存，
+持锁进程超时未完成时再自行计算，避免缓存击穿时大量请求同时查库。
+
+get_or_refresh 在此基础上区分软、硬过期：超过软过期时间后继续返回旧数据，
+由拿到锁的一个请求在后台线程中重新计算；超过硬过期时间才同步计算。
+"""
+
+import logging
+import threading
+import time
+import uuid
+from django.core.cache import cache
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+# 同进程内正在计算的键 {key: _Call}
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+class _Call:
+    """一次进行中的计算，其他线程等待它的结果"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+def _lock_key(key):
+    return f'{key}:lock'
+
+
+def _release_lock(key, token):
+    if cache.get(_lock_key(key)) == token:
+        cache.delete(_lock_key(key))
+
+
+def _compute_with_lock(key, compute, timeout, lock_timeout, wait_timeout, poll_interval):
+    """跨进程只由持锁者计算，其余进程等待缓存写入"""
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + wait_timeout
+    while not cache.add(_lock_key(key), token, lock_timeout):
+        if time.monotonic() >= deadline:
+            # 持锁者迟迟没有写入结果，不再等待
+            return compute()
+        time.sleep(poll_interval)
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+    try:
+        # 拿到锁时其他进程可能刚写入结果
+        value = cache.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            cache.set(key, value, timeout)
+        return value
+    finally:
+        _release_lock(key, token)
+
+
+def get_or_compute(key, compute, timeout, lock_timeout=10, wait_timeout=5, poll_interval=0.05):
+    """
+    读取缓存，未命中时以 single-flight 方式调用 compute() 重新计算并写入缓存
+
+    compute 抛出的异常会传给同进程内所有等待该键的请求，结果不写入缓存
+    """
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+
+    with _inflight_lock:
+        call = _inflight.get(key)
+        leader = call is None
+        if leader:
+            call = _inflight[key] = _Call()
+
+    if not leader:
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.value
+
+    try:
+        call.value = _compute_with_lock(
+            key, compute, timeout, lock_timeout, wait_timeout, poll_interval
+        )
+        return call.value
+    except Exception as e:
+        call.error = e
+        raise
+    finally:
+        with _inflight_lock:
+            del _inflight[key]
+        call.done.set()
+
+
+def _envelope(compute, soft_timeout):
+    """缓存值连同软过期时间（墙钟时间，跨进程可比较）一起保存"""
+    return {'value': compute(), 'fresh_until': time.time() + soft_timeout}
+
+
+def _refresh_in_background(key, compute, soft_timeout, hard_timeout, lock_timeout):
+    """拿到锁时在后台线程中重新计算，拿不到说明已有请求在刷新"""
+    token = uuid.uuid4().hex
+    if not cache.add(_lock_key(key), token, lock_timeout):
+        return
+
+    def refresh():
+        try:
+            cache.set(key, _envelope(compute, soft_timeout), hard_timeout)
+        except Exception:
+            logger.exception('后台刷新缓存 %s 失败，继续使用旧数据', key)
+        finally:
+            _release_lock(key, token)
+            connections.close_all()
+
+    threading.Thread(target=refresh, name=f'cache-refresh:{key}', daemon=True).start()
+
+
+def get_or_refresh(key, compute, soft_timeout, hard_timeout, lock_timeout=30):
+    """
+    读取缓存（stale-while-revalidate）
+
+    软过期前直接返回；软过期后返回旧数据并在后台刷新；
+    硬过期（缓存中已没有数据）时以 single-flight 方式同步计算
+    """
+    envelope = get_or_compute(
+        key, lambda: _envelope(compute, soft_timeout), hard_timeout, lock_timeout
+    )
+    if envelope['fresh_until'] <= time.time():
+        _refresh_in_background(key, compute, soft_timeout, hard_timeout, lock_timeout)
+    return envelope['value']
@@ -0,0 +1,203 @@
+"""
+Compiled read-only serializers for tieba project.
+
+大列表接口的快速序列化路径：按 DRF 序列化器（经 ?fields= / ?expand= 裁剪后）的字段
+预先生成“输出键 - .values() 列 - 转换函数”的计划，直接由 .values() 行构造输出字典，
+不实例化模型，也不逐字段调用序列化器，输出与原序列化器一致。
+
+支持的字段：模型字段（日期时间等由对应的 DRF 字段转换，图片、文件输出相对 URL，
+与各序列化器 to_representation 中的处理一致）、外键主键、点号 source（如 category.name）、
+经外键关联的嵌套序列化器（join 取列）、反向外键的 many=True 嵌套序列化器
+（按父对象主键一次查询后分组）。SerializerMethodField 需在序列化器 Meta.annotation_fields
+中声明读取的注解列，查询集未注解时仅在未登录时输出 False（与序列化器一致）。
+"""
+
+from django.db import models
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+# 值原样输出的字段类型
+PASSTHROUGH_FIELDS = (
+    serializers.CharField, serializers.IntegerField, serializers.BooleanField,
+    serializers.FloatField, serializers.ChoiceField, serializers.ReadOnlyField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+
+def _datetime_converter(field):
+    """ISO 8601 格式的日期时间：转换到当前时区后输出，与 DateTimeField 一致"""
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if output_format is None or output_format.lower() != 'iso-8601' or timezone is None:
+        return field.to_representation
+
+    def convert(value):
+        if not value:
+            return None
+        value = value.astimezone(timezone).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return convert
+
+
+def _file_converter(model, source):
+    storage = model._meta.get_field(source).storage
+
+    def convert(name):
+        return storage.url(name) if name else None
+    return convert
+
+
+def _value_converter(field):
+    def convert(value):
+        return None if value is None else field.to_representation(value)
+    return convert
+
+
+class CompiledPlan:
+    """一个序列化器（某一嵌套层级）的编译结果"""
+
+    def __init__(self, serializer, prefix='', top_level=True):
+        self.model = serializer.Meta.model
+        self.prefix = prefix
+        self.pk_column = f'{prefix}pk'
+        self.columns = [self.pk_column]
+        self.builders = []
+        self.many = []
+        # 顶层的注解字段：(输出键, 注解名)，values() 时确定查询集中实际存在的注解列
+        self.annotated = []
+        self.annotation_columns = {}
+        self.context = serializer.context
+
+        annotation_fields = getattr(serializer.Meta, 'annotation_fields', {})
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.ListSerializer):
+                self.add_many(name, field)
+            elif isinstance(field, serializers.BaseSerializer):
+                self.add_nested(name, field)
+            elif isinstance(field, serializers.SerializerMethodField):
+                if not top_level or name not in annotation_fields:
+                    raise ValueError(f'{type(serializer).__name__}.{name} 无法编译')
+                self.annotated.append((name, annotation_fields[name]))
+                self.builders.append((name, None))
+            else:
+                self.add_value(name, field)
+
+    def column(self, path):
+        column = self.prefix + path
+        if column not in self.columns:
+            self.columns.append(column)
+        return column
+
+    def add_value(self, name, field):
+        column = self.column('__'.join(field.source_attrs))
+        if isinstance(field, serializers.DateTimeField):
+            convert = _datetime_converter(field)
+        elif isinstance(field, serializers.FileField):
+            convert = _file_converter(self.model, field.source)
+        elif isinstance(field, PASSTHROUGH_FIELDS):
+            convert = None
+        else:
+            convert = _value_converter(field)
+        if convert is None:
+            self.builders.append((name, lambda row, column=column: row[column]))
+        else:
+            self.builders.append((name, lambda row, column=column: convert(row[column])))
+
+    def add_nested(self, name, field):
+        plan = CompiledPlan(field, prefix=f"{self.prefix}{'__'.join(field.source_attrs)}__", top_level=False)
+        for column in plan.columns:
+            self.column(column[len(self.prefix):])
+        self.many.extend(plan.many)
+        self.builders.append((name, plan.build_row))
+
+    def add_many(self, name, field):
+        relation = self.model._meta.get_field(field.source)
+        if not isinstance(relation, models.ManyToOneRel):
+            raise ValueError(f'{name} 不是反向外键，无法编译')
+        plan = CompiledPlan(field.child, top_level=False)
+        groups = {}
+        self.many.append((plan, relation.field.name, self.pk_column, groups))
+        self.builders.append((name, lambda row: groups.get(row[self.pk_column], [])))
+
+    def build_row(self, row):
+        if row[self.pk_column] is None:
+            return None
+        return {name: build(row) for name, build in self.builders}
+
+    def values(self, queryset):
+        """取本计划需要的列（含注解标记），返回 values 查询集"""
+        annotations = queryset.query.annotations
+        columns = list(self.columns)
+        self.annotation_columns.clear()
+        for name, annotation in self.annotated:
+            if annotation in annotations:
+                columns.append(annotation)
+                self.annotation_columns[name] = annotation
+            else:
+                request = self.context.get('request')
+                if request is not None and request.user.is_authenticated:
+                    raise ValueError(f'查询集缺少注解 {annotation}')
+        return queryset.prefetch_related(None).values(*columns)
+
+    def build(self, rows):
+        """由 values 行构造输出列表"""
+        rows = list(rows)
+        for plan, fk_name, parent_column, groups in self.many:
+            groups.clear()
+            pks = {row[parent_column] for row in rows if row[parent_column] is not None}
+            if not pks:
+                continue
+            queryset = plan.model._default_manager.filter(**{f'{fk_name}__in': pks})
+            children = list(queryset.values(*plan.columns, fk_name))
+            for child, data in zip(children, plan.build(children)):
+                groups.setdefault(child[fk_name], []).append(data)
+
+        output = []
+        for row in rows:
+            data = {}
+            for name, build in self.builders:
+                if build is None:
+                    column = self.annotation_columns.get(name)
+                    data[name] = row[column] if column else False
+                else:
+                    data[name] = build(row)
+            output.append(data)
+        return output
+
+
+class CompiledSerializer:
+    """
+    编译序列化器：compiled = CompiledSerializer(PostSerializer)
+
+    compiled.serialize(queryset, context) 返回与 PostSerializer(queryset, many=True).data 相同的列表；
+    分页时先对 plan.values(queryset) 分页，再 plan.build(本页行)
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+
+    def plan(self, context=None):
+        return CompiledPlan(self.serializer_class(context=context or {}))
+
+    def serialize(self, queryset, context=None):
+        plan = self.plan(context)
+        return plan.build(plan.values(queryset))
+
+
+class CompiledListMixin:
+    """视图集的 list 改用编译序列化器 compiled_serializer 输出（分页方式不变），其余操作不受影响"""
+
+    compiled_serializer = None
+
+    def list(self, request, *args, **kwargs):
+        plan = self.compiled_serializer.plan(self.get_serializer_context())
+        queryset = plan.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(plan.build(page))
+        return Response(plan.build(queryset))
@@ -0,0 +1,159 @@
+"""
+Response compression for tieba project.
+
+按请求的 Accept-Encoding（含 q 值）协商压缩 API JSON、JSON Lines 导出和页面：
+安装了 brotli 包时优先使用 br，否则使用 gzip。流式响应逐块压缩输出，不缓冲整个响应；
+过短的响应和图片等已压缩的内容不压缩。压缩后强 ETag 改为弱 ETag，条件请求仍可匹配。
+"""
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 压缩的内容类型
+COMPRESSIBLE_TYPES = {
+    'application/json', 'application/x-ndjson', 'application/javascript',
+    'text/html', 'text/plain', 'text/css', 'text/javascript', 'image/svg+xml',
+}
+
+# 动态内容的 brotli 压缩级别（0-11，级别越高越慢）
+BROTLI_QUALITY = 5
+
+# gzip 文件头中随机长度的文件名，缓解 BREACH 攻击（同 Django GZipMiddleware）
+GZIP_MAX_RANDOM_BYTES = 100
+
+
+def supported_encodings():
+    """服务端支持的编码，按优先顺序"""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def parse_accept_encoding(header):
+    """解析 Accept-Encoding，返回 {编码: q 值}"""
+    accepted = {}
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def negotiate_encoding(header):
+    """选出客户端接受（q > 0）且 q 值最高的编码，q 值相同时按服务端优先顺序；都不接受时返回 None"""
+    accepted = parse_accept_encoding(header)
+    best, best_quality = None, 0.0
+    for coding in supported_encodings():
+        quality = accepted.get(coding, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def brotli_sequence(sequence):
+    """逐块 brotli 压缩，每块之后 flush，客户端可以边收边解压"""
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    for item in sequence:
+        data = compressor.process(item) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def abrotli_sequence(sequence):
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    async for item in sequence:
+        data = compressor.process(item) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def agzip_sequence(sequence):
+    # 每块独立成一个 gzip 成员（同 Django GZipMiddleware 对异步流的处理）
+    async for item in sequence:
+        yield compress_string(item, max_random_bytes=GZIP_MAX_RANDOM_BYTES)
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=BROTLI_QUALITY)
+    return compress_string(content, max_random_bytes=GZIP_MAX_RANDOM_BYTES)
+
+
+def compress_stream(response, encoding):
+    if response.is_async:
+        # 先取出原迭代器，之后重新赋值 streaming_content 不影响这里
+        content = response.streaming_content
+        if encoding == 'br':
+            return abrotli_sequence(content)
+        return agzip_sequence(content)
+    if encoding == 'br':
+        return brotli_sequence(response.streaming_content)
+    return compress_sequence(response.streaming_content, max_random_bytes=GZIP_MAX_RANDOM_BYTES)
+
+
+class CompressionMiddleware:
+    """响应压缩中间件（替代 Django GZipMiddleware，增加 brotli 和按 q 值协商，同时支持同步和异步请求）"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type not in COMPRESSIBLE_TYPES or response.has_header('Content-Encoding'):
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_LENGTH:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_stream(response, encoding)
+            # 压缩后的长度要等输出完才知道
+            del response.headers['Content-Length']
+        else:
+            compressed = compress(response.content, encoding)
+            # 压缩后没有变小时原样返回
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
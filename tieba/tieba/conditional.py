@@ -0,0 +1,67 @@
+"""
+Conditional GET for tieba project.
+
+详情接口支持 ETag / Last-Modified：先用一条只取版本列的查询算出 ETag，
+与请求的 If-None-Match 相同时直接返回 304，不执行详情查询和序列化。
+
+版本列需覆盖响应中的全部数据：对象自身的 updated_at、计数字段（计数通过 update 维护，
+不会刷新 updated_at）、嵌套对象的版本以及当前用户相关的标记（是否点赞、是否成员等）。
+Last-Modified 取对象的 updated_at，只用于展示；由于计数变化不体现在其中，
+只带 If-Modified-Since 的请求不返回 304。
+"""
+
+import hashlib
+from django.core.exceptions import ValidationError
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(version):
+    """由版本列计算 ETag"""
+    digest = hashlib.md5(repr(sorted(version.items())).encode(), usedforsecurity=False).hexdigest()
+    return quote_etag(digest)
+
+
+class ConditionalRetrieveMixin:
+    """
+    为视图集的 retrieve 增加条件请求支持
+
+    子类实现 get_version_queryset()，返回 values() 查询集（按 lookup 字段过滤后取一行），
+    其中 last_modified 列作为 Last-Modified，其余列共同决定 ETag
+    """
+
+    def get_version_queryset(self):
+        raise NotImplementedError
+
+    def get_version(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            return self.get_version_queryset().filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            ).first()
+        except (TypeError, ValueError, ValidationError):
+            return None
+
+    def retrieve(self, request, *args, **kwargs):
+        version = self.get_version()
+        if version is None:
+            # 不存在或主键格式错误：按原流程处理（404 或回退读取）
+            return super().retrieve(request, *args, **kwargs)
+
+        last_modified = version.pop('last_modified')
+        etag = make_etag(version)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().retrieve(request, *args, **kwargs)
+        if response.status_code not in (200, 304):
+            return response
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+        # 每次使用前都要重新验证；登录用户的响应含个人标记，只允许浏览器缓存
+        if request.user.is_authenticated:
+            patch_cache_control(response, private=True, no_cache=True)
+        else:
+            patch_cache_control(response, no_cache=True)
+        patch_vary_headers(response, ['Cookie', 'Authorization'])
+        return response
@@ -0,0 +1,113 @@
+"""
+Denormalized counter maintenance for tieba project.
+
+各模型上的统计字段（帖子数、评论数、点赞数、成员数、粉丝数等）
+由信号在创建/删除时以 F() 增量维护，并可通过 reconcile_counters
+管理命令按分组聚合重新核对。
+"""
+
+import threading
+from contextlib import contextmanager
+from django.apps import apps
+from django.db.models import Count, F, Sum
+
+_state = threading.local()
+
+
+# 计数器定义：(目标模型, 计数字段, [(来源模型, 指向目标主键的查找路径[, 求和字段]), ...])
+# 未给出求和字段时按行计数
+COUNTER_SPECS = [
+    ('tiebas.Tieba', 'posts_count', [('posts.Post', 'tieba_id'), ('posts.ArchivedPost', 'tieba_id')]),
+    ('tiebas.Tieba', 'members_count', [('tiebas.TiebaMember', 'tieba_id')]),
+    ('users.User', 'posts_count', [('posts.Post', 'author_id'), ('posts.ArchivedPost', 'author_id')]),
+    ('users.User', 'followers_count', [('users.UserFollow', 'following_id')]),
+    ('users.User', 'following_count', [('users.UserFollow', 'follower_id')]),
+    ('users.User', 'likes_count', [
+        ('posts.PostLike', 'post__author_id'),
+        ('posts.CommentLike', 'comment__author_id'),
+        # 归档帖子、评论的点赞记录已删除，按归档时的点赞数计入
+        ('posts.ArchivedPost', 'author_id', 'likes_count'),
+        ('posts.ArchivedComment', 'author_id', 'likes_count'),
+    ]),
+    ('posts.Post', 'comments_count', [('posts.Comment', 'post_id')]),
+    ('posts.Post', 'likes_count', [('posts.PostLike', 'post_id')]),
+    ('posts.Comment', 'likes_count', [('posts.CommentLike', 'comment_id')]),
+    ('posts.Tag', 'posts_count', [('posts.PostTag', 'tag_id')]),
+]
+
+
+@contextmanager
+def suspended():
+    """
+    块内（当前线程）不维护计数
+
+    用于归档等只搬移数据的操作：被搬走的行级联删除时，计数不应随之减少
+    """
+    previous = getattr(_state, 'suspended', False)
+    _state.suspended = True
+    try:
+        yield
+    finally:
+        _state.suspended = previous
+
+
+def is_suspended():
+    return getattr(_state, 'suspended', False)
+
+
+def adjust_counter(queryset, field, delta, **extra):
+    """
+    以 F() 增量更新计数字段，避免读-改-写竞争
+
+    减少时只更新当前值足够的行，防止违反非负约束
+    """
+    if not delta or is_suspended():
+        return 0
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    return queryset.update(**{field: F(field) + delta}, **extra)
+
+
+def count_for(spec, pks):
+    """按分组聚合计算一批目标主键的实际计数"""
+    _, _, sources = spec
+    counts = dict.fromkeys(pks, 0)
+    for source_label, lookup, *sum_field in sources:
+        source = apps.get_model(source_label)
+        aggregate = Sum(sum_field[0]) if sum_field else Count('pk')
+        rows = source.objects.filter(
+            **{f'{lookup}__in': pks}
+        ).values(lookup).annotate(n=aggregate).order_by()
+        for row in rows:
+            counts[row[lookup]] += row['n'] or 0
+    return counts
+
+
+def reconcile(spec, chunk_size=1000, fix=False):
+    """
+    分批核对一个计数器，逐批产出 (主键, 当前值, 实际值) 的偏差列表
+
+    按主键顺序分段扫描目标表，每段只发出一次聚合查询；
+    fix 为 True 时用 bulk_update 写回实际值
+    """
+    target_label, field, _ = spec
+    model = apps.get_model(target_label)
+    last_pk = 0
+    while True:
+        rows = list(
+            model.objects.filter(pk__gt=last_pk)
+            .order_by('pk')
+            .values_list('pk', field)[:chunk_size]
+        )
+        if not rows:
+            break
+        last_pk = rows[-1][0]
+
+        counts = count_for(spec, [pk for pk, _ in rows])
+        drift = [(pk, value, counts[pk]) for pk, value in rows if counts[pk] != value]
+
+        if drift and fix:
+            objs = [model(pk=pk, **{field: actual}) for pk, _, actual in drift]
+            model.objects.bulk_update(objs, [field])
+
+        yield drift
@@ -0,0 +1,141 @@
+"""
+Read replica routing for tieba project.
+
+标记了 read_from_replica 的视图在安全方法（GET/HEAD/OPTIONS）请求中
+从只读副本读取；用户写操作后的一小段时间内固定读主库（读己之写），
+副本延迟超过阈值时回退到主库。
+"""
+
+import os
+import random
+import time
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+# 当前请求使用的读库别名，None 表示主库
+_read_db = ContextVar('read_db', default=None)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# 写操作后固定读主库的 cookie
+PIN_COOKIE_NAME = 'db_primary_pin'
+
+# 副本延迟检查结果缓存 {alias: (检查时间, 延迟秒数)}
+_lag_cache = {}
+
+
+def _sqlite_mtime(connection):
+    """SQLite 数据库最后写入时间（WAL 模式下写入先落在 -wal 文件）"""
+    name = str(connection.settings_dict['NAME'])
+    mtimes = [os.path.getmtime(path) for path in (name, f'{name}-wal') if os.path.exists(path)]
+    if not mtimes:
+        raise FileNotFoundError(name)
+    return max(mtimes)
+
+
+def replica_lag(alias):
+    """
+    估算副本相对主库的延迟（秒），无法访问时返回 None
+
+    SQLite 副本按数据库文件修改时间比较；PostgreSQL 副本读取最后回放事务时间
+    """
+    checked_at, lag = _lag_cache.get(alias, (float('-inf'), None))
+    if time.monotonic() - checked_at < settings.REPLICA_LAG_CHECK_INTERVAL:
+        return lag
+
+    try:
+        replica = connections[alias]
+        if replica.vendor == 'sqlite':
+            lag = max(0.0, _sqlite_mtime(connections['default']) - _sqlite_mtime(replica))
+        elif replica.vendor == 'postgresql':
+            with replica.cursor() as cursor:
+                cursor.execute(
+                    'SELECT COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)'
+                )
+                lag = float(cursor.fetchone()[0])
+        else:
+            lag = 0.0
+    except Exception:
+        lag = None
+
+    _lag_cache[alias] = (time.monotonic(), lag)
+    return lag
+
+
+def choose_replica():
+    """随机选择一个延迟在阈值内的副本，没有可用副本时返回 None"""
+    candidates = [
+        alias for alias in settings.DATABASE_REPLICAS
+        if (lag := replica_lag(alias)) is not None and lag <= settings.REPLICA_MAX_LAG
+    ]
+    return random.choice(candidates) if candidates else None
+
+
+class ReplicaRouter:
+    """读写分离数据库路由"""
+
+    def db_for_read(self, model, **hints):
+        return _read_db.get() or 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return True
+
+
+class ReplicaRoutingMiddleware:
+    """根据视图和请求方法决定本次请求的读库（同时支持同步和异步请求）"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = _read_db.set(None)
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_db.reset(token)
+        return self.pin_primary(request, response)
+
+    async def __acall__(self, request):
+        token = _read_db.set(None)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _read_db.reset(token)
+        return self.pin_primary(request, response)
+
+    def pin_primary(self, request, response):
+        # 写操作后一段时间内固定读主库
+        if request.method not in SAFE_METHODS and settings.REPLICA_PIN_SECONDS:
+            response.set_cookie(
+                PIN_COOKIE_NAME, '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax'
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'view_class', None) or getattr(view_func, 'cls', None)
+        if (
+            request.method in SAFE_METHODS
+            and getattr(view_class, 'read_from_replica', False)
+            and PIN_COOKIE_NAME not in request.COOKIES
+        ):
+            _read_db.set(choose_replica())
+        return None
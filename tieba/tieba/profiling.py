@@ -0,0 +1,215 @@
+"""
+Request-level SQL profiling for tieba project.
+
+记录每个请求的查询次数、数据库耗时和重复查询（按 SQL 指纹归并），
+调试模式下通过响应头返回，并按接口保留最近若干次请求的统计。
+视图可声明 query_budget（整数，或按 action 的字典），超出时记录警告；
+SQL_QUERY_BUDGET_STRICT 为 True 时（测试中）直接抛出 QueryBudgetExceeded。
+"""
+
+import logging
+import re
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import Http404, JsonResponse
+
+logger = logging.getLogger('tieba.sql')
+
+# 当前上下文中生效的统计（并发的异步请求可能共用同一个数据库连接，只统计本请求发出的查询）
+_active_profiles = ContextVar('active_sql_profiles', default=())
+
+# 按接口保存最近请求的 (查询次数, 耗时毫秒)
+_endpoint_stats = defaultdict(lambda: deque(maxlen=settings.SQL_PROFILE_WINDOW))
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'IN \((?:\?|%s)(?:, (?:\?|%s))*\)')
+
+
+class QueryBudgetExceeded(AssertionError):
+    """请求的查询次数超出视图声明的预算"""
+
+
+def fingerprint(sql):
+    """去掉字面量后的 SQL，用于识别重复查询"""
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    return _IN_LIST_RE.sub('IN (...)', sql)
+
+
+class QueryProfile:
+    """一次请求（或一段代码）内的查询统计"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        if self not in _active_profiles.get():
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    @property
+    def duration_ms(self):
+        return round(self.duration * 1000, 2)
+
+    @property
+    def duplicates(self):
+        """重复执行的查询 {指纹: 次数}"""
+        return {sql: n for sql, n in self.fingerprints.items() if n > 1}
+
+    @property
+    def duplicate_count(self):
+        return sum(n - 1 for n in self.duplicates.values())
+
+
+@contextmanager
+def profile_queries():
+    """在所有数据库连接上统计代码块内执行的查询"""
+    profile = QueryProfile()
+    previous = _active_profiles.get()
+    _active_profiles.set(previous + (profile,))
+    try:
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(profile))
+            yield profile
+    finally:
+        _active_profiles.set(previous)
+
+
+def resolve_budget(view_class, action):
+    """取视图声明的查询预算"""
+    budget = getattr(view_class, 'query_budget', None)
+    if isinstance(budget, dict):
+        return budget.get(action)
+    return budget
+
+
+def check_budget(profile, budget, endpoint):
+    """检查查询次数是否超出预算"""
+    if budget is None or profile.count <= budget:
+        return
+    message = (
+        f'{endpoint} 执行了 {profile.count} 次查询，超出预算 {budget}'
+        f'（重复查询 {profile.duplicate_count} 次）'
+    )
+    if settings.SQL_QUERY_BUDGET_STRICT:
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+def endpoint_summary():
+    """各接口最近请求的查询统计"""
+    summary = {}
+    for endpoint, samples in list(_endpoint_stats.items()):
+        counts = sorted(count for count, _ in samples)
+        durations = [duration for _, duration in samples]
+        summary[endpoint] = {
+            'requests': len(samples),
+            'avg_queries': round(sum(counts) / len(counts), 2),
+            'max_queries': counts[-1],
+            'p95_queries': counts[min(len(counts) - 1, int(len(counts) * 0.95))],
+            'avg_db_ms': round(sum(durations) / len(durations), 2),
+        }
+    return summary
+
+
+class SQLProfilingMiddleware:
+    """请求级 SQL 统计中间件（同时支持同步和异步请求）"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.SQL_PROFILING:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with profile_queries() as profile:
+            response = self.get_response(request)
+        return self.finish(request, response, profile)
+
+    async def __acall__(self, request):
+        # 异步请求中的 ORM 查询都在本请求专用的同步线程中执行（thread_sensitive），
+        # 统计钩子要装在该线程的数据库连接上
+        stack = ExitStack()
+        profile = await sync_to_async(stack.enter_context)(profile_queries())
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.finish(request, response, profile)
+
+    def finish(self, request, response, profile):
+        endpoint = getattr(request, '_sql_endpoint', None)
+        if endpoint:
+            _endpoint_stats[endpoint].append((profile.count, profile.duration_ms))
+            check_budget(profile, request._sql_budget, endpoint)
+
+        if settings.DEBUG:
+            response['X-DB-Query-Count'] = str(profile.count)
+            response['X-DB-Time-Ms'] = str(profile.duration_ms)
+            response['X-DB-Duplicate-Queries'] = str(profile.duplicate_count)
+        response.sql_profile = profile
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'view_class', None) or getattr(view_func, 'cls', None)
+        actions = getattr(view_func, 'actions', None) or {}
+        action = actions.get(request.method.lower())
+
+        name = view_class.__name__ if view_class else view_func.__name__
+        request._sql_endpoint = f'{request.method} {name}.{action}' if action else f'{request.method} {name}'
+        request._sql_budget = resolve_budget(view_class, action)
+        return None
+
+
+def sql_profile_summary(request):
+    """各接口 SQL 统计（仅调试模式下的管理员可见）"""
+    if not settings.DEBUG or not request.user.is_staff:
+        raise Http404
+    return JsonResponse(endpoint_summary(), json_dumps_params={'ensure_ascii': False})
+
+
+class QueryBudgetTestMixin:
+    """
+    测试用混入类
+
+    配合 SQL_QUERY_BUDGET_STRICT=True 使用时，超预算的请求会直接失败；
+    也可以对任意代码块断言查询次数
+    """
+
+    @contextmanager
+    def assertMaxQueries(self, budget):
+        with profile_queries() as profile:
+            yield profile
+        if profile.count > budget:
+            self.fail(
+                f'执行了 {profile.count} 次查询，超出预算 {budget}：\n'
+                + '\n'.join(f'{n} x {sql}' for sql, n in profile.fingerprints.most_common(10))
+            )
+
+    def assertNoDuplicateQueries(self, response):
+        duplicates = response.sql_profile.duplicates
+        if duplicates:
+            self.fail('存在重复查询：\n' + '\n'.join(f'{n} x {sql}' for sql, n in duplicates.items()))
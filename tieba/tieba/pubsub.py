@@ -0,0 +1,73 @@
+"""
+In-process pub/sub for tieba project.
+
+进程内按键（如用户 id）的变更通知：长轮询请求订阅后挂起等待，不查询数据库；
+数据变更的事务提交后 publish 唤醒同一进程中该键的所有订阅者。
+发布可以在任意线程（同步视图、sync_to_async 线程）中进行，订阅者在各自的事件循环中被唤醒。
+其他进程（其他 ASGI worker、run_task_worker）中的变更不会送达，订阅者等到超时后重新查询。
+"""
+
+import asyncio
+import threading
+from collections import defaultdict
+from django.db import transaction
+
+_subscribers = defaultdict(set)
+_lock = threading.Lock()
+
+
+def _notify(key):
+    with _lock:
+        subscribers = list(_subscribers.get(key, ()))
+    for subscription in subscribers:
+        subscription.notify()
+
+
+def publish(key):
+    """键对应的数据已变更（在事务中调用时，提交后才通知）"""
+    transaction.on_commit(lambda: _notify(key))
+
+
+class Subscription:
+    """
+    一个订阅，需在事件循环中创建
+
+    先订阅再读取当前数据，读取和开始等待之间发生的变更也不会错过
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.loop = asyncio.get_running_loop()
+        self.event = asyncio.Event()
+
+    def __enter__(self):
+        with _lock:
+            _subscribers[self.key].add(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        with _lock:
+            subscribers = _subscribers[self.key]
+            subscribers.discard(self)
+            if not subscribers:
+                del _subscribers[self.key]
+
+    def notify(self):
+        try:
+            self.loop.call_soon_threadsafe(self.event.set)
+        except RuntimeError:
+            # 事件循环已关闭
+            pass
+
+    async def wait(self, timeout):
+        """等待变更通知，收到返回 True，超时返回 False"""
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self.event.clear()
+        return True
+
+
+def subscribe(key):
+    return Subscription(key)
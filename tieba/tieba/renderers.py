@@ -0,0 +1,36 @@
+"""
+JSON renderers for tieba project.
+
+用 orjson 渲染 API 响应，输出与 DRF JSONRenderer 的紧凑格式一致
+（UTF-8 不转义、无空格分隔、转义 U+2028/U+2029）。
+orjson 不能直接处理的类型（惰性翻译字符串、Decimal、QuerySet 等）以及日期时间
+交给 DRF 的 JSONEncoder，保证格式相同；请求缩进输出（如可浏览 API）时仍由 JSONRenderer 渲染。
+"""
+
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+_encoder = JSONEncoder()
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+def dumps(data):
+    """序列化为 JSON 字节串"""
+    content = orjson.dumps(data, default=_encoder.default, option=ORJSON_OPTIONS)
+    if b'\xe2\x80\xa8' in content or b'\xe2\x80\xa9' in content:
+        content = content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return content
+
+
+class ORJSONRenderer(JSONRenderer):
+    """orjson 渲染器"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
@@ -4,7 +4,7 @@ Django settings for tieba project.
 
 import os
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -39,15 +39,21 @@ INSTALLED_APPS = [
     'tiebas',
     'posts',
     'user_messages',
+    'media_store',
+    'task_queue',
 ]
 
 MIDDLEWARE = [
+    'tieba.profiling.SQLProfilingMiddleware',
+    'tieba.compression.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'tieba.uploads.UploadSizeLimitMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'tieba.db_router.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -79,10 +85,90 @@ ASGI_APPLICATION = 'tieba.asgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': BASE_DIR / config('DB_NAME', default='db.sqlite3'),
     }
 }
 
+# 生产环境配置：WAL 模式（读写不互相阻塞）、连接复用与健康检查
+DB_PROFILE = config('DB_PROFILE', default='development')
+
+if DB_PROFILE == 'production':
+    DATABASES['default'].update({
+        'ENGINE': 'tieba.backends.sqlite3',
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=600, cast=int),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'pragmas': {
+                'journal_mode': 'WAL',
+                'synchronous': config('SQLITE_SYNCHRONOUS', default='NORMAL'),
+                'cache_size': config('SQLITE_CACHE_SIZE', default=-65536, cast=int),  # 负数单位为KB，即64MB
+                'mmap_size': config('SQLITE_MMAP_SIZE', default=268435456, cast=int),  # 256MB
+                'busy_timeout': config('SQLITE_BUSY_TIMEOUT', default=5000, cast=int),  # 毫秒
+                'temp_store': 'MEMORY',
+            },
+        },
+    })
+
+# 只读副本，例如 DB_REPLICAS=replica1.sqlite3,replica2.sqlite3
+DATABASE_REPLICAS = []
+for i, replica_name in enumerate(config('DB_REPLICAS', default='', cast=Csv()), 1):
+    alias = f'replica{i}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': BASE_DIR / replica_name,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['tieba.db_router.ReplicaRouter']
+
+# 写操作后固定读主库的秒数，副本最大允许延迟及延迟检查间隔
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=5, cast=int)
+REPLICA_MAX_LAG = config('REPLICA_MAX_LAG', default=10, cast=float)
+REPLICA_LAG_CHECK_INTERVAL = config('REPLICA_LAG_CHECK_INTERVAL', default=5, cast=float)
+
+# Cache
+# 默认使用进程内缓存；多进程部署时可改用 Redis 等共享缓存，
+# 例如 CACHE_BACKEND=django.core.cache.backends.redis.RedisCache CACHE_LOCATION=redis://127.0.0.1:6379/1
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='tieba'),
+    }
+}
+
+# 首页聚合数据缓存秒数
+HOME_CACHE_TIMEOUT = config('HOME_CACHE_TIMEOUT', default=60, cast=int)
+
+# 热门/推荐贴吧列表：软过期后返回旧数据并后台刷新，硬过期后同步重新计算
+TIEBA_LIST_CACHE_SOFT_TIMEOUT = config('TIEBA_LIST_CACHE_SOFT_TIMEOUT', default=60, cast=int)
+TIEBA_LIST_CACHE_HARD_TIMEOUT = config('TIEBA_LIST_CACHE_HARD_TIMEOUT', default=600, cast=int)
+
+# 软删除的帖子、评论、通知保留天数，之后由 purge_soft_deleted 物理删除
+SOFT_DELETE_RETENTION_DAYS = config('SOFT_DELETE_RETENTION_DAYS', default=30, cast=int)
+
+# 最后回复超过该天数的帖子（连同评论）、发送超过该天数的已读私信由 archive_cold_data 归档
+ARCHIVE_POSTS_AFTER_DAYS = config('ARCHIVE_POSTS_AFTER_DAYS', default=365, cast=int)
+ARCHIVE_MESSAGES_AFTER_DAYS = config('ARCHIVE_MESSAGES_AFTER_DAYS', default=180, cast=int)
+
+# 后台任务由 run_task_worker 执行；为 True 时事务提交后在当前进程直接执行（无需启动 worker）
+TASK_QUEUE_EAGER = config('TASK_QUEUE_EAGER', default=False, cast=bool)
+
+# 未读数长轮询最长挂起秒数（客户端可通过 ?timeout= 缩短），应小于反向代理的读超时
+UNREAD_POLL_TIMEOUT = config('UNREAD_POLL_TIMEOUT', default=25, cast=int)
+
+# 小于该字节数的响应不压缩（压缩收益抵不过开销）
+COMPRESSION_MIN_LENGTH = config('COMPRESSION_MIN_LENGTH', default=512, cast=int)
+
+# 数据导出每批从数据库读取的行数（流式导出与后台导出作业共用）
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=500, cast=int)
+
+# 后台导出作业生成的文件目录（不在 MEDIA_ROOT 下，只能经下载接口获取；多台 worker 时需为共享目录）
+EXPORT_ROOT = config('EXPORT_ROOT', default=str(BASE_DIR / 'exports'))
+
+# 账号删除作业每批删除的行数（连同级联数据在一个事务中删除）
+ACCOUNT_DELETE_CHUNK_SIZE = config('ACCOUNT_DELETE_CHUNK_SIZE', default=200, cast=int)
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -121,6 +207,18 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# 生产环境由前端服务器发送媒体文件（Apache mod_xsendfile 等支持 X-Sendfile 的服务器）
+MEDIA_X_SENDFILE = config('MEDIA_X_SENDFILE', default=False, cast=bool)
+
+# 上传文件按内容摘要存储，相同内容只保存一份
+STORAGES = {
+    'default': {
+        'BACKEND': 'media_store.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
@@ -136,6 +234,10 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'tieba.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20
 }
@@ -172,5 +274,16 @@ LOGOUT_REDIRECT_URL = '/'
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
 # File upload settings
-FILE_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB
-DATA_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB
\ No newline at end of file
+# 上传文件分块写入临时文件，校验图片文件头并在超限时立即拒绝
+FILE_UPLOAD_HANDLERS = ['tieba.uploads.ImageUploadHandler']
+FILE_UPLOAD_MAX_MEMORY_SIZE = config('FILE_UPLOAD_MAX_MEMORY_SIZE', default=262144, cast=int)  # 256KB
+DATA_UPLOAD_MAX_MEMORY_SIZE = config('DATA_UPLOAD_MAX_MEMORY_SIZE', default=2621440, cast=int)  # 2.5MB，不含文件
+IMAGE_UPLOAD_MAX_SIZE = config('IMAGE_UPLOAD_MAX_SIZE', default=5242880, cast=int)  # 单张图片 5MB
+UPLOAD_MAX_REQUEST_SIZE = config('UPLOAD_MAX_REQUEST_SIZE', default=52428800, cast=int)  # 单次请求 50MB
+
+# SQL profiling settings
+# 请求级查询统计（调试模式下通过 X-DB-* 响应头返回），超出视图 query_budget 时告警；
+# 测试中开启 SQL_QUERY_BUDGET_STRICT 使超预算的请求直接失败
+SQL_PROFILING = config('SQL_PROFILING', default=DEBUG, cast=bool)
+SQL_QUERY_BUDGET_STRICT = config('SQL_QUERY_BUDGET_STRICT', default=False, cast=bool)
+SQL_PROFILE_WINDOW = config('SQL_PROFILE_WINDOW', default=200, cast=int)
@@ -0,0 +1,63 @@
+"""
+Soft delete support for tieba project.
+
+帖子、评论、通知删除时只标记 is_deleted 并记录 deleted_at，
+默认管理器（objects）排除已删除的行，all_objects 可访问全部数据。
+软删除时发出 soft_deleted 信号，由各应用维护计数等冗余数据；
+超过保留期的已删除数据由 purge_soft_deleted 命令分批物理删除。
+"""
+
+from django.db import models
+from django.dispatch import Signal
+from django.utils import timezone
+
+# 对象被软删除后发出，参数: instance
+soft_deleted = Signal()
+
+
+class SoftDeleteQuerySet(models.QuerySet):
+    """支持软删除的查询集"""
+
+    def alive(self):
+        return self.filter(is_deleted=False)
+
+    def dead(self):
+        return self.filter(is_deleted=True)
+
+    def purgeable(self, before):
+        """删除时间早于 before 的已删除行（早于 deleted_at 字段加入时删除的行没有删除时间）"""
+        return self.dead().filter(
+            models.Q(deleted_at__lt=before) | models.Q(deleted_at__isnull=True)
+        )
+
+
+class SoftDeleteManager(models.Manager):
+    """默认管理器：排除已软删除的行"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
+
+
+class SoftDeleteModel(models.Model):
+    """软删除抽象模型，子类需定义 is_deleted 字段"""
+
+    deleted_at = models.DateTimeField(null=True, blank=True, verbose_name='删除时间')
+
+    objects = SoftDeleteManager.from_queryset(SoftDeleteQuerySet)()
+    all_objects = SoftDeleteQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    def soft_delete(self):
+        """标记为已删除，重复调用无效"""
+        if self.is_deleted:
+            return
+        deleted_at = timezone.now()
+        # 条件更新，并发删除同一行时只有一方发出信号
+        updated = type(self).all_objects.filter(pk=self.pk, is_deleted=False).update(
+            is_deleted=True, deleted_at=deleted_at
+        )
+        self.is_deleted, self.deleted_at = True, deleted_at
+        if updated:
+            soft_deleted.send(sender=type(self), instance=self)
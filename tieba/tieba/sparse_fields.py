@@ -0,0 +1,134 @@
+"""
+Sparse fieldsets for tieba project.
+
+接口按查询参数裁剪输出，移动端只取需要展示的数据：
+?fields=id,title,author_info.nickname 只输出列出的字段（点号指定嵌套对象内的字段）；
+?expand=author_info,post_info.images 只展开列出的嵌套对象，其余嵌套对象不输出（外键 id 仍保留），
+?expand= 为空时不展开任何嵌套对象。两个参数都不带时输出全部字段，与原来一致。
+视图按同样的选择只做需要的 select_related / prefetch_related 和注解。
+"""
+
+from rest_framework.serializers import BaseSerializer
+
+
+def _names(value, path):
+    """取参数中位于 path 层级的字段名"""
+    names = set()
+    for item in value.split(','):
+        parts = item.strip().split('.')
+        if len(parts) > len(path) and parts[:len(path)] == path and parts[len(path)]:
+            names.add(parts[len(path)])
+    return names
+
+
+class FieldSelection:
+    """某一层级（顶层或某个嵌套对象内）的字段选择"""
+
+    def __init__(self, fields=None, expand=None, path=()):
+        self.raw_fields = fields
+        self.raw_expand = expand
+        self.path = list(path)
+        # 本层级没有列出字段时输出全部字段；带了 expand 参数时只展开列出的嵌套对象
+        self.fields = (_names(fields, self.path) or None) if fields is not None else None
+        self.expand = _names(expand, self.path) if expand is not None else None
+
+    @classmethod
+    def from_params(cls, params, path=()):
+        return cls(params.get('fields'), params.get('expand'), path)
+
+    @classmethod
+    def from_request(cls, request, path=()):
+        """只裁剪 GET 请求的输出，写操作的序列化器字段保持完整"""
+        if request is None or request.method != 'GET':
+            return cls(path=path)
+        return cls.from_params(getattr(request, 'query_params', request.GET), path)
+
+    def includes(self, name):
+        """普通字段是否输出"""
+        return self.fields is None or name in self.fields
+
+    def expands(self, name):
+        """嵌套对象是否输出（在 fields 中明确列出的视为展开）"""
+        if self.fields is not None:
+            return name in self.fields
+        return self.expand is None or name in self.expand
+
+    def nested(self, name):
+        """嵌套对象 name 内的字段选择"""
+        return FieldSelection(self.raw_fields, self.raw_expand, self.path + [name])
+
+
+def load_related(queryset, selection, select=None, prefetch=None):
+    """
+    只加载需要输出的嵌套对象
+
+    select / prefetch 为 {嵌套字段名: select_related 路径 / prefetch_related 路径或 Prefetch}
+    """
+    for name, lookup in (select or {}).items():
+        if selection.expands(name):
+            queryset = queryset.select_related(lookup)
+    for name, lookup in (prefetch or {}).items():
+        if selection.expands(name):
+            queryset = queryset.prefetch_related(lookup)
+    return queryset
+
+
+def select_fields(data, selection):
+    """
+    按字段选择裁剪已序列化的数据（缓存的完整输出按各请求的选择裁剪）
+
+    值为对象或对象列表的字段按展开规则处理，其余字段按 fields 规则处理
+    """
+    if isinstance(data, list):
+        return [select_fields(item, selection) for item in data]
+    if selection.fields is None and selection.expand is None:
+        return data
+
+    selected = {}
+    for name, value in data.items():
+        if isinstance(value, dict) or (isinstance(value, list) and value and isinstance(value[0], dict)):
+            if selection.expands(name):
+                selected[name] = select_fields(value, selection.nested(name))
+        elif selection.includes(name):
+            selected[name] = value
+    return selected
+
+
+def nested_context(context, name):
+    """
+    在 SerializerMethodField 中另建嵌套序列化器时使用的 context，
+    使其按 name 层级（而不是顶层）裁剪字段
+    """
+    return {**context, 'field_path': [*context.get('field_path', ()), name]}
+
+
+class SparseFieldsMixin:
+    """
+    序列化器按请求的 ?fields= / ?expand= 裁剪字段（请求由 context 传入）
+
+    嵌套序列化器字段及 Meta.expandable_fields 中列出的字段（返回嵌套数据的 SerializerMethodField）
+    按展开规则处理，其余字段按 fields 规则处理
+    """
+
+    @property
+    def field_selection(self):
+        path, node = [], self
+        while node.parent is not None:
+            if node.field_name:
+                path.insert(0, node.field_name)
+            node = node.parent
+        path = [*self.context.get('field_path', ()), *path]
+        return FieldSelection.from_request(self.context.get('request'), path)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selection = self.field_selection
+        expandable = set(getattr(self.Meta, 'expandable_fields', ()))
+        for name, field in list(fields.items()):
+            if isinstance(field, BaseSerializer) or name in expandable:
+                keep = selection.expands(name)
+            else:
+                keep = selection.includes(name)
+            if not keep:
+                del fields[name]
+        return fields
@@ -0,0 +1,110 @@
+"""
+Tests for tieba project.
+"""
+
+import contextvars
+import os
+import tempfile
+import time
+from unittest import mock
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.views import View
+from . import db_router
+from .db_router import PIN_COOKIE_NAME, ReplicaRoutingMiddleware
+
+
+class ReplicaView(View):
+    read_from_replica = True
+
+
+class PrimaryView(View):
+    pass
+
+
+class FakeConnection:
+    vendor = 'sqlite'
+
+    def __init__(self, name):
+        self.settings_dict = {'NAME': name}
+
+
+@override_settings(
+    DATABASE_REPLICAS=['replica1'], REPLICA_MAX_LAG=10, REPLICA_LAG_CHECK_INTERVAL=0, REPLICA_PIN_SECONDS=5
+)
+class ReplicaRoutingTests(SimpleTestCase):
+    """副本延迟回退与写后固定读主库"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.primary = os.path.join(tmp.name, 'primary.sqlite3')
+        self.replica = os.path.join(tmp.name, 'replica.sqlite3')
+        for path in (self.primary, self.replica):
+            open(path, 'wb').close()
+
+        patcher = mock.patch.object(db_router, 'connections', {
+            'default': FakeConnection(self.primary),
+            'replica1': FakeConnection(self.replica),
+        })
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        db_router._lag_cache.clear()
+        self.addCleanup(db_router._lag_cache.clear)
+        self.factory = RequestFactory()
+
+    def set_lag(self, seconds, wal=False):
+        now = time.time()
+        os.utime(self.replica, (now - seconds, now - seconds))
+        os.utime(self.primary, (now - seconds, now - seconds))
+        # WAL 模式下主库的写入先落在 -wal 文件
+        primary = f'{self.primary}-wal' if wal else self.primary
+        open(primary, 'ab').close()
+        os.utime(primary, (now, now))
+
+    def read_db(self, request, view):
+        """按中间件处理一次请求，返回视图执行时的读库"""
+        middleware = ReplicaRoutingMiddleware(lambda request: HttpResponse())
+
+        def run():
+            middleware.process_view(request, view.as_view(), (), {})
+            return db_router.ReplicaRouter().db_for_read(None)
+        return contextvars.copy_context().run(run)
+
+    def test_replica_lag_from_sqlite_mtimes(self):
+        self.set_lag(30)
+        self.assertAlmostEqual(db_router.replica_lag('replica1'), 30, delta=1)
+        db_router._lag_cache.clear()
+        self.set_lag(30, wal=True)
+        self.assertAlmostEqual(db_router.replica_lag('replica1'), 30, delta=1)
+
+    def test_replica_lag_missing_file(self):
+        os.remove(self.replica)
+        self.assertIsNone(db_router.replica_lag('replica1'))
+        self.assertIsNone(db_router.choose_replica())
+
+    def test_reads_replica_within_lag(self):
+        self.set_lag(2)
+        self.assertEqual(self.read_db(self.factory.get('/'), ReplicaView), 'replica1')
+
+    def test_falls_back_to_primary_when_lagging(self):
+        self.set_lag(60)
+        self.assertEqual(self.read_db(self.factory.get('/'), ReplicaView), 'default')
+
+    def test_unmarked_view_and_writes_use_primary(self):
+        self.set_lag(0)
+        self.assertEqual(self.read_db(self.factory.get('/'), PrimaryView), 'default')
+        self.assertEqual(self.read_db(self.factory.post('/'), ReplicaView), 'default')
+
+    def test_write_pins_primary(self):
+        self.set_lag(0)
+        middleware = ReplicaRoutingMiddleware(lambda request: HttpResponse())
+        response = middleware(self.factory.post('/'))
+        cookie = response.cookies[PIN_COOKIE_NAME]
+        self.assertEqual(cookie['max-age'], 5)
+        self.assertTrue(cookie['httponly'])
+        self.assertNotIn(PIN_COOKIE_NAME, middleware(self.factory.get('/')).cookies)
+
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE_NAME] = '1'
+        self.assertEqual(self.read_db(request, ReplicaView), 'default')
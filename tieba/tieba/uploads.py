@@ -0,0 +1,118 @@
+"""
+File upload handlers for tieba project.
+
+上传的文件按块直接写入临时文件，不在 worker 内存中缓冲；
+第一个数据块到达时校验图片文件头，超出大小限制立即拒绝。
+被拒绝的文件会从 request.FILES 中略去，原因记录在 request.upload_errors，
+API 序列化器用 check_upload_errors 将其转为 400 校验错误。
+请求体整体超限时由 UploadSizeLimitMiddleware 在读取请求体（和 CSRF 校验）之前返回 413。
+"""
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import RequestDataTooBig
+from django.core.files.uploadhandler import SkipFile, TemporaryFileUploadHandler
+from django.http import HttpResponse, JsonResponse
+from rest_framework import serializers
+
+# 常见图片格式的文件头
+IMAGE_SIGNATURES = (
+    b'\x89PNG\r\n\x1a\n',  # PNG
+    b'\xff\xd8\xff',  # JPEG
+    b'GIF87a',  # GIF
+    b'GIF89a',  # GIF
+    b'BM',  # BMP
+)
+
+
+def is_image_header(data):
+    """根据文件头判断是否为支持的图片格式"""
+    if data.startswith(IMAGE_SIGNATURES):
+        return True
+    # WEBP: RIFF....WEBP
+    return data[:4] == b'RIFF' and data[8:12] == b'WEBP'
+
+
+class ImageUploadHandler(TemporaryFileUploadHandler):
+    """流式图片上传处理器"""
+
+    def _reject(self, message):
+        if self.request is not None:
+            if not hasattr(self.request, 'upload_errors'):
+                self.request.upload_errors = []
+            self.request.upload_errors.append(message)
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        # 请求体整体超限时不解析（通常已被 UploadSizeLimitMiddleware 拦截），返回 400
+        if content_length > settings.UPLOAD_MAX_REQUEST_SIZE:
+            raise RequestDataTooBig('上传内容过大')
+        return None
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None,
+                 content_type_extra=None):
+        # 上一个文件已交给 request.FILES，拒绝本文件时不能被连带关闭
+        self.__dict__.pop('file', None)
+        if content_type and not content_type.startswith('image/'):
+            self._reject(f'{file_name} 不是图片文件')
+            raise SkipFile()
+        if content_length and content_length > settings.IMAGE_UPLOAD_MAX_SIZE:
+            self._reject(f'{file_name} 超过大小限制')
+            raise SkipFile()
+        super().new_file(
+            field_name, file_name, content_type, content_length, charset, content_type_extra
+        )
+
+    def receive_data_chunk(self, raw_data, start):
+        # 第一块数据校验文件头
+        if start == 0 and not is_image_header(raw_data):
+            self._reject(f'{self.file_name} 不是有效的图片')
+            raise SkipFile()
+        if start + len(raw_data) > settings.IMAGE_UPLOAD_MAX_SIZE:
+            self._reject(f'{self.file_name} 超过大小限制')
+            raise SkipFile()
+        return super().receive_data_chunk(raw_data, start)
+
+
+def check_upload_errors(request, field):
+    """上传处理器拒绝了文件时抛出校验错误（错误归到 field 字段），不静默丢弃"""
+    upload_errors = getattr(request, 'upload_errors', None) if request is not None else None
+    if upload_errors:
+        raise serializers.ValidationError({field: upload_errors})
+
+
+class UploadSizeLimitMiddleware:
+    """上传请求体超过 UPLOAD_MAX_REQUEST_SIZE 时直接返回 413（同时支持同步和异步请求）"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.reject(request) or self.get_response(request)
+
+    async def __acall__(self, request):
+        return self.reject(request) or await self.get_response(request)
+
+    def reject(self, request):
+        if not request.content_type.startswith('multipart/'):
+            return None
+        try:
+            content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            content_length = 0
+        if content_length <= settings.UPLOAD_MAX_REQUEST_SIZE:
+            return None
+
+        message = '上传内容过大'
+        if request.path.startswith('/api/'):
+            return JsonResponse(
+                {'success': False, 'message': message}, status=413, json_dumps_params={'ensure_ascii': False}
+            )
+        return HttpResponse(message, status=413, content_type='text/plain; charset=utf-8')
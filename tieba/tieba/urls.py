@@ -3,10 +3,14 @@ URL configuration for tieba project.
 """
 
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from media_store.storage import CAS_PREFIX
+from media_store.views import serve_blob
 from . import views
+from .api import HomeDataView
+from .profiling import sql_profile_summary
 
 urlpatterns = [
     # 前端页面路由
@@ -25,10 +29,19 @@ urlpatterns = [
     
     # API路由
     path('admin/', admin.site.urls),
+    path('api/home/', HomeDataView.as_view(), name='home_data'),
     path('api/auth/', include('users.urls')),
     path('api/tiebas/', include('tiebas.urls')),
     path('api/posts/', include('posts.urls')),
     path('api/messages/', include('user_messages.urls')),
+    path('api/debug/sql-profile/', sql_profile_summary, name='sql_profile_summary'),
+    
+    # 内容寻址的媒体文件（长期缓存）
+    re_path(
+        r'^%s(?P<path>%s.*)$' % (settings.MEDIA_URL.lstrip('/'), CAS_PREFIX),
+        serve_blob,
+        name='media_blob'
+    ),
 ]
 
 # 错误处理页面
@@ -7,14 +7,22 @@ from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
 from django.contrib import messages
+from django.core.exceptions import PermissionDenied, ValidationError
 from django.db import models
+from django.db.models import F
+from users.serializers import author_card_prefetch
+
+# 贴吧详情页每页帖子数（不含置顶帖子）
+TIEBA_PAGE_SIZE = 50
 
 class HomeView(TemplateView):
     """首页视图"""
+    read_from_replica = True
     template_name = 'home.html'
 
 class TiebaSquareView(View):
     """贴吧广场视图"""
+    read_from_replica = True
     template_name = 'tieba_square.html'
     
     def get(self, request):
@@ -49,7 +57,9 @@ class TiebaSquareView(View):
             tiebas = tiebas.order_by('-members_count')  # 默认按关注数排序
         
         # 获取最新的帖子（跨贴吧，按创建时间倒序排列），预加载图片数据
-        latest_posts = Post.objects.all().order_by('-created_at').prefetch_related('images')[:10]  # 显示最新的10个帖子
+        latest_posts = Post.objects.all().order_by('-created_at').select_related(
+            'tieba'
+        ).prefetch_related('images', author_card_prefetch('author'))[:10]  # 显示最新的10个帖子
         
         return render(request, self.template_name, {
             'tiebas': tiebas,
@@ -61,30 +71,42 @@ class TiebaSquareView(View):
 
 class TiebaDetailView(View):
     """贴吧详情视图"""
+    read_from_replica = True
     template_name = 'tieba_detail.html'
     
     def get(self, request, pk):
-        from tiebas.models import Tieba
+        from tiebas.models import Tieba, TiebaFollow
         from posts.models import Post
+        from django.utils import timezone
         
         try:
             # 获取贴吧信息
             tieba = Tieba.objects.get(id=pk)
             
-            # 获取该贴吧的帖子列表（按创建时间倒序排列）
-            posts = Post.objects.filter(tieba=tieba).order_by('-created_at')
+            # 记录访问时间，清空首页未读角标
+            if request.user.is_authenticated:
+                TiebaFollow.objects.filter(user=request.user, tieba=tieba).update(
+                    last_visited_at=timezone.now()
+                )
+            
+            # 置顶帖子单独查询，其余帖子按精华、发布时间倒序取第一页（均由贴吧列表索引完成）
+            pinned_posts = Post.objects.pinned(tieba.pk).prefetch_related(
+                'images', author_card_prefetch('author')
+            )
+            posts = Post.objects.unpinned(tieba.pk).prefetch_related(
+                'images', author_card_prefetch('author')
+            )[:TIEBA_PAGE_SIZE]
+            posts = list(pinned_posts) + list(posts)
             
             # 获取贴吧成员数量
             member_count = tieba.members_count or 0
             
-            # 获取今日帖子数量（简化处理，实际应该按日期过滤）
-            today_posts_count = posts.count()  # 简化处理
-            
             return render(request, self.template_name, {
                 'tieba': tieba,
                 'posts': posts,
                 'member_count': member_count,
-                'today_posts_count': today_posts_count
+                # 与贴吧广场、API 一致，使用贴吧上的今日帖子数（第一页帖子数最多只有 TIEBA_PAGE_SIZE）
+                'today_posts_count': tieba.today_posts_count
             })
             
         except Tieba.DoesNotExist:
@@ -93,38 +115,62 @@ class TiebaDetailView(View):
 
 class PostDetailView(View):
     """帖子详情视图"""
+    read_from_replica = True
     template_name = 'post_detail.html'
     
     def get(self, request, pk):
         from posts.models import Post
         from posts.models import Comment
+        from posts.related import related_posts_for
         
         try:
             # 获取帖子信息，预加载图片数据
-            post = Post.objects.prefetch_related('images').get(id=pk)
+            post = Post.objects.prefetch_related(
+                'images', author_card_prefetch('author')
+            ).get(id=pk)
             
-            # 增加帖子浏览量
-            post.views_count = (post.views_count or 0) + 1
-            post.save()
+            # 增加帖子浏览量（F() 增量更新，不覆盖其他计数字段）
+            Post.objects.filter(pk=post.pk).update(views_count=F('views_count') + 1)
+            post.views_count += 1
             
             # 获取帖子的回复（评论）
-            comments = Comment.objects.filter(post=post).order_by('-created_at')
+            comments = Comment.objects.filter(post=post).prefetch_related(
+                author_card_prefetch('author')
+            ).order_by('-created_at')
             
-            # 获取相关帖子（同贴吧的其他帖子）
-            related_posts = Post.objects.filter(
-                tieba=post.tieba
-            ).exclude(id=post.id).order_by('-created_at')[:5]
+            # 获取相关帖子（预先计算的相关列表）
+            related_posts = related_posts_for(post, limit=5)
             
             return render(request, self.template_name, {
                 'post': post,
+                'images': post.images.all(),
                 'comments': comments,
                 'related_posts': related_posts,
                 'comment_count': comments.count()
             })
             
         except Post.DoesNotExist:
+            return self.get_archived(request, pk)
+    
+    def get_archived(self, request, pk):
+        """热表中没有时回退读取归档帖子（只读，不计浏览量）"""
+        from posts.archive import get_archived_post, restore_post
+        from posts.models import ArchivedPost
+        
+        try:
+            post = restore_post(get_archived_post(pk))
+        except ArchivedPost.DoesNotExist:
             from django.http import Http404
             raise Http404("帖子不存在")
+        
+        return render(request, self.template_name, {
+            'post': post,
+            'images': post.archived_images,
+            'comments': post.archived_comments,
+            'related_posts': [],
+            'comment_count': len(post.archived_comments),
+            'is_archived': True,
+        })
     
     def post(self, request, pk):
         from posts.models import Post
@@ -186,7 +232,7 @@ class PublishCenterView(View):
     @method_decorator(login_required)
     def post(self, request):
         from tiebas.models import Tieba
-        from posts.models import Post, PostImage
+        from posts.services import publish_post
         
         try:
             # 获取表单数据
@@ -195,6 +241,16 @@ class PublishCenterView(View):
             content = request.POST.get('content')
             post_type = request.POST.get('post_type', 'normal')
             
+            # 上传处理器拒绝的图片（格式不符或超过大小限制）
+            upload_errors = getattr(request, 'upload_errors', [])
+            if upload_errors:
+                for error in upload_errors:
+                    messages.error(request, error)
+                tiebas = Tieba.objects.all()
+                return render(request, 'publish_center.html', {
+                    'tiebas': tiebas
+                })
+            
             # 验证必填字段
             if not all([tieba_id, title, content]):
                 messages.error(request, '请填写完整的帖子信息')
@@ -206,25 +262,16 @@ class PublishCenterView(View):
             # 获取贴吧对象
             tieba = Tieba.objects.get(id=tieba_id)
             
-            # 创建帖子
-            post = Post.objects.create(
+            # 校验并在一个事务内写入帖子和图片
+            post = publish_post(
+                author=request.user,
+                tieba=tieba,
                 title=title,
                 content=content,
                 post_type=post_type,
-                tieba=tieba,
-                author=request.user
+                images=[{'image': image} for image in request.FILES.getlist('images')]
             )
             
-            # 处理图片上传
-            images = request.FILES.getlist('images')
-            for i, image in enumerate(images):
-                if image:  # 确保文件存在
-                    PostImage.objects.create(
-                        post=post,
-                        image=image,
-                        sort_order=i
-                    )
-            
             messages.success(request, '帖子发布成功！')
             return redirect('post_detail', pk=post.id)
             
@@ -234,6 +281,13 @@ class PublishCenterView(View):
             return render(request, 'publish_center.html', {
                 'tiebas': tiebas
             })
+        except (ValidationError, PermissionDenied) as e:
+            for message in getattr(e, 'messages', [str(e)]):
+                messages.error(request, message)
+            tiebas = Tieba.objects.all()
+            return render(request, 'publish_center.html', {
+                'tiebas': tiebas
+            })
         except Exception as e:
             messages.error(request, f'发布失败：{str(e)}')
             tiebas = Tieba.objects.all()
@@ -277,6 +331,7 @@ class LogoutView(View):
 
 class GlobalSearchView(View):
     """全局搜索视图"""
+    read_from_replica = True
     template_name = 'search_results.html'
     
     def get(self, request):
@@ -310,7 +365,7 @@ class GlobalSearchView(View):
             post_results = Post.objects.filter(
                 models.Q(title__icontains=query) | 
                 models.Q(content__icontains=query)
-            ).order_by('-created_at')[:20]
+            ).select_related('tieba').order_by('-created_at')[:20]
         
         if search_type == 'all' or search_type == 'user':
             # 搜索用户
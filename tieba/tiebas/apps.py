@@ -0,0 +1,15 @@
+"""
+App configuration for tiebas app.
+"""
+
+from django.apps import AppConfig
+
+
+class TiebasConfig(AppConfig):
+    """贴吧应用配置"""
+    
+    name = 'tiebas'
+    verbose_name = '贴吧'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
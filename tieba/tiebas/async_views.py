@@ -0,0 +1,59 @@
+"""
+Async tieba views for tieba project.
+
+贴吧详情的异步版本：贴吧信息、当前用户的成员身份，以及置顶帖子和第一页帖子。
+"""
+
+from django.http import Http404
+from django.utils import timezone
+from posts.models import Post
+from posts.serializers import PostSerializer
+from posts.views import with_viewer_flags
+from tieba.async_views import AsyncAPIView, fetch
+from users.serializers import author_card_prefetch
+from .models import Tieba, TiebaMember, TiebaFollow
+from .serializers import TiebaSerializer
+
+TIEBA_DETAIL_POSTS = 20
+
+
+class AsyncTiebaDetailView(AsyncAPIView):
+    """贴吧详情（异步）"""
+    
+    read_from_replica = True
+    query_budget = 12
+    
+    async def get(self, request, pk):
+        try:
+            tieba = await Tieba.objects.select_related('category').aget(pk=pk)
+        except Tieba.DoesNotExist:
+            raise Http404
+        
+        user = request.user
+        member, is_following = None, False
+        if user.is_authenticated:
+            member = await TiebaMember.objects.filter(tieba=tieba, user=user).afirst()
+            is_following = await TiebaFollow.objects.filter(tieba=tieba, user=user).aexists()
+            # 记录访问时间，清空首页未读角标
+            if is_following:
+                await TiebaFollow.objects.filter(tieba=tieba, user=user).aupdate(
+                    last_visited_at=timezone.now()
+                )
+        
+        # 置顶帖子单独查询，其余帖子取第一页（均由贴吧列表索引完成）
+        def listing(queryset):
+            return with_viewer_flags(queryset, user).select_related('tieba__category').prefetch_related(
+                author_card_prefetch('author'), 'images'
+            )
+        pinned = await fetch(listing(Post.objects.pinned(tieba.pk)))
+        posts = await fetch(listing(Post.objects.unpinned(tieba.pk))[:TIEBA_DETAIL_POSTS])
+        
+        context = {'request': request}
+        return self.json({
+            'tieba': TiebaSerializer(tieba).data,
+            'is_member': member is not None,
+            'member_role': member.role if member else None,
+            'is_following': is_following,
+            'pinned_posts': PostSerializer(pinned, many=True, context=context).data,
+            'posts': PostSerializer(posts, many=True, context=context).data,
+        })
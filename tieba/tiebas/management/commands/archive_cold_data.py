@@ -0,0 +1,48 @@
+"""
+分批归档长期无人访问的帖子（连同评论）和已读私信的管理命令
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from posts.archive import archive_posts, cold_posts
+from user_messages.archive import archive_messages, cold_messages
+
+
+class Command(BaseCommand):
+    help = '把最后回复早于阈值的帖子（连同评论）和早于阈值的已读私信分批搬到压缩归档表'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--post-days', type=int, default=settings.ARCHIVE_POSTS_AFTER_DAYS,
+            help='最后回复早于该天数的帖子将被归档'
+        )
+        parser.add_argument(
+            '--message-days', type=int, default=settings.ARCHIVE_MESSAGES_AFTER_DAYS,
+            help='发送时间早于该天数的已读私信将被归档'
+        )
+        parser.add_argument('--batch-size', type=int, default=200, help='每批归档的帖子/私信数')
+        parser.add_argument('--dry-run', action='store_true', help='只统计不归档')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        posts_before = now - timedelta(days=options['post_days'])
+        messages_before = now - timedelta(days=options['message_days'])
+
+        if options['dry_run']:
+            self.stdout.write(f'帖子: 可归档 {cold_posts(posts_before).count()} 条')
+            self.stdout.write(f'私信: 可归档 {cold_messages(messages_before).count()} 条')
+            return
+
+        posts, comments = 0, 0
+        for archived_posts, archived_comments in archive_posts(posts_before, options['batch_size']):
+            posts += archived_posts
+            comments += archived_comments
+            self.stdout.write(f'帖子: 已归档 {posts} 条')
+        self.stdout.write(self.style.SUCCESS(f'帖子: 共归档 {posts} 条（含评论 {comments} 条）'))
+
+        messages = 0
+        for archived in archive_messages(messages_before, options['batch_size']):
+            messages += archived
+            self.stdout.write(f'私信: 已归档 {messages} 条')
+        self.stdout.write(self.style.SUCCESS(f'私信: 共归档 {messages} 条'))
@@ -0,0 +1,143 @@
+"""
+关键接口基准测试的管理命令
+"""
+import json
+import random
+import statistics
+import time
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import Client
+from posts.models import Post, PostLike
+from tiebas.models import Tieba
+from tieba.profiling import profile_queries
+
+User = get_user_model()
+
+SEARCH_WORDS = ['攻略', '分享', '求助', '美食', '编程', '手机', '电影', '学习']
+
+
+def percentile(values, pct):
+    """取有序列表的百分位数"""
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+class Command(BaseCommand):
+    help = '通过测试客户端压测动态流、贴吧详情、帖子详情、搜索、点赞、私信等接口，报告 p50/p99 延迟和查询次数'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='每个接口的请求次数')
+        parser.add_argument('--user', default=None, help='以该用户身份请求（默认取关注最多的用户）')
+        parser.add_argument('--only', nargs='*', default=None, help='只测试指定接口')
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--json', dest='json_path', default=None, help='将结果写入 JSON 文件')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.user = self.get_user(options['user'])
+        self.other_users = list(
+            User.objects.exclude(pk=self.user.pk).values_list('pk', flat=True)[:1000]
+        )
+        self.tieba_ids = list(Tieba.objects.values_list('pk', flat=True)[:1000])
+        self.post_ids = list(Post.objects.order_by('-pk').values_list('pk', flat=True)[:1000])
+        if not self.tieba_ids or not self.post_ids:
+            raise CommandError('没有贴吧或帖子数据，请先运行 generate_forum_data')
+
+        self.client = Client(HTTP_HOST='localhost')
+        self.client.force_login(self.user)
+
+        endpoints = {
+            'feed': self.feed,
+            'tieba_detail': self.tieba_detail,
+            'post_detail': self.post_detail,
+            'search': self.search,
+            'like': self.like,
+            'send_message': self.send_message,
+        }
+        only = set(options['only'] or endpoints)
+
+        results = {}
+        self.stdout.write(
+            f"{'接口':<14}{'p50(ms)':>10}{'p99(ms)':>10}{'平均(ms)':>10}{'查询数':>8}{'失败':>6}"
+        )
+        for name, request in endpoints.items():
+            if name not in only:
+                continue
+            results[name] = result = self.run(request, options['requests'])
+            self.stdout.write(
+                f"{name:<14}{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+                f"{result['mean_ms']:>10.2f}{result['avg_queries']:>8.1f}{result['errors']:>6}"
+            )
+
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"结果已写入 {options['json_path']}"))
+
+    def get_user(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f'用户 {username} 不存在')
+        user = User.objects.annotate(
+            n=Count('tieba_follows', distinct=True) + Count('following', distinct=True)
+        ).order_by('-n').first()
+        if user is None:
+            raise CommandError('没有用户数据，请先运行 generate_forum_data')
+        return user
+
+    def run(self, request, count):
+        timings, queries, errors = [], [], 0
+        for _ in range(count):
+            send = request()
+            with profile_queries() as profile:
+                start = time.perf_counter()
+                response = send()
+                elapsed = (time.perf_counter() - start) * 1000
+            timings.append(elapsed)
+            queries.append(profile.count)
+            if response.status_code >= 400:
+                errors += 1
+        timings.sort()
+        return {
+            'requests': count,
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p99_ms': round(percentile(timings, 99), 2),
+            'mean_ms': round(statistics.mean(timings), 2),
+            'avg_queries': round(statistics.mean(queries), 2),
+            'max_queries': max(queries),
+            'errors': errors,
+        }
+
+    # 以下方法完成准备工作，返回需要计时的请求
+
+    def feed(self):
+        return lambda: self.client.get('/api/posts/feed/')
+
+    def tieba_detail(self):
+        tieba_id = self.rng.choice(self.tieba_ids)
+        return lambda: self.client.get(f'/tieba/{tieba_id}/')
+
+    def post_detail(self):
+        post_id = self.rng.choice(self.post_ids)
+        return lambda: self.client.get(f'/post/{post_id}/')
+
+    def search(self):
+        word = self.rng.choice(SEARCH_WORDS)
+        return lambda: self.client.get('/search/', {'q': word})
+
+    def like(self):
+        post_id = self.rng.choice(self.post_ids)
+        # 先取消已有点赞，保证每次请求都是一次新的点赞
+        PostLike.objects.filter(post_id=post_id, user=self.user).delete()
+        return lambda: self.client.post(f'/api/posts/posts/{post_id}/like/')
+
+    def send_message(self):
+        receiver_id = self.rng.choice(self.other_users)
+        return lambda: self.client.post('/api/messages/messages/', {
+            'receiver': receiver_id,
+            'content': '压测消息',
+        })
@@ -0,0 +1,105 @@
+"""
+序列化与 JSON 渲染基准测试的管理命令
+
+对比 DRF 序列化器 + JSONRenderer 与编译序列化器 + ORJSONRenderer
+输出帖子、评论、用户列表的耗时（含查询），并确认两者输出一致
+"""
+import json
+import statistics
+import time
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Exists, OuterRef
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+from posts.models import Comment, CommentLike, Post
+from posts.serializers import CommentSerializer, PostSerializer
+from posts.views import compiled_comments, compiled_posts, filter_posts
+from tieba.renderers import ORJSONRenderer
+from users.serializers import UserSerializer, author_card_prefetch
+from users.views import compiled_users
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = '对比 DRF 序列化器与编译序列化器 + orjson 渲染帖子、评论、用户列表的耗时（每秒行数）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=500, help='每个列表的行数')
+        parser.add_argument('--repeat', type=int, default=10, help='每种方式的重复次数')
+        parser.add_argument('--only', nargs='*', default=None, help='只测试指定列表（posts/comments/users）')
+        parser.add_argument('--json', dest='json_path', default=None, help='将结果写入 JSON 文件')
+
+    def handle(self, *args, **options):
+        user = User.objects.order_by('pk').first()
+        if user is None or not Post.objects.exists():
+            raise CommandError('没有帖子数据，请先运行 generate_forum_data')
+
+        request = RequestFactory().get('/')
+        request.user = user
+        context = {'request': request}
+        rows = options['rows']
+
+        # (DRF 序列化器, 编译序列化器, 返回与列表接口相同查询集的函数)
+        lists = {
+            'posts': (PostSerializer, compiled_posts, lambda: filter_posts(Post.objects.all(), {}, user, live=True)),
+            'comments': (CommentSerializer, compiled_comments, lambda: self.comments(user)),
+            'users': (UserSerializer, compiled_users, lambda: User.objects.order_by('pk')),
+        }
+        only = set(options['only'] or lists)
+
+        results = {}
+        self.stdout.write(
+            f"{'列表':<10}{'行数':>6}{'DRF(ms)':>10}{'编译(ms)':>10}{'DRF 行/秒':>12}{'编译 行/秒':>12}{'加速':>8}"
+        )
+        for name, (serializer_class, compiled, get_queryset) in lists.items():
+            if name not in only:
+                continue
+
+            def drf():
+                queryset = get_queryset()[:rows]
+                return JSONRenderer().render(serializer_class(queryset, many=True, context=context).data)
+
+            def fast():
+                plan = compiled.plan(context)
+                return ORJSONRenderer().render(plan.build(plan.values(get_queryset())[:rows]))
+
+            if json.loads(drf()) != json.loads(fast()):
+                raise CommandError(f'{name} 的编译序列化器输出与 DRF 序列化器不一致')
+
+            count = len(json.loads(fast()))
+            drf_ms = self.measure(drf, options['repeat'])
+            fast_ms = self.measure(fast, options['repeat'])
+            results[name] = result = {
+                'rows': count,
+                'drf_ms': round(drf_ms, 2),
+                'compiled_ms': round(fast_ms, 2),
+                'drf_rows_per_sec': round(count / drf_ms * 1000),
+                'compiled_rows_per_sec': round(count / fast_ms * 1000),
+                'speedup': round(drf_ms / fast_ms, 2),
+            }
+            self.stdout.write(
+                f"{name:<10}{count:>6}{result['drf_ms']:>10.2f}{result['compiled_ms']:>10.2f}"
+                f"{result['drf_rows_per_sec']:>12}{result['compiled_rows_per_sec']:>12}{result['speedup']:>7.2f}x"
+            )
+
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"结果已写入 {options['json_path']}"))
+
+    def comments(self, user):
+        """与评论列表接口相同的查询集"""
+        return Comment.objects.prefetch_related(author_card_prefetch('author')).annotate(
+            is_liked_by_me=Exists(CommentLike.objects.filter(comment=OuterRef('pk'), user=user))
+        ).order_by('-created_at')
+
+    def measure(self, render, repeat):
+        """多次执行取中位数耗时（毫秒）"""
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            render()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
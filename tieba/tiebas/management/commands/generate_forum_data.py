@@ -0,0 +1,210 @@
+"""
+批量生成压测数据的管理命令
+"""
+import random
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from posts.models import Post, Comment, PostLike, CommentLike, PostCollection
+from tiebas.models import Tieba, TiebaCategory, TiebaMember, TiebaFollow
+from user_messages.models import Message
+from users.models import UserFollow
+
+User = get_user_model()
+
+CATEGORIES = ['游戏', '生活', '学习', '科技', '体育', '影视', '音乐', '动漫']
+
+WORDS = [
+    '攻略', '分享', '求助', '讨论', '经验', '新手', '推荐', '测评', '日常', '吐槽',
+    '美食', '旅行', '摄影', '考研', '编程', 'Python', '手机', '电脑', '显卡', '耳机',
+    '英雄联盟', '王者荣耀', '原神', '足球', '篮球', '电影', '音乐', '小说', '动漫', '学习',
+    '今天', '大家', '觉得', '怎么', '这个', '终于', '有没有', '一起', '真的', '好用',
+]
+
+TAGS = ['攻略', '求助', '讨论', '分享', '新手', '水贴', '官方', '活动', '测评', '资源']
+
+
+def sentence(rng, min_words, max_words):
+    """随机拼接一句中文文本"""
+    return ''.join(rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words)))
+
+
+class Command(BaseCommand):
+    help = '按指定规模批量生成用户、贴吧、成员、关注、帖子、评论、点赞和私信数据'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--tiebas', type=int, default=50)
+        parser.add_argument('--memberships', type=int, default=5, help='每个用户加入的贴吧数')
+        parser.add_argument('--follows', type=int, default=10, help='每个用户关注的用户数')
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument('--likes', type=int, default=50000)
+        parser.add_argument('--messages', type=int, default=10000)
+        parser.add_argument('--days', type=int, default=365, help='数据时间跨度（天）')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--prefix', default='bench', help='生成用户名、贴吧名的前缀')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        self.span = timedelta(days=options['days'])
+        prefix = f"{options['prefix']}{self.rng.randrange(16 ** 6):06x}"
+
+        user_ids = self.create_users(prefix, options['users'])
+        tieba_ids = self.create_tiebas(prefix, options['tiebas'], user_ids)
+        self.create_memberships(user_ids, tieba_ids, options['memberships'])
+        self.create_follows(user_ids, options['follows'])
+        post_ids = self.create_posts(user_ids, tieba_ids, options['posts'])
+        comment_ids = self.create_comments(user_ids, post_ids, options['comments'])
+        self.create_likes(user_ids, post_ids, comment_ids, options['likes'])
+        self.create_messages(user_ids, options['messages'])
+
+        # bulk_create 不触发信号，补建标签关联并统一重算计数字段
+        self.stdout.write('回填帖子标签...')
+        call_command('backfill_post_tags', batch_size=self.batch_size, stdout=self.stdout)
+        self.stdout.write('重新统计计数字段...')
+        call_command('reconcile_counters', '--fix', stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS('压测数据生成完成！'))
+
+    def random_time(self):
+        return self.now - self.span * self.rng.random()
+
+    def bulk_create(self, model, objs, **kwargs):
+        """分批写入，返回新建行的主键列表"""
+        last_pk = model.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        for start in range(0, len(objs), self.batch_size):
+            model.objects.bulk_create(objs[start:start + self.batch_size], **kwargs)
+        pks = list(model.objects.filter(pk__gt=last_pk).values_list('pk', flat=True))
+        self.stdout.write(f'{model._meta.verbose_name}: {len(pks)}')
+        return pks
+
+    def backdate(self, model, pks, fields):
+        """auto_now_add 字段在写入时总是当前时间，写入后再分批改为随机时间"""
+        for start in range(0, len(pks), self.batch_size):
+            objs = []
+            for pk in pks[start:start + self.batch_size]:
+                created_at = self.random_time()
+                objs.append(model(pk=pk, **{field: created_at for field in fields}))
+            model.objects.bulk_update(objs, fields)
+
+    def create_users(self, prefix, count):
+        password = make_password('password123')
+        users = [
+            User(
+                username=f'{prefix}_{i}',
+                nickname=f'{self.rng.choice(WORDS)}{i}',
+                email=f'{prefix}_{i}@example.com',
+                password=password,
+            )
+            for i in range(count)
+        ]
+        return self.bulk_create(User, users)
+
+    def create_tiebas(self, prefix, count, user_ids):
+        categories = []
+        for name in CATEGORIES:
+            category, _ = TiebaCategory.objects.get_or_create(name=name)
+            categories.append(category)
+
+        tiebas = [
+            Tieba(
+                name=f'{prefix}_{self.rng.choice(WORDS)}{i}',
+                description=sentence(self.rng, 5, 15),
+                category=self.rng.choice(categories),
+                creator_id=self.rng.choice(user_ids),
+            )
+            for i in range(count)
+        ]
+        return self.bulk_create(Tieba, tiebas)
+
+    def create_memberships(self, user_ids, tieba_ids, per_user):
+        per_user = min(per_user, len(tieba_ids))
+        members, follows = [], []
+        for user_id in user_ids:
+            for tieba_id in self.rng.sample(tieba_ids, per_user):
+                members.append(TiebaMember(tieba_id=tieba_id, user_id=user_id))
+                follows.append(TiebaFollow(tieba_id=tieba_id, user_id=user_id))
+        self.bulk_create(TiebaMember, members, ignore_conflicts=True)
+        self.bulk_create(TiebaFollow, follows, ignore_conflicts=True)
+
+    def create_follows(self, user_ids, per_user):
+        per_user = min(per_user, len(user_ids) - 1)
+        follows = []
+        for user_id in user_ids:
+            for following_id in self.rng.sample(user_ids, per_user + 1):
+                if following_id != user_id:
+                    follows.append(UserFollow(follower_id=user_id, following_id=following_id))
+        self.bulk_create(UserFollow, follows, ignore_conflicts=True)
+
+    def create_posts(self, user_ids, tieba_ids, count):
+        post_types = [choice for choice, _ in Post.POST_TYPE_CHOICES]
+        posts = [
+            Post(
+                title=sentence(self.rng, 2, 8),
+                content=sentence(self.rng, 10, 80),
+                author_id=self.rng.choice(user_ids),
+                tieba_id=self.rng.choice(tieba_ids),
+                post_type=self.rng.choices(post_types, weights=[90, 3, 5, 2])[0],
+                is_top=self.rng.random() < 0.01,
+                is_essence=self.rng.random() < 0.05,
+                views_count=self.rng.randint(0, 5000),
+                tags=','.join(self.rng.sample(TAGS, self.rng.randint(0, 3))),
+            )
+            for _ in range(count)
+        ]
+        pks = self.bulk_create(Post, posts)
+        self.backdate(Post, pks, ['created_at', 'updated_at', 'last_reply_at'])
+        return pks
+
+    def create_comments(self, user_ids, post_ids, count):
+        if not post_ids:
+            return []
+        comments = [
+            Comment(
+                post_id=self.rng.choice(post_ids),
+                author_id=self.rng.choice(user_ids),
+                content=sentence(self.rng, 3, 30),
+            )
+            for _ in range(count)
+        ]
+        pks = self.bulk_create(Comment, comments)
+        self.backdate(Comment, pks, ['created_at', 'updated_at'])
+        return pks
+
+    def create_likes(self, user_ids, post_ids, comment_ids, count):
+        post_likes = [
+            PostLike(post_id=self.rng.choice(post_ids), user_id=self.rng.choice(user_ids))
+            for _ in range(count if post_ids else 0)
+        ]
+        comment_likes = [
+            CommentLike(comment_id=self.rng.choice(comment_ids), user_id=self.rng.choice(user_ids))
+            for _ in range(count // 2 if comment_ids else 0)
+        ]
+        collections = [
+            PostCollection(post_id=self.rng.choice(post_ids), user_id=self.rng.choice(user_ids))
+            for _ in range(count // 10 if post_ids else 0)
+        ]
+        self.bulk_create(PostLike, post_likes, ignore_conflicts=True)
+        self.bulk_create(CommentLike, comment_likes, ignore_conflicts=True)
+        self.bulk_create(PostCollection, collections, ignore_conflicts=True)
+
+    def create_messages(self, user_ids, count):
+        if len(user_ids) < 2:
+            return
+        messages = []
+        for _ in range(count):
+            sender_id, receiver_id = self.rng.sample(user_ids, 2)
+            messages.append(Message(
+                sender_id=sender_id,
+                receiver_id=receiver_id,
+                content=sentence(self.rng, 2, 20),
+                is_read=self.rng.random() < 0.7,
+            ))
+        pks = self.bulk_create(Message, messages)
+        self.backdate(Message, pks, ['created_at'])
@@ -0,0 +1,53 @@
+"""
+物理删除超过保留期的软删除数据的管理命令
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from posts.models import Post, Comment
+from user_messages.models import Notification
+
+# 先删评论再删帖子，帖子级联删除时不必再逐条处理这些评论
+PURGE_MODELS = [Comment, Post, Notification]
+
+
+def purge(model, before, batch_size):
+    """分批物理删除，逐批产出本批删除的行数（含级联删除的关联数据）"""
+    while True:
+        pks = list(model.all_objects.purgeable(before).values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return
+        deleted, _ = model.all_objects.filter(pk__in=pks).delete()
+        yield len(pks), deleted
+
+
+class Command(BaseCommand):
+    help = '分批物理删除超过保留期的已删除帖子、评论和通知'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.SOFT_DELETE_RETENTION_DAYS,
+            help='保留天数，删除时间早于该天数的数据将被清理'
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help='每批删除的行数')
+        parser.add_argument('--dry-run', action='store_true', help='只统计不删除')
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options['days'])
+
+        for model in PURGE_MODELS:
+            name = model._meta.verbose_name
+            if options['dry_run']:
+                count = model.all_objects.purgeable(before).count()
+                self.stdout.write(f'{name}: 可清理 {count} 条')
+                continue
+
+            total, total_with_cascade = 0, 0
+            for purged, deleted in purge(model, before, options['batch_size']):
+                total += purged
+                total_with_cascade += deleted
+                self.stdout.write(f'{name}: 已清理 {total} 条')
+            self.stdout.write(self.style.SUCCESS(
+                f'{name}: 共清理 {total} 条（含关联数据 {total_with_cascade} 行）'
+            ))
@@ -0,0 +1,47 @@
+"""
+核对并修复统计字段的管理命令
+"""
+from django.core.management.base import BaseCommand
+from tieba.counters import COUNTER_SPECS, reconcile
+
+
+class Command(BaseCommand):
+    help = '按分组聚合重新统计帖子数、评论数、点赞数等计数字段并报告偏差'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix', action='store_true',
+            help='将实际值写回数据库（默认只报告）'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='每批核对的行数'
+        )
+        parser.add_argument(
+            '--only', nargs='*', default=None,
+            help='只核对指定计数器，例如 tiebas.Tieba.posts_count'
+        )
+
+    def handle(self, *args, **options):
+        fix = options['fix']
+        chunk_size = options['chunk_size']
+        only = set(options['only'] or [])
+
+        total = 0
+        for spec in COUNTER_SPECS:
+            name = f'{spec[0]}.{spec[1]}'
+            if only and name not in only:
+                continue
+
+            drifted = 0
+            for drift in reconcile(spec, chunk_size=chunk_size, fix=fix):
+                drifted += len(drift)
+                for pk, value, actual in drift[:10]:
+                    self.stdout.write(f'  {name} #{pk}: {value} -> {actual}')
+
+            total += drifted
+            style = self.style.WARNING if drifted else self.style.SUCCESS
+            self.stdout.write(style(f'{name}: {drifted} 行偏差'))
+
+        suffix = '，已写回实际值' if fix and total else ''
+        self.stdout.write(self.style.SUCCESS(f'核对完成，共 {total} 行偏差{suffix}'))
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tiebas', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tiebafollow',
+            name='last_visited_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='最后访问时间'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tiebas', '0003_tiebafollow_last_visited_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TiebaSimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='相似度')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='排名')),
+                ('similar_tieba', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tiebas.tieba', verbose_name='相似贴吧')),
+                ('tieba', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similarities', to='tiebas.tieba', verbose_name='贴吧')),
+            ],
+            options={
+                'verbose_name': '相似贴吧',
+                'verbose_name_plural': '相似贴吧',
+                'unique_together': {('tieba', 'rank')},
+            },
+        ),
+        migrations.CreateModel(
+            name='TiebaRecommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='推荐分')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='排名')),
+                ('tieba', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tiebas.tieba', verbose_name='贴吧')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tieba_recommendations', to=settings.AUTH_USER_MODEL, verbose_name='用户')),
+            ],
+            options={
+                'verbose_name': '推荐贴吧',
+                'verbose_name_plural': '推荐贴吧',
+                'unique_together': {('user', 'rank')},
+            },
+        ),
+    ]
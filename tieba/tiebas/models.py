@@ -143,6 +143,8 @@ class TiebaFollow(models.Model):
         verbose_name='贴吧'
     )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='关注时间')
+    # 之后发布的帖子计入首页未读角标
+    last_visited_at = models.DateTimeField(null=True, blank=True, verbose_name='最后访问时间')
     
     class Meta:
         verbose_name = '贴吧关注'
@@ -150,4 +152,58 @@ class TiebaFollow(models.Model):
         unique_together = ('user', 'tieba')
     
     def __str__(self):
-        return f'{self.user} 关注 {self.tieba}'
\ No newline at end of file
+        return f'{self.user} 关注 {self.tieba}'
+
+
+class TiebaSimilarity(models.Model):
+    """相似贴吧（离线计算）"""
+    
+    tieba = models.ForeignKey(
+        Tieba, 
+        on_delete=models.CASCADE, 
+        related_name='similarities',
+        verbose_name='贴吧'
+    )
+    similar_tieba = models.ForeignKey(
+        Tieba, 
+        on_delete=models.CASCADE, 
+        related_name='+',
+        verbose_name='相似贴吧'
+    )
+    score = models.FloatField(verbose_name='相似度')
+    rank = models.PositiveSmallIntegerField(verbose_name='排名')
+    
+    class Meta:
+        verbose_name = '相似贴吧'
+        verbose_name_plural = '相似贴吧'
+        unique_together = ('tieba', 'rank')
+    
+    def __str__(self):
+        return f'{self.tieba} ~ {self.similar_tieba}'
+
+
+class TiebaRecommendation(models.Model):
+    """用户推荐贴吧（离线计算）"""
+    
+    user = models.ForeignKey(
+        User, 
+        on_delete=models.CASCADE, 
+        related_name='tieba_recommendations',
+        verbose_name='用户'
+    )
+    tieba = models.ForeignKey(
+        Tieba, 
+        on_delete=models.CASCADE, 
+        related_name='+',
+        verbose_name='贴吧'
+    )
+    score = models.FloatField(verbose_name='推荐分')
+    rank = models.PositiveSmallIntegerField(verbose_name='排名')
+    
+    class Meta:
+        verbose_name = '推荐贴吧'
+        verbose_name_plural = '推荐贴吧'
+        unique_together = ('user', 'rank')
+    
+    def __str__(self):
+        return f'为 {self.user} 推荐 {self.tieba}'
@@ -0,0 +1,125 @@
+"""
+Offline tieba recommender for tieba project.
+
+用户-贴吧交互矩阵（加入计 1 分、关注计 follow_weight 分）按列归一化后，
+贴吧两两之间的余弦相似度即共同成员/关注者的重合度。
+每个贴吧保存最相似的前 K 个贴吧；用户的推荐分为其已加入/关注贴吧的相似度之和，
+排除已有交互的贴吧后保存前 K 个。结果整表重建，接口按用户直接查表。
+"""
+
+import numpy as np
+from scipy import sparse
+from django.db import transaction
+from .models import Tieba, TiebaMember, TiebaFollow, TiebaSimilarity, TiebaRecommendation
+
+
+def interaction_matrix(follow_weight=0.5):
+    """
+    构建用户 x 贴吧的稀疏交互矩阵
+
+    返回 (矩阵, 用户主键数组, 贴吧主键数组)
+    """
+    members = np.array(
+        list(TiebaMember.objects.values_list('user_id', 'tieba_id').iterator(chunk_size=10000)),
+        dtype=np.int64
+    ).reshape(-1, 2)
+    follows = np.array(
+        list(TiebaFollow.objects.values_list('user_id', 'tieba_id').iterator(chunk_size=10000)),
+        dtype=np.int64
+    ).reshape(-1, 2)
+    pairs = np.concatenate([members, follows])
+    weights = np.concatenate([
+        np.ones(len(members)),
+        np.full(len(follows), follow_weight),
+    ])
+
+    user_ids, rows = np.unique(pairs[:, 0], return_inverse=True)
+    tieba_ids, cols = np.unique(pairs[:, 1], return_inverse=True)
+    # 重复的 (用户, 贴吧) 在转换时相加，即既加入又关注
+    matrix = sparse.coo_matrix(
+        (weights, (rows, cols)), shape=(len(user_ids), len(tieba_ids))
+    ).tocsr()
+    return matrix, user_ids, tieba_ids
+
+
+def similarity_matrix(matrix):
+    """贴吧间余弦相似度（对角线置零）"""
+    norms = np.sqrt(np.asarray(matrix.power(2).sum(axis=0)).ravel())
+    norms[norms == 0] = 1
+    normalized = matrix @ sparse.diags(1 / norms)
+    similarity = (normalized.T @ normalized).tocsr()
+    similarity = similarity - sparse.diags(similarity.diagonal())
+    similarity.eliminate_zeros()
+    return similarity.tocsr()
+
+
+def top_k(row, k, exclude=None, allowed=None):
+    """取稀疏行中分数最高的 k 个 (列, 分数)"""
+    indices, scores = row.indices, row.data
+    mask = scores > 0
+    if exclude is not None and len(exclude):
+        mask &= ~np.isin(indices, exclude)
+    if allowed is not None:
+        mask &= allowed[indices]
+    indices, scores = indices[mask], scores[mask]
+    if len(scores) > k:
+        keep = np.argpartition(-scores, k)[:k]
+        indices, scores = indices[keep], scores[keep]
+    order = np.argsort(-scores, kind='stable')
+    return indices[order], scores[order]
+
+
+def build_recommendations(similar_k=20, user_k=50, follow_weight=0.5, chunk_size=1000, batch_size=1000):
+    """
+    重建相似贴吧表和用户推荐表
+
+    返回 (相似贴吧行数, 推荐行数)
+    """
+    matrix, user_ids, tieba_ids = interaction_matrix(follow_weight)
+    if not matrix.nnz:
+        with transaction.atomic():
+            TiebaSimilarity.objects.all().delete()
+            TiebaRecommendation.objects.all().delete()
+        return 0, 0
+
+    similarity = similarity_matrix(matrix)
+    # 转为 Python int，数据库驱动不接受 numpy 整数
+    user_ids, tieba_ids = user_ids.tolist(), tieba_ids.tolist()
+
+    # 只推荐公开贴吧
+    public_ids = set(Tieba.objects.filter(is_public=True).values_list('pk', flat=True))
+    allowed = np.fromiter((pk in public_ids for pk in tieba_ids), dtype=bool, count=len(tieba_ids))
+
+    similarities = []
+    for i in range(similarity.shape[0]):
+        cols, scores = top_k(similarity.getrow(i), similar_k, allowed=allowed)
+        similarities.extend(
+            TiebaSimilarity(
+                tieba_id=tieba_ids[i], similar_tieba_id=tieba_ids[col],
+                score=float(score), rank=rank
+            )
+            for rank, (col, score) in enumerate(zip(cols, scores), 1)
+        )
+
+    recommendations = []
+    for start in range(0, matrix.shape[0], chunk_size):
+        chunk = matrix[start:start + chunk_size]
+        scores_chunk = (chunk @ similarity).tocsr()
+        for offset in range(chunk.shape[0]):
+            seen = chunk.indices[chunk.indptr[offset]:chunk.indptr[offset + 1]]
+            cols, scores = top_k(scores_chunk.getrow(offset), user_k, exclude=seen, allowed=allowed)
+            recommendations.extend(
+                TiebaRecommendation(
+                    user_id=user_ids[start + offset], tieba_id=tieba_ids[col],
+                    score=float(score), rank=rank
+                )
+                for rank, (col, score) in enumerate(zip(cols, scores), 1)
+            )
+
+    # 整表替换，读取方在事务提交前看到的仍是旧结果
+    with transaction.atomic():
+        TiebaSimilarity.objects.all().delete()
+        TiebaRecommendation.objects.all().delete()
+        TiebaSimilarity.objects.bulk_create(similarities, batch_size=batch_size)
+        TiebaRecommendation.objects.bulk_create(recommendations, batch_size=batch_size)
+    return len(similarities), len(recommendations)
@@ -3,8 +3,9 @@ Tieba serializers for tieba project.
 """
 
 from rest_framework import serializers
+from tieba.sparse_fields import SparseFieldsMixin
 from .models import TiebaCategory, Tieba, TiebaMember, TiebaFollow
-from users.serializers import UserSerializer
+from users.serializers import AuthorCardSerializer
 
 
 class TiebaCategorySerializer(serializers.ModelSerializer):
@@ -12,40 +13,35 @@ class TiebaCategorySerializer(serializers.ModelSerializer):
     
     class Meta:
         model = TiebaCategory
-        fields = ['id', 'name', 'description', 'icon', 'created_at']
-        read_only_fields = ['id', 'created_at']
+        fields = ['id', 'name', 'description', 'icon', 'sort_order']
+        read_only_fields = ['id']
 
 
-class TiebaSerializer(serializers.ModelSerializer):
+class TiebaSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """贴吧序列化器"""
     
-    category_name = serializers.CharField(source='category.name', read_only=True)
-    owner_username = serializers.CharField(source='owner.username', read_only=True)
+    category_name = serializers.CharField(source='category.name', read_only=True, default=None)
     
     class Meta:
         model = Tieba
         fields = [
             'id', 'name', 'description', 'avatar', 'banner', 'category', 'category_name',
-            'owner', 'owner_username', 'rules', 'tags', 'member_count', 'post_count',
-            'today_post_count', 'is_private', 'is_official', 'status', 'created_at', 'updated_at'
+            'creator', 'members_count', 'posts_count', 'today_posts_count',
+            'is_public', 'join_need_approve', 'post_need_approve', 'created_at', 'updated_at'
         ]
         read_only_fields = [
-            'id', 'member_count', 'post_count', 'today_post_count', 'created_at', 'updated_at'
+            'id', 'creator', 'members_count', 'posts_count', 'today_posts_count',
+            'created_at', 'updated_at'
         ]
     
     def to_representation(self, instance):
         data = super().to_representation(instance)
         
-        # 处理图片URL
-        if instance.avatar:
-            data['avatar'] = instance.avatar.url
-        else:
-            data['avatar'] = None
-            
-        if instance.banner:
-            data['banner'] = instance.banner.url
-        else:
-            data['banner'] = None
+        # 处理图片URL（按 ?fields= 裁剪后可能不含这些字段）
+        if 'avatar' in data:
+            data['avatar'] = instance.avatar.url if instance.avatar else None
+        if 'banner' in data:
+            data['banner'] = instance.banner.url if instance.banner else None
         
         return data
 
@@ -63,10 +59,10 @@ class TiebaCreateSerializer(serializers.ModelSerializer):
         return value
 
 
-class TiebaMemberSerializer(serializers.ModelSerializer):
+class TiebaMemberSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """贴吧成员序列化器"""
     
-    user_info = UserSerializer(source='user', read_only=True)
+    user_info = AuthorCardSerializer(source='user', read_only=True)
     tieba_name = serializers.CharField(source='tieba.name', read_only=True)
     
     class Meta:
@@ -78,10 +74,10 @@ class TiebaMemberSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'joined_at', 'last_active_at']
 
 
-class TiebaFollowSerializer(serializers.ModelSerializer):
+class TiebaFollowSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """贴吧关注序列化器"""
     
-    user_info = UserSerializer(source='user', read_only=True)
+    user_info = AuthorCardSerializer(source='user', read_only=True)
     tieba_info = TiebaSerializer(source='tieba', read_only=True)
     
     class Meta:
@@ -90,11 +86,28 @@ class TiebaFollowSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
-class TiebaDetailSerializer(serializers.ModelSerializer):
+class FollowedTiebaSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """关注贴吧序列化器（首页，带未读帖子数）"""
+    
+    id = serializers.IntegerField(source='tieba_id', read_only=True)
+    name = serializers.CharField(source='tieba.name', read_only=True)
+    avatar = serializers.SerializerMethodField()
+    unread_count = serializers.IntegerField(read_only=True, default=0)
+    
+    class Meta:
+        model = TiebaFollow
+        fields = ['id', 'name', 'avatar', 'unread_count', 'last_visited_at']
+        read_only_fields = fields
+    
+    def get_avatar(self, obj):
+        return obj.tieba.avatar.url if obj.tieba.avatar else None
+
+
+class TiebaDetailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """贴吧详情序列化器"""
     
-    category_name = serializers.CharField(source='category.name', read_only=True)
-    owner_info = UserSerializer(source='owner', read_only=True)
+    category_name = serializers.CharField(source='category.name', read_only=True, default=None)
+    owner_info = AuthorCardSerializer(source='creator', read_only=True)
     is_member = serializers.SerializerMethodField()
     is_following = serializers.SerializerMethodField()
     member_role = serializers.SerializerMethodField()
@@ -103,12 +116,13 @@ class TiebaDetailSerializer(serializers.ModelSerializer):
         model = Tieba
         fields = [
             'id', 'name', 'description', 'avatar', 'banner', 'category', 'category_name',
-            'owner', 'owner_info', 'rules', 'tags', 'member_count', 'post_count',
-            'today_post_count', 'is_private', 'is_official', 'status',
+            'creator', 'owner_info', 'members_count', 'posts_count', 'today_posts_count',
+            'is_public', 'join_need_approve', 'post_need_approve',
             'is_member', 'is_following', 'member_role', 'created_at', 'updated_at'
         ]
         read_only_fields = [
-            'id', 'member_count', 'post_count', 'today_post_count', 'created_at', 'updated_at'
+            'id', 'creator', 'members_count', 'posts_count', 'today_posts_count',
+            'created_at', 'updated_at'
         ]
     
     def get_is_member(self, obj):
@@ -0,0 +1,23 @@
+"""
+Signal handlers for tiebas app.
+
+维护贴吧成员数统计字段。
+"""
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from tieba.counters import adjust_counter
+from .models import Tieba, TiebaMember
+
+
+@receiver(post_save, sender=TiebaMember)
+def member_joined(sender, instance, created, **kwargs):
+    """加入贴吧：成员数 +1"""
+    if created:
+        adjust_counter(Tieba.objects.filter(pk=instance.tieba_id), 'members_count', 1)
+
+
+@receiver(post_delete, sender=TiebaMember)
+def member_left(sender, instance, **kwargs):
+    """退出贴吧：成员数 -1"""
+    adjust_counter(Tieba.objects.filter(pk=instance.tieba_id), 'members_count', -1)
@@ -5,6 +5,7 @@ URL configuration for tiebas app.
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from . import views
+from .async_views import AsyncTiebaDetailView
 
 router = DefaultRouter()
 router.register(r'categories', views.TiebaCategoryViewSet, basename='category')
@@ -15,6 +16,9 @@ urlpatterns = [
     # 用户贴吧相关
     path('user/tiebas/', views.UserTiebasView.as_view(), name='user-tiebas'),
     
+    # 贴吧详情异步版本（ASGI 部署下不占用线程等待数据库）
+    path('async/tiebas/<int:pk>/', AsyncTiebaDetailView.as_view(), name='async-tieba-detail'),
+    
     # 包含视图集路由
     path('', include(router.urls)),
 ]
\ No newline at end of file
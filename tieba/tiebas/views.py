@@ -2,17 +2,48 @@
 Tieba views for tieba project.
 """
 
-from django.db.models import Q
+import re
+from django.conf import settings
+from django.db.models import Exists, F, OuterRef, Q, Subquery
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from .models import TiebaCategory, Tieba, TiebaMember, TiebaFollow
+from tieba.conditional import ConditionalRetrieveMixin
+from tieba.sparse_fields import FieldSelection, load_related, select_fields
+from .models import (
+    TiebaCategory, Tieba, TiebaMember, TiebaFollow, TiebaSimilarity, TiebaRecommendation
+)
 from .serializers import (
     TiebaCategorySerializer, TiebaSerializer, TiebaCreateSerializer,
     TiebaMemberSerializer, TiebaFollowSerializer, TiebaDetailSerializer
 )
 from users.models import User
+from users.serializers import author_card_prefetch, author_card_version
+from posts.tags import tag_cloud
+from tieba.caching import get_or_refresh
+
+RANKED_TIEBAS_CACHE_KEY = 'tiebas:ranked'
+RANKED_TIEBAS_SIZE = 100
+POPULAR_SIZE = 20
+RECOMMEND_SIZE = 10
+
+
+def compute_ranked_tiebas():
+    """按成员数排序的公开贴吧（热门与推荐的候选）"""
+    queryset = Tieba.objects.filter(is_public=True).select_related(
+        'category'
+    ).order_by('-members_count', '-posts_count')[:RANKED_TIEBAS_SIZE]
+    return TiebaSerializer(queryset, many=True).data
+
+
+def ranked_tiebas():
+    """读取缓存的贴吧排行，软过期后返回旧数据并在后台刷新"""
+    return get_or_refresh(
+        RANKED_TIEBAS_CACHE_KEY, compute_ranked_tiebas,
+        settings.TIEBA_LIST_CACHE_SOFT_TIMEOUT,
+        settings.TIEBA_LIST_CACHE_HARD_TIMEOUT
+    )
 
 
 class TiebaCategoryViewSet(viewsets.ModelViewSet):
@@ -23,10 +54,16 @@ class TiebaCategoryViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
 
-class TiebaViewSet(viewsets.ModelViewSet):
+class TiebaViewSet(ConditionalRetrieveMixin, viewsets.ModelViewSet):
     """贴吧视图集"""
     
-    queryset = Tieba.objects.all()
+    read_from_replica = True
+    query_budget = {
+        'list': 6, 'retrieve': 8, 'search': 6,
+        'popular': 3, 'recommended': 5, 'similar': 3, 'tags': 3,
+    }
+    
+    queryset = Tieba.objects.select_related('category')
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     
     def get_serializer_class(self):
@@ -36,6 +73,31 @@ class TiebaViewSet(viewsets.ModelViewSet):
             return TiebaDetailSerializer
         return TiebaSerializer
     
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # 不输出分类名时不关联分类表
+        if not FieldSelection.from_request(self.request).includes('category_name'):
+            queryset = queryset.select_related(None)
+        return queryset
+    
+    def get_version_queryset(self):
+        """贴吧详情的版本列：贴吧、分类名、创建者及当前用户的成员身份/关注"""
+        user = self.request.user
+        queryset = Tieba.objects.all()
+        viewer_fields = []
+        if user.is_authenticated:
+            queryset = queryset.annotate(
+                my_role=Subquery(TiebaMember.objects.filter(tieba=OuterRef('pk'), user=user).values('role')[:1]),
+                is_following=Exists(TiebaFollow.objects.filter(tieba=OuterRef('pk'), user=user)),
+            )
+            viewer_fields = ['my_role', 'is_following']
+        return queryset.values(
+            'updated_at', 'members_count', 'posts_count', 'today_posts_count', 'category__name',
+            *author_card_version('creator'),
+            *viewer_fields,
+            last_modified=F('updated_at'),
+        )
+    
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
     
@@ -47,16 +109,13 @@ class TiebaViewSet(viewsets.ModelViewSet):
         if TiebaMember.objects.filter(tieba=tieba, user=request.user).exists():
             return Response({'error': '已经是该贴吧成员'}, status=status.HTTP_400_BAD_REQUEST)
         
+        # 贴吧成员数由信号维护
         member = TiebaMember.objects.create(
             tieba=tieba,
             user=request.user,
             role='member'
         )
         
-        # 更新贴吧成员数量
-        tieba.member_count = TiebaMember.objects.filter(tieba=tieba).count()
-        tieba.save()
-        
         serializer = TiebaMemberSerializer(member)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     
@@ -69,12 +128,9 @@ class TiebaViewSet(viewsets.ModelViewSet):
         if not member:
             return Response({'error': '不是该贴吧成员'}, status=status.HTTP_400_BAD_REQUEST)
         
+        # 贴吧成员数由信号维护
         member.delete()
         
-        # 更新贴吧成员数量
-        tieba.member_count = TiebaMember.objects.filter(tieba=tieba).count()
-        tieba.save()
-        
         return Response({'message': '已退出贴吧'}, status=status.HTTP_200_OK)
     
     @action(detail=True, methods=['post'])
@@ -123,27 +179,62 @@ class TiebaViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def popular(self, request):
         """热门贴吧"""
-        queryset = self.get_queryset().order_by('-member_count')[:20]
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        # 缓存的是完整输出，所有字段选择共用，按本次请求的 ?fields= 裁剪
+        return Response(select_fields(ranked_tiebas()[:POPULAR_SIZE], FieldSelection.from_request(request)))
     
     @action(detail=False, methods=['get'])
     def recommended(self, request):
         """推荐贴吧"""
-        # 简单的推荐算法：基于用户兴趣标签
+        # 优先读取离线计算的推荐结果（build_tieba_recommendations），排除计算之后加入的贴吧
         if request.user.is_authenticated:
-            user_interests = request.user.interests or []
-            if user_interests:
-                queryset = self.get_queryset().filter(
-                    tags__overlap=user_interests
-                ).order_by('-member_count')[:10]
-            else:
-                queryset = self.get_queryset().order_by('-member_count')[:10]
-        else:
-            queryset = self.get_queryset().order_by('-member_count')[:10]
+            recommendations = TiebaRecommendation.objects.filter(
+                user=request.user
+            ).exclude(
+                tieba__members__user=request.user
+            ).select_related('tieba__category').order_by('rank')[:RECOMMEND_SIZE]
+            tiebas = [recommendation.tieba for recommendation in recommendations]
+            if tiebas:
+                serializer = self.get_serializer(tiebas, many=True)
+                return Response(serializer.data)
         
-        serializer = self.get_serializer(queryset, many=True)
+        # 新用户或尚未计算：从缓存的热门候选中按兴趣爱好匹配，排除已加入的贴吧
+        candidates = ranked_tiebas()
+        if request.user.is_authenticated:
+            joined = set(TiebaMember.objects.filter(
+                user=request.user
+            ).values_list('tieba_id', flat=True))
+            candidates = [tieba for tieba in candidates if tieba['id'] not in joined]
+            
+            interests = [word for word in re.split(r'[\s,，、;；]+', request.user.interests or '') if word]
+            matched = [
+                tieba for tieba in candidates
+                if any(
+                    word in tieba['name'] or word in tieba['description']
+                    or word in (tieba['category_name'] or '')
+                    for word in interests
+                )
+            ]
+            matched_ids = {tieba['id'] for tieba in matched}
+            candidates = matched + [tieba for tieba in candidates if tieba['id'] not in matched_ids]
+        return Response(select_fields(candidates[:RECOMMEND_SIZE], FieldSelection.from_request(request)))
+    
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        """相似贴吧"""
+        tieba = self.get_object()
+        similarities = TiebaSimilarity.objects.filter(
+            tieba=tieba
+        ).select_related('similar_tieba__category').order_by('rank')[:RECOMMEND_SIZE]
+        serializer = self.get_serializer(
+            [similarity.similar_tieba for similarity in similarities], many=True
+        )
         return Response(serializer.data)
+    
+    @action(detail=True, methods=['get'])
+    def tags(self, request, pk=None):
+        """贴吧标签云"""
+        tieba = self.get_object()
+        return Response(tag_cloud(tieba.pk))
 
 
 class TiebaMemberViewSet(viewsets.ModelViewSet):
@@ -158,7 +249,10 @@ class TiebaMemberViewSet(viewsets.ModelViewSet):
         tieba_id = self.request.query_params.get('tieba_id')
         if tieba_id:
             queryset = queryset.filter(tieba_id=tieba_id)
-        return queryset
+        selection = FieldSelection.from_request(self.request)
+        if selection.includes('tieba_name'):
+            queryset = queryset.select_related('tieba')
+        return load_related(queryset, selection, prefetch={'user_info': author_card_prefetch('user')})
     
     @action(detail=True, methods=['post'])
     def promote(self, request, pk=None):
@@ -218,12 +312,18 @@ class UserTiebasView(APIView):
     
     def get(self, request):
         """获取用户加入的贴吧"""
+        selection = FieldSelection.from_request(request)
         members = TiebaMember.objects.filter(user=request.user)
-        serializer = TiebaMemberSerializer(members, many=True)
+        if selection.includes('tieba_name'):
+            members = members.select_related('tieba')
+        members = load_related(members, selection, prefetch={'user_info': author_card_prefetch('user')})
+        serializer = TiebaMemberSerializer(members, many=True, context={'request': request})
         return Response(serializer.data)
     
     def post(self, request):
         """获取用户关注的贴吧"""
-        follows = TiebaFollow.objects.filter(user=request.user)
+        follows = TiebaFollow.objects.filter(user=request.user).select_related(
+            'tieba__category'
+        ).prefetch_related(author_card_prefetch('user'))
         serializer = TiebaFollowSerializer(follows, many=True)
         return Response(serializer.data)
\ No newline at end of file
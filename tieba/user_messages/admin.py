@@ -82,7 +82,8 @@ class NotificationAdmin(admin.ModelAdmin):
     )
     
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related('user')
+        # 管理后台包含已软删除的通知
+        return Notification.all_objects.select_related('user')
 
 
 @admin.register(NotificationSettings)
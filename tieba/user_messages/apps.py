@@ -0,0 +1,15 @@
+"""
+App configuration for user_messages app.
+"""
+
+from django.apps import AppConfig
+
+
+class UserMessagesConfig(AppConfig):
+    """消息应用配置"""
+    
+    name = 'user_messages'
+    verbose_name = '消息'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
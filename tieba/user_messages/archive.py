@@ -0,0 +1,55 @@
+"""
+Message archive for tieba project.
+
+发送时间早于阈值的已读私信分批搬到 ArchivedMessage，每批一个事务。
+未读私信（影响未读数）和会话的最后一条消息留在热表。
+"""
+
+from django.db import transaction
+from media_store.models import MediaBlob
+from media_store.storage import is_content_addressed
+from tieba.archive import pack
+from .models import Message, ArchivedMessage
+
+MESSAGE_PAYLOAD_FIELDS = [
+    'message_type', 'content', 'is_read', 'is_deleted_by_sender',
+    'is_deleted_by_receiver', 'read_at',
+]
+
+
+def cold_messages(before):
+    """可归档的私信：已读、不是会话的最后一条，且发送时间早于 before"""
+    return Message.objects.filter(
+        created_at__lt=before, is_read=True, session_last_message__isnull=True
+    )
+
+
+def _message_payload(message):
+    payload = {field: getattr(message, field) for field in MESSAGE_PAYLOAD_FIELDS}
+    payload['image'] = message.image.name if message.image else ''
+    return payload
+
+
+def archive_messages(before, batch_size=500):
+    """分批归档私信，逐批产出本批归档的条数"""
+    last_pk = 0
+    while True:
+        messages = list(cold_messages(before).filter(pk__gt=last_pk).order_by('pk')[:batch_size])
+        if not messages:
+            return
+        last_pk = messages[-1].pk
+        with transaction.atomic():
+            ArchivedMessage.objects.bulk_create([
+                ArchivedMessage(
+                    original_id=message.pk, sender_id=message.sender_id,
+                    receiver_id=message.receiver_id, created_at=message.created_at,
+                    data=pack(_message_payload(message))
+                )
+                for message in messages
+            ])
+            # 归档数据继续引用图片文件，删除热表行时的释放与之抵消
+            for message in messages:
+                if message.image and is_content_addressed(message.image.name):
+                    MediaBlob.acquire(message.image.name)
+            Message.objects.filter(pk__in=[message.pk for message in messages]).delete()
+        yield len(messages)
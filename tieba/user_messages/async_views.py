@@ -0,0 +1,57 @@
+"""
+Async message views for tieba project.
+"""
+
+from django.conf import settings
+from tieba.async_views import AsyncAPIView
+from tieba.pubsub import subscribe
+from .signals import unread_key
+from .views import message_stats_querysets
+
+
+async def message_stats(user):
+    """消息统计（异步查询）"""
+    return {
+        name: await queryset.acount()
+        for name, queryset in message_stats_querysets(user).items()
+    }
+
+
+class AsyncMessageStatsView(AsyncAPIView):
+    """消息统计（异步）"""
+
+    login_required = True
+    query_budget = 5
+
+    async def get(self, request):
+        return self.json(await message_stats(request.user))
+
+
+class AsyncUnreadPollView(AsyncAPIView):
+    """
+    未读数长轮询（不支持 WebSocket 的客户端使用）
+
+    客户端带上已知的统计值（字段同消息统计接口，如 ?unread_messages_count=3），
+    与当前值不同时立即返回；相同则挂起到未读数变化或超时（?timeout= 秒），再返回最新统计。
+    挂起期间不查询数据库。未带统计值时直接返回当前统计。
+    """
+
+    login_required = True
+    query_budget = 8
+
+    def get_timeout(self, request):
+        try:
+            timeout = float(request.GET.get('timeout', settings.UNREAD_POLL_TIMEOUT))
+        except ValueError:
+            timeout = settings.UNREAD_POLL_TIMEOUT
+        return min(max(timeout, 0), settings.UNREAD_POLL_TIMEOUT)
+
+    async def get(self, request):
+        # 先订阅再查询，查询后发生的变更同样会唤醒
+        with subscribe(unread_key(request.user.id)) as subscription:
+            stats = await message_stats(request.user)
+            known = {name: request.GET[name] for name in stats if name in request.GET}
+            unchanged = known and all(str(stats[name]) == value for name, value in known.items())
+            if unchanged and await subscription.wait(self.get_timeout(request)):
+                stats = await message_stats(request.user)
+        return self.json(stats)
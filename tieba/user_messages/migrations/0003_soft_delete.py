@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_messages', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='删除时间'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['user', '-created_at'], name='notification_live_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_deleted', False), ('is_read', False)), fields=['user'], name='notification_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_deleted', True)), fields=['deleted_at'], name='notification_purge_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:51
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('user_messages', '0003_soft_delete'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.PositiveIntegerField(unique=True, verbose_name='原主键')),
+                ('data', models.BinaryField(verbose_name='压缩数据')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='归档时间')),
+                ('created_at', models.DateTimeField(verbose_name='发送时间')),
+                ('receiver', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_received_messages', to=settings.AUTH_USER_MODEL, verbose_name='接收者')),
+                ('sender', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_sent_messages', to=settings.AUTH_USER_MODEL, verbose_name='发送者')),
+            ],
+            options={
+                'verbose_name': '归档私信',
+                'verbose_name_plural': '归档私信',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
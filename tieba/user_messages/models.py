@@ -4,6 +4,8 @@ User messages models for tieba project.
 
 from django.db import models
 from django.contrib.auth import get_user_model
+from tieba.archive import ArchivedModel
+from tieba.soft_delete import SoftDeleteModel
 
 User = get_user_model()
 
@@ -58,7 +60,7 @@ class Message(models.Model):
         return f'{self.sender} -> {self.receiver}: {self.content[:50]}'
 
 
-class Notification(models.Model):
+class Notification(SoftDeleteModel):
     """系统通知模型"""
     
     NOTIFICATION_TYPE_CHOICES = [
@@ -124,6 +126,24 @@ class Notification(models.Model):
         verbose_name = '系统通知'
         verbose_name_plural = '系统通知'
         ordering = ['-created_at']
+        indexes = [
+            # 通知列表与未读数只索引未删除的通知
+            models.Index(
+                fields=['user', '-created_at'],
+                condition=models.Q(is_deleted=False),
+                name='notification_live_idx'
+            ),
+            models.Index(
+                fields=['user'],
+                condition=models.Q(is_deleted=False, is_read=False),
+                name='notification_unread_idx'
+            ),
+            models.Index(
+                fields=['deleted_at'],
+                condition=models.Q(is_deleted=True),
+                name='notification_purge_idx'
+            ),
+        ]
     
     def __str__(self):
         return f'{self.user}: {self.title}'
@@ -202,4 +222,30 @@ class NotificationSettings(models.Model):
         verbose_name_plural = '通知设置'
     
     def __str__(self):
-        return f'{self.user} 的通知设置'
\ No newline at end of file
+        return f'{self.user} 的通知设置'
+
+
+class ArchivedMessage(ArchivedModel):
+    """归档私信（内容、状态等字段压缩存放在 data 中）"""
+    
+    sender = models.ForeignKey(
+        User, 
+        on_delete=models.CASCADE, 
+        related_name='archived_sent_messages',
+        verbose_name='发送者'
+    )
+    receiver = models.ForeignKey(
+        User, 
+        on_delete=models.CASCADE, 
+        related_name='archived_received_messages',
+        verbose_name='接收者'
+    )
+    created_at = models.DateTimeField(verbose_name='发送时间')
+    
+    class Meta:
+        verbose_name = '归档私信'
+        verbose_name_plural = '归档私信'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f'{self.sender_id} -> {self.receiver_id}'
@@ -2,24 +2,57 @@
 User messages serializers for tieba project.
 """
 
+from django.db.models import F
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Message, Notification, MessageSession, NotificationSettings
-from users.serializers import UserSerializer
+from tieba.sparse_fields import SparseFieldsMixin
+from tieba.uploads import check_upload_errors
+from .models import Message, Notification, MessageSession, NotificationSettings, ArchivedMessage
+from users.serializers import AuthorCardSerializer
 
 
-class MessageSerializer(serializers.ModelSerializer):
+class MessageSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """私信序列化器"""
     
-    sender_info = UserSerializer(source='sender', read_only=True)
-    receiver_info = UserSerializer(source='receiver', read_only=True)
+    sender_info = AuthorCardSerializer(source='sender', read_only=True)
+    receiver_info = AuthorCardSerializer(source='receiver', read_only=True)
     
     class Meta:
         model = Message
         fields = [
-            'id', 'session', 'sender', 'sender_info', 'receiver', 'receiver_info',
-            'content', 'message_type', 'is_read', 'created_at'
+            'id', 'sender', 'sender_info', 'receiver', 'receiver_info',
+            'message_type', 'content', 'image', 'is_read', 'created_at', 'read_at'
         ]
-        read_only_fields = ['id', 'created_at']
+        read_only_fields = ['id', 'sender', 'is_read', 'created_at', 'read_at']
+
+
+class ArchivedMessageSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """归档私信序列化器（输出与私信序列化器一致）"""
+    
+    id = serializers.IntegerField(source='original_id', read_only=True)
+    sender_info = AuthorCardSerializer(source='sender', read_only=True)
+    receiver_info = AuthorCardSerializer(source='receiver', read_only=True)
+    
+    class Meta:
+        model = ArchivedMessage
+        fields = ['id', 'sender', 'sender_info', 'receiver', 'receiver_info', 'created_at']
+        read_only_fields = fields
+    
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        payload = instance.payload
+        
+        read_at = Message._meta.get_field('read_at').to_python(payload['read_at'])
+        image_field = Message._meta.get_field('image')
+        data.update({
+            'message_type': payload['message_type'],
+            'content': payload['content'],
+            'image': image_field.storage.url(payload['image']) if payload['image'] else None,
+            'is_read': payload['is_read'],
+            'read_at': serializers.DateTimeField().to_representation(read_at) if read_at else None,
+            'is_archived': True,
+        })
+        return data
 
 
 class MessageCreateSerializer(serializers.ModelSerializer):
@@ -27,48 +60,50 @@ class MessageCreateSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Message
-        fields = ['receiver', 'content', 'message_type']
+        fields = ['receiver', 'content', 'message_type', 'image']
+    
+    def validate(self, attrs):
+        # 上传处理器拒绝的图片（格式不符或超过大小限制）
+        check_upload_errors(self.context.get('request'), 'image')
+        return attrs
     
     def create(self, validated_data):
         request = self.context.get('request')
-        receiver = validated_data['receiver']
-        
-        # 获取或创建会话
-        session = MessageSession.objects.filter(
-            participants=request.user
-        ).filter(
-            participants=receiver
-        ).first()
-        
-        if not session:
-            session = MessageSession.objects.create()
-            session.participants.add(request.user, receiver)
-        
         validated_data['sender'] = request.user
-        validated_data['session'] = session
+        message = super().create(validated_data)
         
-        return super().create(validated_data)
+        # 获取或创建会话（user1 为 id 较小的一方），更新最后消息和接收者未读数
+        user1_id, user2_id = sorted([message.sender_id, message.receiver_id])
+        session, _ = MessageSession.objects.get_or_create(user1_id=user1_id, user2_id=user2_id)
+        unread_field = 'unread_count_user1' if message.receiver_id == user1_id else 'unread_count_user2'
+        MessageSession.objects.filter(pk=session.pk).update(
+            last_message=message,
+            updated_at=timezone.now(),
+            **{unread_field: F(unread_field) + 1}
+        )
+        
+        return message
 
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """系统通知序列化器"""
     
-    sender_info = UserSerializer(source='sender', read_only=True)
+    related_user_info = AuthorCardSerializer(source='related_user', read_only=True)
     
     class Meta:
         model = Notification
         fields = [
-            'id', 'recipient', 'sender', 'sender_info', 'notification_type',
-            'title', 'content', 'related_object_type', 'related_object_id',
-            'is_read', 'created_at'
+            'id', 'user', 'related_user', 'related_user_info', 'notification_type',
+            'title', 'content', 'related_post', 'related_comment',
+            'is_read', 'read_at', 'created_at'
         ]
-        read_only_fields = ['id', 'created_at']
+        read_only_fields = ['id', 'user', 'read_at', 'created_at']
 
 
-class MessageSessionSerializer(serializers.ModelSerializer):
+class MessageSessionSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """消息会话序列化器"""
     
-    participants_info = UserSerializer(source='participants', many=True, read_only=True)
+    participants_info = AuthorCardSerializer(source='participants', many=True, read_only=True)
     last_message = serializers.SerializerMethodField()
     unread_count = serializers.SerializerMethodField()
     
@@ -116,25 +151,25 @@ class ConversationSerializer(serializers.Serializer):
     messages = MessageSerializer(many=True)
 
 
-class NotificationListSerializer(serializers.ModelSerializer):
+class NotificationListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """通知列表序列化器"""
     
-    sender_info = UserSerializer(source='sender', read_only=True)
+    related_user_info = AuthorCardSerializer(source='related_user', read_only=True)
     
     class Meta:
         model = Notification
         fields = [
-            'id', 'sender', 'sender_info', 'notification_type',
+            'id', 'related_user', 'related_user_info', 'notification_type',
             'title', 'content', 'is_read', 'created_at'
         ]
         read_only_fields = ['id', 'created_at']
 
 
-class MessageListSerializer(serializers.ModelSerializer):
+class MessageListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """消息列表序列化器"""
     
-    sender_info = UserSerializer(source='sender', read_only=True)
-    receiver_info = UserSerializer(source='receiver', read_only=True)
+    sender_info = AuthorCardSerializer(source='sender', read_only=True)
+    receiver_info = AuthorCardSerializer(source='receiver', read_only=True)
     
     class Meta:
         model = Message
@@ -0,0 +1,39 @@
+"""
+Signals for user_messages app.
+
+私信、通知的未读状态可能变化时（新建、标记已读、删除），通过进程内 pub/sub
+唤醒该用户挂起的未读数长轮询请求。queryset.update / bulk_create 不触发信号，
+相关调用处需自行调用 unread_changed。
+"""
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from tieba.pubsub import publish
+from tieba.soft_delete import soft_deleted
+from .models import Message, Notification
+
+
+def unread_key(user_id):
+    """用户未读数的订阅键"""
+    return f'unread:{user_id}'
+
+
+def unread_changed(*user_ids):
+    """用户的未读私信/通知数可能已变化"""
+    for user_id in set(user_ids):
+        publish(unread_key(user_id))
+
+
+@receiver(post_save, sender=Message)
+@receiver(post_delete, sender=Message)
+def message_changed(sender, instance, **kwargs):
+    """收到私信、私信已读或删除：通知接收者"""
+    unread_changed(instance.receiver_id)
+
+
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Notification)
+@receiver(soft_deleted, sender=Notification)
+def notification_changed(sender, instance, **kwargs):
+    """收到通知、通知已读或删除：通知接收者"""
+    unread_changed(instance.user_id)
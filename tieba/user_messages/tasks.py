@@ -0,0 +1,43 @@
+"""
+Background tasks for user_messages app.
+"""
+
+from posts.models import Comment
+from task_queue.registry import task
+from .models import Notification, NotificationSettings
+from .signals import unread_changed
+
+
+@task('user_messages.notify_reply', batch=True)
+def notify_reply(batch):
+    """
+    评论后通知帖子作者及被回复的用户（不通知自己，关闭了回复通知的用户跳过）
+
+    一批评论的通知一次写入
+    """
+    comments = Comment.objects.filter(
+        pk__in=[args['comment_id'] for args in batch]
+    ).select_related('post').order_by('pk')
+
+    pending = []
+    for comment in comments:
+        recipients = {comment.post.author_id, comment.reply_to_id} - {comment.author_id, None}
+        for user_id in recipients:
+            is_reply_to_me = user_id == comment.reply_to_id
+            pending.append(Notification(
+                user_id=user_id,
+                notification_type='reply',
+                title='回复了你的评论' if is_reply_to_me else '回复了你的帖子',
+                content=comment.content[:200],
+                related_post_id=comment.post_id,
+                related_comment=comment,
+                related_user_id=comment.author_id,
+            ))
+
+    muted = set(NotificationSettings.objects.filter(
+        user_id__in={notification.user_id for notification in pending}, notify_on_reply=False
+    ).values_list('user_id', flat=True))
+    created = Notification.objects.bulk_create(
+        [notification for notification in pending if notification.user_id not in muted]
+    )
+    unread_changed(*[notification.user_id for notification in created])
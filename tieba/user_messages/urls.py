@@ -5,6 +5,7 @@ URL configuration for user_messages app.
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from . import views
+from .async_views import AsyncMessageStatsView, AsyncUnreadPollView
 
 router = DefaultRouter()
 router.register(r'messages', views.MessageViewSet, basename='message')
@@ -18,6 +19,8 @@ urlpatterns = [
     
     # 统计信息
     path('stats/', views.MessageStatsView.as_view(), name='message-stats'),
+    path('async/stats/', AsyncMessageStatsView.as_view(), name='async-message-stats'),
+    path('async/stats/poll/', AsyncUnreadPollView.as_view(), name='async-unread-poll'),
     
     # 包含视图集路由
     path('', include(router.urls)),
@@ -3,21 +3,40 @@ User messages views for tieba project.
 """
 
 from django.db.models import Q
+from django.http import Http404
+from django.utils import timezone
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from .models import Message, Notification, MessageSession, NotificationSettings
+from .models import Message, Notification, MessageSession, NotificationSettings, ArchivedMessage
+from tieba.sparse_fields import FieldSelection, load_related
+from users.serializers import author_card_prefetch
+from .signals import unread_changed
 from .serializers import (
-    MessageSerializer, MessageCreateSerializer, NotificationSerializer,
+    MessageSerializer, ArchivedMessageSerializer, MessageCreateSerializer, NotificationSerializer,
     MessageSessionSerializer, NotificationSettingsSerializer,
     ConversationSerializer, NotificationListSerializer, MessageListSerializer
 )
 
 
+def message_stats_querysets(user):
+    """消息统计的各项查询（同步、异步接口共用）"""
+    return {
+        # 未读私信数量
+        'unread_messages_count': Message.objects.filter(receiver=user, is_read=False),
+        # 未读通知数量
+        'unread_notifications_count': Notification.objects.filter(user=user, is_read=False),
+        # 会话数量
+        'sessions_count': MessageSession.objects.filter(Q(user1=user) | Q(user2=user)),
+    }
+
+
 class MessageViewSet(viewsets.ModelViewSet):
     """私信视图集"""
     
+    query_budget = {'list': 6, 'retrieve': 6}
+    
     queryset = Message.objects.all()
     permission_classes = [permissions.IsAuthenticated]
     
@@ -28,9 +47,28 @@ class MessageViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         # 用户只能看到自己发送或接收的消息
-        return self.queryset.filter(
+        queryset = self.queryset.filter(
             Q(sender=self.request.user) | Q(receiver=self.request.user)
-        ).order_by('-created_at')
+        )
+        return load_related(queryset, FieldSelection.from_request(self.request), prefetch={
+            'sender_info': author_card_prefetch('sender'),
+            'receiver_info': author_card_prefetch('receiver'),
+        }).order_by('-created_at')
+    
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            # 热表中没有时回退读取归档私信
+            try:
+                archived = ArchivedMessage.objects.filter(
+                    Q(sender=request.user) | Q(receiver=request.user)
+                ).prefetch_related(
+                    author_card_prefetch('sender'), author_card_prefetch('receiver')
+                ).get(original_id=int(kwargs['pk']))
+            except (ValueError, ArchivedMessage.DoesNotExist):
+                raise Http404
+            return Response(ArchivedMessageSerializer(archived).data)
     
     @action(detail=True, methods=['post'])
     def mark_read(self, request, pk=None):
@@ -53,6 +91,7 @@ class MessageViewSet(viewsets.ModelViewSet):
     def mark_all_read(self, request):
         """标记所有消息为已读"""
         Message.objects.filter(receiver=request.user, is_read=False).update(is_read=True)
+        unread_changed(request.user.id)
         return Response({'message': '所有消息已标记为已读'})
 
 
@@ -83,7 +122,8 @@ class MessageSessionViewSet(viewsets.ModelViewSet):
         serializer = MessageListSerializer(messages, many=True)
         
         # 标记会话中的未读消息为已读
-        session.messages.filter(receiver=request.user, is_read=False).update(is_read=True)
+        if session.messages.filter(receiver=request.user, is_read=False).update(is_read=True):
+            unread_changed(request.user.id)
         
         return Response(serializer.data)
     
@@ -135,7 +175,10 @@ class NotificationViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         # 用户只能看到自己的通知
-        return self.queryset.filter(recipient=self.request.user).order_by('-created_at')
+        queryset = self.queryset.filter(user=self.request.user)
+        return load_related(queryset, FieldSelection.from_request(self.request), prefetch={
+            'related_user_info': author_card_prefetch('related_user'),
+        }).order_by('-created_at')
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -147,14 +190,15 @@ class NotificationViewSet(viewsets.ModelViewSet):
         """标记通知为已读"""
         notification = self.get_object()
         
-        if notification.recipient != request.user:
+        if notification.user_id != request.user.id:
             return Response(
                 {'error': '没有权限操作此通知'},
                 status=status.HTTP_403_FORBIDDEN
             )
         
         notification.is_read = True
-        notification.save()
+        notification.read_at = timezone.now()
+        notification.save(update_fields=['is_read', 'read_at'])
         
         serializer = self.get_serializer(notification)
         return Response(serializer.data)
@@ -162,16 +206,23 @@ class NotificationViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def mark_all_read(self, request):
         """标记所有通知为已读"""
-        Notification.objects.filter(recipient=request.user, is_read=False).update(is_read=True)
+        Notification.objects.filter(user=request.user, is_read=False).update(
+            is_read=True, read_at=timezone.now()
+        )
+        unread_changed(request.user.id)
         return Response({'message': '所有通知已标记为已读'})
     
     @action(detail=False, methods=['get'])
     def unread_count(self, request):
         """获取未读通知数量"""
         count = Notification.objects.filter(
-            recipient=request.user, is_read=False
+            user=request.user, is_read=False
         ).count()
         return Response({'unread_count': count})
+    
+    def perform_destroy(self, instance):
+        # 软删除，超过保留期后由 purge_soft_deleted 物理删除
+        instance.soft_delete()
 
 
 class NotificationSettingsViewSet(viewsets.ModelViewSet):
@@ -230,7 +281,8 @@ class ConversationView(APIView):
         messages_serializer = MessageListSerializer(messages, many=True)
         
         # 标记未读消息为已读
-        session.messages.filter(receiver=request.user, is_read=False).update(is_read=True)
+        if session.messages.filter(receiver=request.user, is_read=False).update(is_read=True):
+            unread_changed(request.user.id)
         
         return Response({
             'session': session_serializer.data,
@@ -245,21 +297,6 @@ class MessageStatsView(APIView):
     
     def get(self, request):
         """获取消息统计信息"""
-        # 未读私信数量
-        unread_messages_count = Message.objects.filter(
-            receiver=request.user, is_read=False
-        ).count()
-        
-        # 未读通知数量
-        unread_notifications_count = Notification.objects.filter(
-            recipient=request.user, is_read=False
-        ).count()
-        
-        # 会话数量
-        sessions_count = MessageSession.objects.filter(participants=request.user).count()
-        
         return Response({
-            'unread_messages_count': unread_messages_count,
-            'unread_notifications_count': unread_notifications_count,
-            'sessions_count': sessions_count
-        })
\ No newline at end of file
+            name: queryset.count() for name, queryset in message_stats_querysets(request.user).items()
+        })
@@ -4,7 +4,7 @@ Admin configuration for users app.
 
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User, UserFollow
+from .models import User, UserDataJob, UserFollow
 
 
 @admin.register(User)
@@ -48,4 +48,18 @@ class UserFollowAdmin(admin.ModelAdmin):
     ordering = ['-created_at']
     
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related('follower', 'following')
\ No newline at end of file
+        return super().get_queryset(request).select_related('follower', 'following')
+
+
+@admin.register(UserDataJob)
+class UserDataJobAdmin(admin.ModelAdmin):
+    """用户数据作业管理"""
+    
+    list_display = ['username', 'kind', 'status', 'stage', 'processed', 'total', 'created_at', 'finished_at']
+    list_filter = ['kind', 'status']
+    search_fields = ['username']
+    ordering = ['-created_at']
+    readonly_fields = [
+        'user', 'username', 'kind', 'sections', 'stage', 'cursor', 'processed', 'total',
+        'file_name', 'file_size', 'failures', 'error', 'created_at', 'finished_at'
+    ]
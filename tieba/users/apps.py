@@ -0,0 +1,15 @@
+"""
+App configuration for users app.
+"""
+
+from django.apps import AppConfig
+
+
+class UsersConfig(AppConfig):
+    """用户应用配置"""
+    
+    name = 'users'
+    verbose_name = '用户'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,89 @@
+"""
+Account deletion for tieba project.
+
+删除账号时不直接 user.delete()（级联删除帖子、评论、点赞、私信、通知等会在一个大事务中
+执行很久并长时间锁表），而是由后台作业按步骤分批删除关联数据：每次任务删除当前步骤的一批
+（ACCOUNT_DELETE_CHUNK_SIZE 行，连同其级联数据）后提交并投递下一批，最后删除用户本身。
+
+步骤按先子后父排列，删除帖子时其评论已经删完，每批的级联删除都很小；
+显式步骤之后再按模型关系补充其余级联删除到用户的数据，新增的关联模型无需改动这里。
+逐行删除会触发信号，其他用户、贴吧的计数随之更新（与直接删除用户一致）。
+"""
+
+from django.conf import settings
+from django.db.models import CASCADE, Q
+from posts.models import Comment, CommentLike, Post, PostCollection, PostLike
+from user_messages.models import Message, Notification
+from .models import User, UserDataJob, UserFollow
+
+# 显式删除步骤：(步骤名, 返回待删除查询集的函数)，含已软删除的数据
+DELETION_STEPS = [
+    ('export_jobs', lambda user: UserDataJob.objects.filter(user=user, kind=UserDataJob.KIND_EXPORT)),
+    ('notifications', lambda user: Notification.all_objects.filter(Q(user=user) | Q(related_user=user))),
+    ('messages', lambda user: Message.objects.filter(Q(sender=user) | Q(receiver=user))),
+    ('comment_likes', lambda user: CommentLike.objects.filter(user=user)),
+    ('post_likes', lambda user: PostLike.objects.filter(user=user)),
+    ('collections', lambda user: PostCollection.objects.filter(user=user)),
+    # 用户创建的贴吧随用户删除，先删除其中的评论和帖子
+    ('tieba_comments', lambda user: Comment.all_objects.filter(post__tieba__creator=user)),
+    ('tieba_posts', lambda user: Post.all_objects.filter(tieba__creator=user)),
+    ('post_comments', lambda user: Comment.all_objects.filter(post__author=user)),
+    ('comments', lambda user: Comment.all_objects.filter(author=user)),
+    ('posts', lambda user: Post.all_objects.filter(author=user)),
+    ('follows', lambda user: UserFollow.objects.filter(Q(follower=user) | Q(following=user))),
+]
+
+
+def cascade_steps():
+    """其余级联删除到用户的关联（步骤名为 模型.字段）"""
+    steps = []
+    for relation in User._meta.related_objects:
+        if relation.many_to_many or relation.on_delete is not CASCADE:
+            continue
+        model, field_name = relation.related_model, relation.field.name
+        steps.append((
+            f'{model._meta.label_lower}.{field_name}',
+            lambda user, model=model, field_name=field_name: model._base_manager.filter(**{field_name: user})
+        ))
+    return steps
+
+
+def deletion_steps():
+    return DELETION_STEPS + cascade_steps()
+
+
+def start_deletion(job):
+    """开始删除作业：统计各步骤的总行数（步骤之间有重叠，只用于显示进度）"""
+    steps = deletion_steps()
+    job.total = sum(get_queryset(job.user).count() for _, get_queryset in steps) + 1
+    job.stage = steps[0][0]
+    job.cursor = 0
+
+
+def delete_chunk(job):
+    """删除当前步骤的一批数据，当前步骤删完时进入下一步骤，全部删完后删除用户。返回作业是否已完成"""
+    chunk_size = settings.ACCOUNT_DELETE_CHUNK_SIZE
+    steps = deletion_steps()
+    names = [name for name, _ in steps]
+    # 步骤不存在（关联模型已移除）时从头检查，已删完的步骤只多一次查询
+    index = names.index(job.stage) if job.stage in names else 0
+    queryset = steps[index][1](job.user)
+
+    pks = list(queryset.order_by('pk').values_list('pk', flat=True)[:chunk_size])
+    if pks:
+        queryset.model._base_manager.filter(pk__in=pks).delete()
+        job.processed += len(pks)
+    if len(pks) == chunk_size:
+        return False
+
+    if index + 1 < len(steps):
+        job.stage = names[index + 1]
+        return False
+
+    # 关联数据已删完，删除用户本身（多对多关联等剩余数据很少）
+    user = job.user
+    job.user = None
+    job.stage = 'user'
+    user.delete()
+    job.processed = job.total
+    return True
@@ -0,0 +1,207 @@
+"""
+User data export for tieba project.
+
+用户数据导出为 JSON Lines：每行一个对象 {"type": 类型, "data": 数据}，
+按分区（资料、帖子、评论、收藏、私信）依次输出，数据格式与对应的 API 一致。
+
+两种导出方式共用各分区的查询和序列化：
+- 流式下载：查询集用 .iterator(chunk_size=EXPORT_CHUNK_SIZE) 分批读取（预取同样按批执行），
+  逐行生成输出，内存占用与导出的数据量无关；ASGI 下使用异步迭代器逐块在线程中生成
+  （同步迭代器会被 Django 先整个读入列表再发送）；
+- 后台作业：每次任务按主键顺序导出一批（EXPORT_CHUNK_SIZE 行）追加到导出文件，
+  记录分区和主键游标后投递下一批，进度可查询，完成后从导出目录下载。
+"""
+
+import os
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from posts.models import Comment, CommentLike, Post, PostCollection, PostLike
+from posts.serializers import CommentSerializer, PostCollectionSerializer, PostSerializer
+from posts.views import with_viewer_flags
+from tieba.renderers import dumps
+from user_messages.models import Message
+from user_messages.serializers import MessageSerializer
+from .models import User
+from .serializers import UserSerializer, author_card_prefetch
+
+# 流式响应每块的大致字节数（逐行写出时块太小，网络和压缩开销大）
+STREAM_CHUNK_BYTES = 64 * 1024
+
+# 导出文件不放在 MEDIA_ROOT 下，只能经登录后的下载接口获取
+export_storage = FileSystemStorage(location=settings.EXPORT_ROOT)
+
+
+class ExportSection:
+    """一个导出分区：按主键排序的查询集及其序列化方式"""
+
+    def __init__(self, kind, get_queryset, serializer_class, prepare=None):
+        self.kind = kind
+        self.get_queryset = get_queryset
+        self.serializer_class = serializer_class
+        # 序列化前对每个对象的处理（如设置嵌套对象的标记）
+        self.prepare = prepare
+
+    def queryset(self, user):
+        return self.get_queryset(user).order_by('pk')
+
+    def rows(self, objects):
+        """逐个产出 (主键, 输出数据)"""
+        serializer = self.serializer_class(context={})
+        for obj in objects:
+            if self.prepare is not None:
+                self.prepare(obj)
+            yield obj.pk, serializer.to_representation(obj)
+
+
+def posts_queryset(user):
+    """用户发表的帖子（含未发布的，不含已删除的）"""
+    return with_viewer_flags(Post.objects.filter(author=user), user).select_related(
+        'tieba__category'
+    ).prefetch_related(author_card_prefetch('author'), 'images')
+
+
+def comments_queryset(user):
+    """用户发表的评论（不含已删除的）"""
+    return Comment.objects.filter(author=user).prefetch_related(author_card_prefetch('author')).annotate(
+        is_liked_by_me=Exists(CommentLike.objects.filter(comment=OuterRef('pk'), user=user))
+    )
+
+
+def collections_queryset(user):
+    """用户收藏的帖子"""
+    return PostCollection.objects.filter(user=user, post__is_deleted=False).select_related(
+        'post__tieba__category'
+    ).prefetch_related(
+        author_card_prefetch('user'), author_card_prefetch('post__author'), 'post__images'
+    ).annotate(
+        post_liked=Exists(PostLike.objects.filter(post=OuterRef('post'), user=user))
+    )
+
+
+def prepare_collection(collection):
+    # 嵌套帖子的点赞、收藏标记随查询取出，不逐行查询
+    collection.post.is_liked_by_me = collection.post_liked
+    collection.post.is_collected_by_me = True
+
+
+def messages_queryset(user):
+    """用户发送和接收的私信"""
+    return Message.objects.filter(Q(sender=user) | Q(receiver=user)).prefetch_related(
+        author_card_prefetch('sender'), author_card_prefetch('receiver')
+    )
+
+
+# 可导出的分区，按输出顺序
+EXPORT_SECTIONS = {
+    'profile': ExportSection('profile', lambda user: User.objects.filter(pk=user.pk), UserSerializer),
+    'posts': ExportSection('post', posts_queryset, PostSerializer),
+    'comments': ExportSection('comment', comments_queryset, CommentSerializer),
+    'collections': ExportSection(
+        'collection', collections_queryset, PostCollectionSerializer, prepare=prepare_collection
+    ),
+    'messages': ExportSection('message', messages_queryset, MessageSerializer),
+}
+
+
+def parse_sections(value):
+    """解析分区名（逗号分隔的字符串或列表），未指定时导出全部；有未知分区时抛出 ValueError"""
+    if not value:
+        return list(EXPORT_SECTIONS)
+    if isinstance(value, (list, tuple)):
+        value = ','.join(str(name) for name in value)
+    sections = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in sections if name not in EXPORT_SECTIONS]
+    if unknown:
+        raise ValueError(f"未知的导出分区: {', '.join(unknown)}")
+    return sections
+
+
+def export_line(kind, data):
+    return dumps({'type': kind, 'data': data}) + b'\n'
+
+
+def export_lines(user, sections=None):
+    """逐行生成导出内容（bytes，每行以换行结尾）"""
+    for name in sections or EXPORT_SECTIONS:
+        section = EXPORT_SECTIONS[name]
+        objects = section.queryset(user).iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+        for _, data in section.rows(objects):
+            yield export_line(section.kind, data)
+
+
+def export_chunks(user, sections=None):
+    """把导出的行合并成约 STREAM_CHUNK_BYTES 大小的块，用于流式响应"""
+    buffer, size = [], 0
+    for line in export_lines(user, sections):
+        buffer.append(line)
+        size += len(line)
+        if size >= STREAM_CHUNK_BYTES:
+            yield b''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+async def aexport_chunks(user, sections=None):
+    """export_chunks 的异步版本，用于 ASGI 下的流式响应：每块在同步线程中生成，事件循环中不执行查询"""
+    chunks = export_chunks(user, sections)
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    try:
+        while True:
+            chunk = await next_chunk(chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        # 客户端中途断开时关闭同步生成器，释放查询游标
+        await sync_to_async(chunks.close, thread_sensitive=True)()
+
+
+def start_export(job):
+    """开始导出作业：统计总行数，创建空的导出文件"""
+    user = job.user
+    job.total = sum(EXPORT_SECTIONS[name].queryset(user).count() for name in job.sections)
+    job.stage = job.sections[0]
+    job.cursor = 0
+    job.file_name = f'{user.pk}/export-{job.pk}-{timezone.now():%Y%m%d%H%M%S}.jsonl'
+    path = export_storage.path(job.file_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'wb').close()
+    job.file_size = 0
+
+
+def export_chunk(job):
+    """
+    导出一批：从当前分区的游标之后取 EXPORT_CHUNK_SIZE 行追加到导出文件
+
+    文件先截断到上次记录的长度，失败重试的批次不会重复写入。返回作业是否已完成
+    """
+    chunk_size = settings.EXPORT_CHUNK_SIZE
+    section = EXPORT_SECTIONS[job.stage]
+    objects = list(section.queryset(job.user).filter(pk__gt=job.cursor)[:chunk_size])
+
+    with open(export_storage.path(job.file_name), 'r+b') as f:
+        f.truncate(job.file_size)
+        f.seek(job.file_size)
+        for pk, data in section.rows(objects):
+            f.write(export_line(section.kind, data))
+            job.cursor = pk
+        job.file_size = f.tell()
+    job.processed += len(objects)
+
+    if len(objects) < chunk_size:
+        # 本分区已导出完，进入下一分区
+        index = job.sections.index(job.stage) + 1
+        if index == len(job.sections):
+            return True
+        job.stage = job.sections[index]
+        job.cursor = 0
+    return False
+
+
+def delete_export_file(job):
+    if job.file_name:
+        export_storage.delete(job.file_name)
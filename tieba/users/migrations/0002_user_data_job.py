@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:16
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserDataJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('username', models.CharField(max_length=150, verbose_name='用户名')),
+                ('kind', models.CharField(choices=[('export', '数据导出'), ('delete', '账号删除')], max_length=10, verbose_name='作业类型')),
+                ('status', models.CharField(choices=[('pending', '等待执行'), ('running', '执行中'), ('done', '已完成'), ('failed', '失败')], default='pending', max_length=10, verbose_name='状态')),
+                ('sections', models.JSONField(blank=True, default=list, verbose_name='导出分区')),
+                ('stage', models.CharField(blank=True, max_length=100, verbose_name='当前步骤')),
+                ('cursor', models.BigIntegerField(default=0, verbose_name='步骤内游标')),
+                ('processed', models.PositiveIntegerField(default=0, verbose_name='已处理行数')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='总行数')),
+                ('file_name', models.CharField(blank=True, max_length=200, verbose_name='导出文件')),
+                ('file_size', models.PositiveBigIntegerField(default=0, verbose_name='文件大小')),
+                ('failures', models.PositiveSmallIntegerField(default=0, verbose_name='失败次数')),
+                ('error', models.TextField(blank=True, verbose_name='错误信息')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='完成时间')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='data_jobs', to=settings.AUTH_USER_MODEL, verbose_name='用户')),
+            ],
+            options={
+                'verbose_name': '用户数据作业',
+                'verbose_name_plural': '用户数据作业',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', 'kind', 'status'], name='users_data_job_user_idx')],
+            },
+        ),
+    ]
@@ -84,4 +84,88 @@ class UserFollow(models.Model):
         unique_together = ('follower', 'following')
     
     def __str__(self):
-        return f'{self.follower} 关注 {self.following}'
\ No newline at end of file
+        return f'{self.follower} 关注 {self.following}'
+
+
+class UserDataJob(models.Model):
+    """用户数据导出、账号删除的后台作业（由后台任务分批执行，记录进度）"""
+    
+    KIND_EXPORT = 'export'
+    KIND_DELETE = 'delete'
+    KIND_CHOICES = [
+        (KIND_EXPORT, '数据导出'),
+        (KIND_DELETE, '账号删除'),
+    ]
+    
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, '等待执行'),
+        (STATUS_RUNNING, '执行中'),
+        (STATUS_DONE, '已完成'),
+        (STATUS_FAILED, '失败'),
+    ]
+    
+    # 账号删除完成后用户为空，保留用户名便于查询
+    user = models.ForeignKey(
+        User, 
+        on_delete=models.SET_NULL, 
+        null=True, 
+        blank=True,
+        related_name='data_jobs',
+        verbose_name='用户'
+    )
+    username = models.CharField(max_length=150, verbose_name='用户名')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, verbose_name='作业类型')
+    status = models.CharField(
+        max_length=10, 
+        choices=STATUS_CHOICES, 
+        default=STATUS_PENDING,
+        verbose_name='状态'
+    )
+    
+    # 执行进度：当前步骤（导出分区 / 删除步骤）、步骤内已处理到的主键、已处理行数 / 总行数
+    sections = models.JSONField(default=list, blank=True, verbose_name='导出分区')
+    stage = models.CharField(max_length=100, blank=True, verbose_name='当前步骤')
+    cursor = models.BigIntegerField(default=0, verbose_name='步骤内游标')
+    processed = models.PositiveIntegerField(default=0, verbose_name='已处理行数')
+    total = models.PositiveIntegerField(default=0, verbose_name='总行数')
+    
+    # 导出文件（导出目录中的相对路径）及已写入的字节数，任务重试时截断到该长度
+    file_name = models.CharField(max_length=200, blank=True, verbose_name='导出文件')
+    file_size = models.PositiveBigIntegerField(default=0, verbose_name='文件大小')
+    
+    # 批次失败次数（失败的批次回滚后延迟重试，达到上限后作业失败）
+    failures = models.PositiveSmallIntegerField(default=0, verbose_name='失败次数')
+    error = models.TextField(blank=True, verbose_name='错误信息')
+    
+    # 时间戳
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='完成时间')
+    
+    class Meta:
+        verbose_name = '用户数据作业'
+        verbose_name_plural = '用户数据作业'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'kind', 'status'], name='users_data_job_user_idx'),
+        ]
+    
+    def __str__(self):
+        return f'{self.username} {self.get_kind_display()} ({self.get_status_display()})'
+    
+    @property
+    def is_active(self):
+        return self.status in (self.STATUS_PENDING, self.STATUS_RUNNING)
+    
+    @property
+    def progress(self):
+        """完成百分比"""
+        if self.status == self.STATUS_DONE:
+            return 100
+        if not self.total:
+            return 0
+        return min(99, self.processed * 100 // self.total)
@@ -4,9 +4,11 @@ User serializers for tieba project.
 
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
+from django.db.models import Prefetch
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
-from .models import User
+from tieba.sparse_fields import SparseFieldsMixin
+from .models import User, UserDataJob
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -78,7 +80,7 @@ class UserLoginSerializer(serializers.Serializer):
         return attrs
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """用户信息序列化器"""
     
     class Meta:
@@ -98,19 +100,62 @@ class UserSerializer(serializers.ModelSerializer):
     def to_representation(self, instance):
         data = super().to_representation(instance)
         
-        # 处理头像URL
-        if instance.avatar:
-            data['avatar'] = instance.avatar.url
-        else:
-            data['avatar'] = None
+        # 处理头像URL（按 ?fields= 裁剪后可能不含这些字段）
+        if 'avatar' in data:
+            data['avatar'] = instance.avatar.url if instance.avatar else None
         
         # 处理日期格式
-        if instance.birthday:
+        if instance.birthday and 'birthday' in data:
             data['birthday'] = instance.birthday.strftime('%Y-%m-%d')
         
         return data
 
 
+class AuthorCardSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """用户卡片序列化器（嵌套在帖子、评论、消息等位置使用）"""
+    
+    class Meta:
+        model = User
+        fields = [
+            'id', 'username', 'nickname', 'avatar',
+            'followers_count', 'following_count', 'posts_count', 'likes_count'
+        ]
+        read_only_fields = fields
+    
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        
+        # 处理头像URL
+        if 'avatar' in data:
+            data['avatar'] = instance.avatar.url if instance.avatar else None
+        
+        return data
+
+
+def author_card_prefetch(lookup, queryset=None):
+    """
+    预取关联用户，只查询卡片需要的列
+    
+    lookup 为关联路径，例如 'author'、'sender'、'post__author'
+    """
+    if queryset is None:
+        queryset = User.objects.all()
+    return Prefetch(lookup, queryset=queryset.only(*AuthorCardSerializer.Meta.fields))
+
+
+# 用户卡片内容的版本列（资料修改刷新 updated_at，计数字段单独变化）
+AUTHOR_CARD_VERSION_FIELDS = ['updated_at', 'followers_count', 'following_count', 'posts_count', 'likes_count']
+
+
+def author_card_version(lookup):
+    """
+    关联用户卡片的版本列，用于条件请求计算 ETag
+    
+    lookup 为关联路径，例如 'author'、'creator'
+    """
+    return [f'{lookup}__{field}' for field in AUTHOR_CARD_VERSION_FIELDS]
+
+
 class UserProfileUpdateSerializer(serializers.ModelSerializer):
     """用户资料更新序列化器"""
     
@@ -159,9 +204,23 @@ class UserPasswordChangeSerializer(serializers.Serializer):
 class UserFollowSerializer(serializers.ModelSerializer):
     """用户关注序列化器"""
     
-    follower = UserSerializer(read_only=True)
-    following = UserSerializer(read_only=True)
+    follower = AuthorCardSerializer(read_only=True)
+    following = AuthorCardSerializer(read_only=True)
     
     class Meta:
         model = User
-        fields = ['follower', 'following', 'created_at']
\ No newline at end of file
+        fields = ['follower', 'following', 'created_at']
+
+
+class UserDataJobSerializer(serializers.ModelSerializer):
+    """用户数据作业（导出、账号删除）进度序列化器"""
+    
+    progress = serializers.IntegerField(read_only=True)
+    
+    class Meta:
+        model = UserDataJob
+        fields = [
+            'id', 'kind', 'status', 'sections', 'stage', 'processed', 'total', 'progress',
+            'file_size', 'created_at', 'finished_at'
+        ]
+        read_only_fields = fields
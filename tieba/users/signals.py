@@ -0,0 +1,33 @@
+"""
+Signal handlers for users app.
+
+维护关注数、粉丝数统计字段；删除导出作业时删除其导出文件。
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from tieba.counters import adjust_counter
+from .exports import delete_export_file
+from .models import User, UserDataJob, UserFollow
+
+
+@receiver(post_save, sender=UserFollow)
+def user_followed(sender, instance, created, **kwargs):
+    """关注：关注者的关注数、被关注者的粉丝数 +1"""
+    if created:
+        adjust_counter(User.objects.filter(pk=instance.follower_id), 'following_count', 1)
+        adjust_counter(User.objects.filter(pk=instance.following_id), 'followers_count', 1)
+
+
+@receiver(post_delete, sender=UserFollow)
+def user_unfollowed(sender, instance, **kwargs):
+    """取消关注：关注者的关注数、被关注者的粉丝数 -1"""
+    adjust_counter(User.objects.filter(pk=instance.follower_id), 'following_count', -1)
+    adjust_counter(User.objects.filter(pk=instance.following_id), 'followers_count', -1)
+
+
+@receiver(post_delete, sender=UserDataJob)
+def data_job_deleted(sender, instance, **kwargs):
+    """导出作业删除：事务提交后删除导出文件"""
+    transaction.on_commit(lambda: delete_export_file(instance))
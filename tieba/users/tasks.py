@@ -0,0 +1,75 @@
+"""
+Background tasks for users app.
+"""
+
+import logging
+import traceback
+from django.db import transaction
+from django.utils import timezone
+from task_queue.models import Task
+from task_queue.registry import enqueue, task
+from task_queue.worker import retry_delay
+from .deletion import delete_chunk, start_deletion
+from .exports import export_chunk, start_export
+from .models import UserDataJob
+
+logger = logging.getLogger(__name__)
+
+# 作业类型 -> (开始时的准备, 执行一批)
+JOB_HANDLERS = {
+    UserDataJob.KIND_EXPORT: (start_export, export_chunk),
+    UserDataJob.KIND_DELETE: (start_deletion, delete_chunk),
+}
+
+# 批次连续失败达到该次数后作业失败
+DATA_JOB_MAX_FAILURES = 5
+
+
+def enqueue_data_job(job, delay=0):
+    """投递作业的下一批（同一作业同时只有一个等待执行的任务）"""
+    enqueue(
+        'users.run_data_job', {'job_id': job.pk},
+        delay=delay, unique_key=f'users.run_data_job:{job.pk}'
+    )
+
+
+@task('users.run_data_job', priority=Task.PRIORITY_LOW)
+def run_data_job(job_id):
+    """
+    执行用户数据作业的一批，未完成时投递下一批
+
+    worker 对非批量任务逐个开事务，每批与其进度在本任务的事务中提交，不与同时领取的
+    其他作业共用事务；批次失败时只回滚该批（保存点），失败次数、错误和重新投递的任务
+    随本任务提交，按退避间隔从上次提交的进度继续
+    """
+    job = UserDataJob.objects.select_related('user').filter(pk=job_id).first()
+    if job is None or not job.is_active:
+        return
+
+    start, run_chunk = JOB_HANDLERS[job.kind]
+    try:
+        with transaction.atomic():
+            if job.status == UserDataJob.STATUS_PENDING:
+                start(job)
+                job.status = UserDataJob.STATUS_RUNNING
+            done = run_chunk(job)
+    except Exception:
+        logger.exception('用户数据作业 %s 执行失败', job_id)
+        job.refresh_from_db()
+        job.failures += 1
+        job.error = traceback.format_exc()
+        if job.failures >= DATA_JOB_MAX_FAILURES:
+            job.status = UserDataJob.STATUS_FAILED
+            job.finished_at = timezone.now()
+        else:
+            enqueue_data_job(job, delay=retry_delay(job.failures))
+        job.save()
+        return
+
+    job.failures = 0
+    if done:
+        job.status = UserDataJob.STATUS_DONE
+        job.finished_at = timezone.now()
+    else:
+        enqueue_data_job(job)
+    job.save()
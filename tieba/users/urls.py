@@ -19,6 +19,10 @@ urlpatterns = [
     path('profile/', views.UserProfileView.as_view(), name='user-profile'),
     path('profile/update/', views.UserProfileView.as_view(), name='user-profile-update'),
     path('password/change/', views.UserPasswordChangeView.as_view(), name='user-password-change'),
+    path('export/', views.UserExportView.as_view(), name='user-export'),
+    path('export/jobs/', views.DataExportJobView.as_view(), name='user-export-jobs'),
+    path('export/jobs/<int:job_id>/', views.DataExportJobDetailView.as_view(), name='user-export-job-detail'),
+    path('account/delete/', views.AccountDeletionView.as_view(), name='user-account-delete'),
     
     # 用户搜索
     path('search/', views.UserSearchView.as_view(), name='user-search'),
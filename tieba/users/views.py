@@ -4,15 +4,28 @@ User views for tieba project.
 
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import F, Q
+from django.http import FileResponse, StreamingHttpResponse
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework import status, viewsets, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from .models import User, UserFollow
-from .serializers import UserSerializer, UserRegistrationSerializer, UserLoginSerializer
+from tieba.compiled import CompiledListMixin, CompiledSerializer
+from tieba.conditional import ConditionalRetrieveMixin
+from .exports import aexport_chunks, export_chunks, export_storage, parse_sections
+from .models import User, UserDataJob, UserFollow
+from .serializers import (
+    AUTHOR_CARD_VERSION_FIELDS, UserSerializer, UserRegistrationSerializer, UserLoginSerializer,
+    UserDataJobSerializer
+)
+from .tasks import enqueue_data_job
+
+# 用户列表的编译序列化器（输出与 UserSerializer 一致）
+compiled_users = CompiledSerializer(UserSerializer)
 
 
 class UserRegistrationView(APIView):
@@ -146,13 +159,8 @@ class UserFollowView(APIView):
             following=target_user
         )
         
+        # 关注数、粉丝数由信号维护
         if created:
-            # 更新关注数
-            request.user.following_count += 1
-            target_user.followers_count += 1
-            request.user.save()
-            target_user.save()
-            
             return Response({
                 'success': True,
                 'message': '关注成功',
@@ -162,12 +170,6 @@ class UserFollowView(APIView):
             # 取消关注
             follow.delete()
             
-            # 更新关注数
-            request.user.following_count -= 1
-            target_user.followers_count -= 1
-            request.user.save()
-            target_user.save()
-            
             return Response({
                 'success': True,
                 'message': '取消关注成功',
@@ -198,13 +200,158 @@ class UserSearchView(APIView):
         })
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserExportView(APIView):
+    """
+    导出当前用户的数据（JSON Lines 流式下载）
+    
+    ?sections=posts,messages 只导出指定分区，默认导出全部（profile/posts/comments/collections/messages）
+    """
+    
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        try:
+            sections = parse_sections(request.query_params.get('sections'))
+        except ValueError as exc:
+            return Response({
+                'success': False,
+                'message': str(exc)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # ASGI 下使用异步迭代器，否则 Django 会把同步迭代器的全部内容读入内存后才发送
+        chunks = aexport_chunks if isinstance(request._request, ASGIRequest) else export_chunks
+        response = StreamingHttpResponse(
+            chunks(request.user, sections), content_type='application/x-ndjson'
+        )
+        response['Content-Disposition'] = f'attachment; filename="tieba-export-{request.user.pk}.jsonl"'
+        return response
+
+
+class DataExportJobView(APIView):
+    """
+    数据导出作业：POST 提交后台导出（sections 同流式导出），GET 查看自己的导出作业
+    
+    已有未完成的导出作业时直接返回该作业
+    """
+    
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        jobs = UserDataJob.objects.filter(user=request.user, kind=UserDataJob.KIND_EXPORT)[:20]
+        return Response({
+            'success': True,
+            'jobs': UserDataJobSerializer(jobs, many=True).data
+        })
+    
+    def post(self, request):
+        try:
+            sections = parse_sections(request.data.get('sections'))
+        except ValueError as exc:
+            return Response({
+                'success': False,
+                'message': str(exc)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        with transaction.atomic():
+            job = UserDataJob.objects.filter(
+                user=request.user, kind=UserDataJob.KIND_EXPORT,
+                status__in=[UserDataJob.STATUS_PENDING, UserDataJob.STATUS_RUNNING]
+            ).first()
+            if job is None:
+                job = UserDataJob.objects.create(
+                    user=request.user, username=request.user.username,
+                    kind=UserDataJob.KIND_EXPORT, sections=sections
+                )
+                enqueue_data_job(job)
+        
+        return Response({
+            'success': True,
+            'job': UserDataJobSerializer(job).data
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class DataExportJobDetailView(APIView):
+    """数据导出作业进度；?download=1 下载已完成的导出文件"""
+    
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request, job_id):
+        job = UserDataJob.objects.filter(
+            pk=job_id, user=request.user, kind=UserDataJob.KIND_EXPORT
+        ).first()
+        if job is None:
+            return Response({
+                'success': False,
+                'message': '导出作业不存在'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        if request.query_params.get('download'):
+            if job.status != UserDataJob.STATUS_DONE or not export_storage.exists(job.file_name):
+                return Response({
+                    'success': False,
+                    'message': '导出尚未完成'
+                }, status=status.HTTP_409_CONFLICT)
+            return FileResponse(
+                export_storage.open(job.file_name, 'rb'), as_attachment=True,
+                filename=f'tieba-export-{request.user.pk}.jsonl', content_type='application/x-ndjson'
+            )
+        
+        return Response({
+            'success': True,
+            'job': UserDataJobSerializer(job).data
+        })
+
+
+class AccountDeletionView(APIView):
+    """
+    注销账号（需验证密码）
+    
+    账号立即停用并退出登录，关联数据由后台作业分批删除，最后删除用户本身
+    """
+    
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        user = request.user
+        if not user.check_password(request.data.get('password')):
+            return Response({
+                'success': False,
+                'message': '密码错误'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        with transaction.atomic():
+            job = UserDataJob.objects.filter(
+                user=user, kind=UserDataJob.KIND_DELETE,
+                status__in=[UserDataJob.STATUS_PENDING, UserDataJob.STATUS_RUNNING]
+            ).first()
+            if job is None:
+                job = UserDataJob.objects.create(
+                    user=user, username=user.username, kind=UserDataJob.KIND_DELETE
+                )
+                enqueue_data_job(job)
+            # 停用后无法再登录，其他设备上的会话也随之失效
+            User.objects.filter(pk=user.pk).update(is_active=False)
+        
+        logout(request)
+        return Response({
+            'success': True,
+            'message': '账号注销申请已提交，数据将在后台删除',
+            'job': UserDataJobSerializer(job).data
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class UserViewSet(ConditionalRetrieveMixin, CompiledListMixin, viewsets.ModelViewSet):
     """用户视图集"""
     
     queryset = User.objects.all()
     serializer_class = UserSerializer
+    compiled_serializer = compiled_users
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     
+    def get_version_queryset(self):
+        """用户详情的版本列：资料修改时间及各计数"""
+        return User.objects.values(*AUTHOR_CARD_VERSION_FIELDS, last_modified=F('updated_at'))
+    
     @action(detail=True, methods=['get'])
     def followers(self, request, pk=None):
         """获取用户的粉丝列表"""